@@ -1,10 +1,18 @@
+import asyncio
+import errno
 import modal
 import os
-import json
+import tempfile
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from operator import itemgetter
 from datetime import UTC, datetime
+from email.utils import formatdate, parsedate_to_datetime
 
 STORAGE_ROOT = "/cache"
+# Downloads are staged on container-local disk and uploaded to the volume once complete
+LOCAL_DOWNLOAD_ROOT = "/tmp/state_raw"
 FEMA_BASE_URL = 'https://hazards.fema.gov/nfhlv2/output/State/'
 STFIPS = [
     '01', '02', '04', '05', '06', '08', '09', '10', '11', '12', '13', '15', '16',
@@ -13,102 +21,274 @@ STFIPS = [
     '44', '45', '46', '47', '48', '49', '50', '51', '53', '54', '55', '56', '60',
     '66', '69', '72', '78',
 ]
+# State ZIPs run to hundreds of MB; 1 MiB reads keep the per-chunk loop overhead negligible
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+# Files at least this large are fetched as parallel byte ranges when the server allows it
+RANGE_DOWNLOAD_MIN_BYTES = 64 * 1024 * 1024
+RANGE_DOWNLOAD_WORKERS = 8
+# Manifest lookups answered with 429/5xx are retried this many times, backing off from this delay
+MANIFEST_RETRIES = 3
+MANIFEST_RETRY_DELAY = 1.0
 
 
 storage = modal.Volume.from_name("fema-flood-zone-storage")
 
 app = modal.App(
     "fema-flood-zone-pipeline-v2",
-    image=modal.Image.debian_slim().pip_install("requests"),
+    image=modal.Image.debian_slim().pip_install("requests", "httpx[http2]", "orjson", "pycurl"),
 )
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-@app.function(retries=3)
-def get_manifest_for_fips(fips: str) -> dict:
+@lru_cache(maxsize=None)
+def http_session():
+    """Keep-alive session shared by every download a container makes"""
     import requests
-    logger.info(f"Fetching manifest data for FIPS {fips}...")
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32)
+    session.mount("https://", adapter)
+    return session
+
+MANIFEST_FIELDS = itemgetter("product_EFFECTIVE_DATE_STRING", "product_FILE_PATH", "product_FILE_SIZE")
+
+def manifest_url(fips: str) -> str:
+    return (
+        f'https://msc.fema.gov/portal/advanceSearch?affiliate=fema&query&'
+        f'selstate={fips}&selcounty={fips}001&selcommunity={fips}001C&'
+        f'searchedCid={fips}001C&method=search'
+    )
+
+def parse_manifest(fips: str, payload: dict) -> dict:
+    state_data_list = payload.get("EFFECTIVE", {}).get("NFHL_STATE_DATA")
+    if not state_data_list or not isinstance(state_data_list, list):
+        raise ValueError(f"Unexpected or missing data for FIPS {fips}")
+
+    # A missing field raises KeyError, which callers report as a parsing error
+    effective, file_name, file_size = MANIFEST_FIELDS(state_data_list[0])
+    if not all((effective, file_name, file_size)):
+        raise ValueError(f"Empty effective date, file path or file size in manifest for FIPS {fips}")
+
+    return {"fips": fips, "effective": effective, "file_name": file_name, "file_size": file_size}
+
+async def iter_manifests(fips_list: list):
+    """
+    Fetch every state's manifest concurrently over a shared HTTP/2 connection,
+    yielding each as it arrives. A state whose lookup still fails after
+    retries is logged and yielded as None so the other states carry on.
+    """
+    import httpx
+    import orjson
+
+    async def fetch(client, fips):
+        logger.info(f"Fetching manifest data for FIPS {fips}...")
+        try:
+            for attempt in range(MANIFEST_RETRIES + 1):
+                response = await client.get(manifest_url(fips))
+                if response.status_code != 429 and response.status_code < 500 or attempt == MANIFEST_RETRIES:
+                    break
+                logger.warning(f"HTTP {response.status_code} for FIPS {fips}, retrying...")
+                await asyncio.sleep(MANIFEST_RETRY_DELAY * 2 ** attempt)
+            response.raise_for_status()
+            return parse_manifest(fips, orjson.loads(response.content))
+        except httpx.HTTPError as e:
+            logger.error(f"Network error for FIPS {fips}: {e}")
+        # orjson.JSONDecodeError is a ValueError
+        except (ValueError, KeyError, IndexError) as e:
+            logger.error(f"Data parsing error for FIPS {fips}: {e}")
+        return None
+
+    limits = httpx.Limits(max_connections=32)
+    # The transport retries failed connection attempts; fetch retries 429/5xx replies
+    transport = httpx.AsyncHTTPTransport(http2=True, limits=limits, retries=3)
+    async with httpx.AsyncClient(transport=transport, timeout=30) as client:
+        for next_item in asyncio.as_completed([fetch(client, fips) for fips in fips_list]):
+            yield await next_item
+
+def matches_local_copy(head, local_stat: os.stat_result) -> bool:
+    """
+    True if a HEAD reply's Content-Length equals the stored file's size and
+    its Last-Modified is no newer than the file. Covers origins and CDNs that
+    ignore If-Modified-Since and answer 200.
+    """
     try:
-        url = (
-            f'https://msc.fema.gov/portal/advanceSearch?affiliate=fema&query&'
-            f'selstate={fips}&selcounty={fips}001&selcommunity={fips}001C&'
-            f'searchedCid={fips}001C&method=search'
-        )
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
-
-        state_data_list = response.json().get("EFFECTIVE", {}).get("NFHL_STATE_DATA")
-        if not state_data_list or not isinstance(state_data_list, list):
-            raise ValueError(f"Unexpected or missing data for FIPS {fips}")
-
-        state_data = state_data_list[0]
-        manifest_item = {
-            "fips": fips,
-            "effective": state_data.get("product_EFFECTIVE_DATE_STRING"),
-            "file_name": state_data.get("product_FILE_PATH"),
-            "file_size": state_data.get("product_FILE_SIZE"),
-        }
-        
-        for key in ["effective", "file_name", "file_size"]:
-            if not manifest_item[key]:
-                raise ValueError(f"Missing '{key}' in manifest for FIPS {fips}")
-                
-        return manifest_item
-
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Network error for FIPS {fips}: {e}")
-        raise
-    except (ValueError, KeyError, IndexError) as e:
-        logger.error(f"Data parsing error for FIPS {fips}: {e}")
-        raise
+        size = int(head.headers["Content-Length"])
+        modified = parsedate_to_datetime(head.headers["Last-Modified"]).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return False
+    return size == local_stat.st_size and modified <= local_stat.st_mtime
+
+def preallocate(fd: int, size: int):
+    """
+    Reserve size bytes for fd in one extent so the filesystem doesn't grow
+    the file a chunk at a time. Running out of space fails here, before any
+    bandwidth is spent; filesystems without fallocate support are skipped.
+    """
+    try:
+        os.posix_fallocate(fd, 0, size)
+    except OSError as e:
+        if e.errno == errno.ENOSPC:
+            raise
+
+def download_ranges(download_url: str, storage_path: str, total_size: int) -> bool:
+    """
+    Download the file as RANGE_DOWNLOAD_WORKERS concurrent byte ranges, each
+    written into place with pwrite. Returns False if the server answers a
+    range request with anything but 206, so the caller can fall back to a
+    single stream.
+    """
+    part_size = -(-total_size // RANGE_DOWNLOAD_WORKERS)
+    ranges = [(start, min(start + part_size, total_size) - 1) for start in range(0, total_size, part_size)]
+
+    fd = os.open(storage_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        preallocate(fd, total_size)
+
+        def fetch_range(byte_range):
+            start, end = byte_range
+            with http_session().get(download_url, headers={"Range": f"bytes={start}-{end}"}, stream=True, timeout=30) as r:
+                if r.status_code != 206:
+                    return False
+                offset = start
+                while chunk := r.raw.read(DOWNLOAD_CHUNK_SIZE):
+                    view = memoryview(chunk)
+                    while view:
+                        written = os.pwrite(fd, view, offset)
+                        view = view[written:]
+                        offset += written
+            return True
+
+        with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+            return all(list(executor.map(fetch_range, ranges)))
+    finally:
+        os.close(fd)
 
 @app.function(
     timeout=1200,
     memory=2048,
-    volumes={STORAGE_ROOT: storage},
+    # Read-only: finished files go in through batch_upload, so there is nothing to commit on exit
+    volumes={STORAGE_ROOT: storage.read_only()},
+    max_containers=len(STFIPS),
+    retries=3,
 )
+# Downloads are I/O-bound, so one container can keep several states in flight
+@modal.concurrent(max_inputs=4)
 def stream_zip_to_storage(manifest_item: dict):
+    import pycurl
     import requests
+    import urllib3
 
     file_name = manifest_item["file_name"]
     storage_path = os.path.join(STORAGE_ROOT, "state_raw", file_name)
 
-    os.makedirs(os.path.dirname(storage_path), exist_ok=True)
-
-    if os.path.exists(storage_path):
-        logger.warning(f"SKIP: {storage_path} already exists.")
-        return {"fips": manifest_item["fips"], "status": "skipped"}
+    os.makedirs(LOCAL_DOWNLOAD_ROOT, exist_ok=True)
 
     download_url = f"{FEMA_BASE_URL}{file_name}"
-    logger.info(f"Downloading {download_url} to {storage_path}")
 
+    # Ask the origin whether a copy we already have is still current
+    headers = {}
+    local_stat = os.stat(storage_path) if os.path.exists(storage_path) else None
+    if local_stat:
+        headers["If-Modified-Since"] = formatdate(local_stat.st_mtime, usegmt=True)
+
+    # Downloads land in a local temporary file that is uploaded to storage_path
+    # only once complete, so an interrupted run never leaves a truncated ZIP behind
+    tmp_path = None
     try:
-        with requests.get(download_url, stream=True, timeout=30) as r:
-            r.raise_for_status()
-            with open(storage_path, "wb") as f:
-                for chunk in r.iter_content(chunk_size=8192):
-                    f.write(chunk)
-        logger.info(f"SUCCESS: Downloaded {storage_path}")
+        head = http_session().head(download_url, headers=headers, allow_redirects=True, timeout=30)
+        if head.status_code == 304 or (local_stat and head.ok and matches_local_copy(head, local_stat)):
+            logger.info(f"UNCHANGED: {storage_path} is up to date.")
+            return {"fips": manifest_item["fips"], "status": "unchanged"}
+
+        logger.info(f"Downloading {download_url} to {storage_path}")
+        fd, tmp_path = tempfile.mkstemp(dir=LOCAL_DOWNLOAD_ROOT, prefix=f".{file_name}.", suffix=".part")
+        os.close(fd)
+
+        total_size = int(head.headers.get("Content-Length", 0)) if head.ok else 0
+        ranged = (head.headers.get("Accept-Ranges") == "bytes" and total_size >= RANGE_DOWNLOAD_MIN_BYTES
+                  and download_ranges(head.url, tmp_path, total_size))
+        if not ranged:
+            # libcurl reads the body in C and hands each buffer straight to the file
+            curl = pycurl.Curl()
+            try:
+                with open(tmp_path, "wb", buffering=DOWNLOAD_CHUNK_SIZE) as f:
+                    # Content-Length only matches the bytes written when the body isn't compressed
+                    if total_size and head.headers.get("Content-Encoding", "identity") == "identity":
+                        preallocate(f.fileno(), total_size)
+                    curl.setopt(pycurl.URL, download_url)
+                    curl.setopt(pycurl.WRITEDATA, f)
+                    curl.setopt(pycurl.FOLLOWLOCATION, 1)
+                    curl.setopt(pycurl.FAILONERROR, 1)
+                    curl.setopt(pycurl.NOPROGRESS, 1)
+                    curl.setopt(pycurl.BUFFERSIZE, DOWNLOAD_CHUNK_SIZE)
+                    curl.setopt(pycurl.CONNECTTIMEOUT, 30)
+                    # Abort if the transfer stalls for 30 s, like the requests read timeout
+                    curl.setopt(pycurl.LOW_SPEED_LIMIT, 1)
+                    curl.setopt(pycurl.LOW_SPEED_TIME, 30)
+                    curl.perform()
+            finally:
+                curl.close()
+
+        with storage.batch_upload(force=True) as batch:
+            batch.put_file(tmp_path, os.path.relpath(storage_path, STORAGE_ROOT))
+        logger.info(f"SUCCESS: Downloaded {storage_path}" + (f" in {RANGE_DOWNLOAD_WORKERS} ranges" if ranged else ""))
         return {"fips": manifest_item["fips"], "status": "success"}
-    except requests.exceptions.RequestException as e:
+    # Ranged reads from r.raw raise urllib3 errors rather than their requests wrappers;
+    # OSError covers running out of local disk
+    except (requests.exceptions.RequestException, urllib3.exceptions.HTTPError, pycurl.error, OSError,
+            modal.exception.Error) as e:
         logger.error(f"Failed to download {download_url}: {e}")
-        if os.path.exists(storage_path):
-            os.remove(storage_path)
         return {"fips": manifest_item["fips"], "status": "failed", "error": str(e)}
+    finally:
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+# Manifest paths carry their vintage date, so a path's contents never change
+# and warm containers can skip re-reading them
+@lru_cache(maxsize=4)
+def load_manifest(manifest_path: str) -> dict:
+    import orjson
+
+    with open(manifest_path, "rb") as f:
+        return orjson.loads(f.read())
 
 @app.function(volumes={STORAGE_ROOT: storage})
-def manage_manifest(action: str, path: str, data: dict = None):
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    if action == "read":
-        if os.path.exists(path):
-            with open(path, "r") as f:
-                return json.load(f)
-        return None
-    elif action == "write":
-        with open(path, "w") as f:
-            json.dump(data, f, indent=2)
-        return data
+async def stream_manifest(manifest_path: str):
+    """
+    Yield the items of the manifest stored at manifest_path. If it is missing,
+    build it, yielding each state as soon as its lookup returns so downloads
+    can start before the slowest one, then save it.
+    """
+    import orjson
+
+    if os.path.exists(manifest_path):
+        logger.info(f"Manifest '{manifest_path}' already exists. Using it.")
+        for fips, data in load_manifest(manifest_path).items():
+            yield {"fips": fips, **data}
+        return
+
+    logger.info(f"Manifest not found. Generating '{manifest_path}'...")
+    manifest = {}
+    failed = 0
+    async for item in iter_manifests(STFIPS):
+        if item is None:
+            failed += 1
+            continue
+        manifest[item["fips"]] = {key: value for key, value in item.items() if key != "fips"}
+        yield item
+
+    # A partial manifest would be reused as-is by later runs, so only save a complete one
+    if failed:
+        logger.error(f"{failed} manifest lookups failed; not saving '{manifest_path}'")
+        return
+
+    logger.info(f"Saving new manifest to '{manifest_path}'")
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    # Compact output: the manifest is only ever read back by this pipeline
+    with open(manifest_path, "wb") as f:
+        f.write(orjson.dumps(manifest))
 
 @app.local_entrypoint()
 def main():
@@ -117,37 +297,38 @@ def main():
     vintage_name = "mainfest-20250918.json"
     manifest_dir = os.path.join(STORAGE_ROOT, "manifest")
     manifest_path = os.path.join(manifest_dir, f"{vintage_name}.json")
-    manifest = {}
 
-    logger.info("--- Step 1: Building or Getting Manifest ---")
+    logger.info("--- Building or Getting Manifest, Downloading as States Arrive ---")
 
-    result = manage_manifest.remote("delete", manifest_path)
-    print(result)
+    # Each download starts as soon as its manifest item comes back; if the
+    # stream breaks, still wait on the downloads already started
+    calls = []
+    try:
+        for item in stream_manifest.remote_gen(manifest_path):
+            calls.append(stream_zip_to_storage.spawn(item))
+    except Exception as e:
+        logger.error(f"Manifest stream failed after {len(calls)} states: {e}")
 
-    existing_manifest = manage_manifest.remote("read", manifest_path)
+    logger.info(f"\n--- Waiting on {len(calls)} Downloads ---")
 
-    if existing_manifest:
-        logger.info(f"Manifest '{manifest_path}' already exists. Using it.")
-        manifest = existing_manifest
-    else:
-        logger.info(f"Manifest not found. Generating a new one for {vintage_name}...")
-        results = list(get_manifest_for_fips.map(STFIPS))
-        
-        manifest = {item.pop("fips"): item for item in results if item}
-
-        logger.info(f"Uploading new manifest to '{manifest_path}'")
-        manage_manifest.remote("write", manifest_path, data=manifest)
-
-    logger.info(f"\n--- Step 2: Processing {len(manifest)} Files in Parallel ---")
-    
-    manifest_items_to_process = [
-        {"fips": fips, **data} for fips, data in manifest.items()
-    ]
-    
     successful_uploads = 0
-    for result in stream_zip_to_storage.map(manifest_items_to_process, order_outputs=False):
-        if result.get("status") == "success":
+    unchanged = 0
+    failed = 0
+    for call in calls:
+        # A download that crashed after its retries fails only its own state
+        try:
+            status = call.get().get("status")
+        except Exception as e:
+            logger.error(f"Download call {call.object_id} failed: {e}")
+            status = "failed"
+        if status == "success":
             successful_uploads += 1
+        elif status == "unchanged":
+            unchanged += 1
+        else:
+            failed += 1
 
     logger.info(f"\n--- Pipeline Complete ---")
-    logger.info(f"Successfully downloaded {successful_uploads} new files to Modal Volume.")
\ No newline at end of file
+    logger.info(f"Successfully downloaded {successful_uploads} new files to Modal Volume.")
+    logger.info(f"{unchanged} files were already up to date.")
+    logger.info(f"{failed} downloads failed.")
\ No newline at end of file
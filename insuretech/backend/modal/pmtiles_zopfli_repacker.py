@@ -0,0 +1,161 @@
+"""
+Re-compress every tile of a PMTiles archive with zopfli.
+
+zopfli writes standard gzip streams that are a few percent smaller than
+`gzip -9`, and clients inflate them just as fast. The tile server passes
+tiles through with `Content-Encoding: gzip`, so this is a one-off offline
+step that lowers bytes on the wire with no runtime cost.
+
+Usage:
+  modal run pmtiles_zopfli_repacker.py --input-filename NFHL_combined.pmtiles
+  modal run pmtiles_zopfli_repacker.py --input-filename NFHL_combined.pmtiles --iterations 30
+"""
+
+import gzip
+import json
+import logging
+import os
+import shutil
+import tempfile
+from datetime import datetime, UTC
+
+import modal
+
+
+STORAGE_ROOT = "/cache"
+TILES_SUBDIR = "tiles"
+DEFAULT_ITERATIONS = 15
+
+# PMTiles header "tile_compression" value for gzip (spec v3).
+COMPRESSION_GZIP = 2
+
+
+storage = modal.Volume.from_name("fema-flood-zone-storage")
+
+
+def _make_image() -> modal.Image:
+    """Return a Modal image with pmtiles and the zopfli bindings installed."""
+    return modal.Image.debian_slim().pip_install("pmtiles==3.4.0", "zopfli>=0.2.3")
+
+
+app = modal.App(
+    "pmtiles-zopfli-repacker",
+    image=_make_image(),
+)
+
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+
+def _repack_pmtiles(input_path: str, output_path: str, iterations: int) -> dict:
+    """Copy an archive, replacing each tile with its zopfli re-compression."""
+    import zopfli.gzip
+    from pmtiles.reader import Reader, MmapSource, traverse
+    from pmtiles.reader import zxy_to_tileid
+    from pmtiles.writer import Writer
+
+    bytes_in = 0
+    bytes_out = 0
+    tiles = 0
+
+    with open(input_path, "rb") as src, open(output_path, "wb") as out_file:
+        reader = Reader(MmapSource(src))
+        header = reader.header()
+        metadata = reader.metadata() or {}
+        writer = Writer(out_file)
+
+        for (z, x, y), data in traverse(
+            reader.get_bytes,
+            header,
+            header["root_offset"],
+            header["root_length"],
+        ):
+            raw = gzip.decompress(data) if data[:2] == b"\x1f\x8b" else data
+            packed = zopfli.gzip.compress(raw, numiterations=iterations)
+            # zopfli is never meant to lose, but keep whichever gzip is smaller.
+            if data[:2] == b"\x1f\x8b" and len(data) <= len(packed):
+                packed = data
+
+            writer.write_tile(zxy_to_tileid(z, x, y), packed)
+            bytes_in += len(data)
+            bytes_out += len(packed)
+            tiles += 1
+            if tiles % 100_000 == 0:
+                logger.info(f"  Repacked {tiles} tiles ({bytes_in} -> {bytes_out} bytes)")
+
+        header = header.copy()
+        header["tile_compression"] = COMPRESSION_GZIP
+        writer.finalize(header, metadata)
+
+    return {"tiles": tiles, "tile_bytes_in": bytes_in, "tile_bytes_out": bytes_out}
+
+
+@app.function(
+    timeout=60 * 60 * 8,  # zopfli is ~100x slower than gzip -9
+    memory=16384,
+    cpu=8,
+    volumes={STORAGE_ROOT: storage},
+)
+def repack_pmtiles(
+    input_filename: str,
+    output_filename: str = None,
+    iterations: int = DEFAULT_ITERATIONS,
+):
+    """Write a zopfli-compressed copy of a PMTiles archive in the tiles volume.
+
+    Args:
+        input_filename: PMTiles file in the tiles directory to repack.
+        output_filename: Name for the repacked archive. Defaults to
+            `<input>.zopfli.pmtiles`.
+        iterations: zopfli iterations per tile; more is smaller and slower.
+    """
+    tiles_dir = os.path.join(STORAGE_ROOT, TILES_SUBDIR)
+    input_path = os.path.join(tiles_dir, input_filename)
+    if not os.path.exists(input_path):
+        raise FileNotFoundError(f"Missing PMTiles file in volume: {input_path}")
+
+    if output_filename is None:
+        output_filename = input_filename.replace(".pmtiles", ".zopfli.pmtiles")
+
+    logger.info(f"Repacking {input_filename} -> {output_filename} ({iterations} zopfli iterations)")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        repacked = os.path.join(temp_dir, "repacked.pmtiles")
+        stats = _repack_pmtiles(input_path, repacked, iterations)
+
+        target_path = os.path.join(tiles_dir, output_filename)
+        logger.info(f"Moving repacked archive to {target_path}")
+        shutil.move(repacked, target_path)
+
+    storage.commit()
+
+    saved = stats["tile_bytes_in"] - stats["tile_bytes_out"]
+    result = {
+        "input": input_path,
+        "output": target_path,
+        "iterations": iterations,
+        **stats,
+        "saved_pct": round(100.0 * saved / stats["tile_bytes_in"], 2) if stats["tile_bytes_in"] else 0.0,
+        "generated_at": datetime.now(UTC).isoformat(),
+    }
+    logger.info(f"Repack complete: {result}")
+    return result
+
+
+@app.local_entrypoint()
+def main(
+    input_filename: str = "NFHL_combined.pmtiles",
+    output_filename: str = None,
+    iterations: int = DEFAULT_ITERATIONS,
+):
+    """Enable local invocation with `modal run`."""
+    result = repack_pmtiles.remote(
+        input_filename=input_filename,
+        output_filename=output_filename,
+        iterations=iterations,
+    )
+    print(json.dumps(result, indent=2))
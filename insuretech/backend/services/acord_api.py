@@ -2,16 +2,23 @@ import modal
 import os
 import json
 import base64
+import hashlib
 import uuid
 import time
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from io import BytesIO
-from fastapi import FastAPI, File, UploadFile, HTTPException, Depends, Header
+import asyncio
+from fastapi import FastAPI, File, UploadFile, HTTPException, Depends, Header, Query, Response
 from fastapi.responses import JSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
 
+try:  # zstd-compress large progress replies (installed in the Modal image)
+    import zstandard
+except ImportError:
+    zstandard = None
+
 # Modal app setup
 app = modal.App("acord-processing-api")
 
@@ -29,7 +36,8 @@ image = modal.Image.debian_slim().pip_install(
     "PyPDF2",
     "pdf2image",
     "Pillow",
-    "python-multipart"
+    "python-multipart",
+    "zstandard"
 ).apt_install(
     "poppler-utils"
 )
@@ -37,6 +45,18 @@ image = modal.Image.debian_slim().pip_install(
 # Shared progress tracking using Modal Dict
 progress_store = modal.Dict.from_name("acord-progress-store")
 
+# Long-poll limits for /progress?wait=N. The store is written from another
+# container, so waiting means re-reading it on a short interval server-side.
+PROGRESS_MAX_WAIT = 30
+PROGRESS_CHECK_INTERVAL = 0.5
+
+# Progress replies at least this large (i.e. carrying a completed job's
+# extracted data) are zstd-compressed for clients that accept it
+PROGRESS_COMPRESS_MIN_BYTES = 1024
+
+# Most PDFs accepted by one /batch-upload request
+MAX_BATCH_FILES = 20
+
 # ACORD prompts (same as bin/acord.py)
 ACORD_125_PROMPT = """You are a data extraction specialist. Extract ALL information from the provided ACORD 125 insurance form document and return it in valid JSON format only. Do not include any explanatory text, comments, or markdown formatting - return only the JSON object.
 
@@ -606,21 +626,153 @@ async def upload_acord(file: UploadFile = File(...), token: str = Depends(verify
         print(f"[UPLOAD] Error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
+@web_app.post("/batch-upload")
+async def batch_upload_acord(files: List[UploadFile] = File(...), token: str = Depends(verify_token)):
+    """Upload several ACORD PDFs in one request; each becomes its own job"""
+    if len(files) > MAX_BATCH_FILES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_FILES} files per batch")
+    for file in files:
+        if not file.filename.lower().endswith('.pdf'):
+            raise HTTPException(status_code=400, detail=f"File must be a PDF: {file.filename}")
+
+    try:
+        job_ids = []
+        for file in files:
+            job_id = str(uuid.uuid4())
+            pdf_bytes = await file.read()
+            print(f"[BATCH-UPLOAD] Read {file.filename} ({len(pdf_bytes)} bytes) as job {job_id}")
+
+            update_progress(job_id, "queued", "uploaded", 5, "File uploaded, queuing for processing...")
+            process_acord_document.spawn(pdf_bytes, job_id)
+            job_ids.append(job_id)
+
+        return JSONResponse({
+            "job_ids": job_ids,
+            "status": "queued",
+            "message": f"{len(job_ids)} files uploaded successfully and queued for processing"
+        })
+
+    except Exception as e:
+        print(f"[BATCH-UPLOAD] Error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Batch upload failed: {str(e)}")
+
+def progress_etag(progress_data: dict) -> str:
+    """Strong ETag for a progress record; every update_progress() call changes it"""
+    key = "|".join(str(progress_data.get(field)) for field in ("status", "stage", "progress", "message", "timestamp"))
+    return f'"{hashlib.sha1(key.encode()).hexdigest()}"'
+
+def progress_response(content: dict, accept_encoding: Optional[str], etag: Optional[str] = None) -> Response:
+    """JSON progress reply, zstd-compressed when large and the client accepts zstd"""
+    headers = {"ETag": etag} if etag else {}
+    response = JSONResponse(content, headers=headers)
+    if (
+        zstandard is None
+        or len(response.body) < PROGRESS_COMPRESS_MIN_BYTES
+        or "zstd" not in (accept_encoding or "").lower()
+    ):
+        return response
+
+    headers["Content-Encoding"] = "zstd"
+    headers["Vary"] = "Accept-Encoding"
+    if etag:
+        # Same record, different bytes on the wire
+        headers["ETag"] = f"W/{etag}"
+    return Response(
+        content=zstandard.ZstdCompressor(level=3).compress(response.body),
+        media_type="application/json",
+        headers=headers,
+    )
+
 @web_app.get("/progress/{job_id}")
-async def get_progress(job_id: str, token: str = Depends(verify_token)):
-    """Get processing progress for a job"""
+async def get_progress(
+    job_id: str,
+    wait: float = Query(0, ge=0, le=PROGRESS_MAX_WAIT),
+    since: float = Query(0),
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+    token: str = Depends(verify_token),
+):
+    """Get processing progress for a job
+
+    With ``wait``, long-polls: holds the request open until the job's progress
+    timestamp is newer than ``since`` (or the job has finished), returning 204
+    if nothing changed within ``wait`` seconds. A matching ``If-None-Match``
+    gets 304 with no body instead of the unchanged record.
+    """
     try:
-        if job_id not in progress_store:
+        # .aio reads keep the Dict RPC off the event loop while the request is held open
+        progress_data = await progress_store.get.aio(job_id)
+        if progress_data is None:
             print(f"[PROGRESS] Job {job_id} not found in progress store")
             raise HTTPException(status_code=404, detail="Job not found")
 
-        progress_data = progress_store[job_id]
+        if if_none_match and if_none_match.startswith("W/"):
+            if_none_match = if_none_match[2:]
+
+        deadline = time.monotonic() + wait
+        etag = progress_etag(progress_data)
+        while etag == if_none_match or (
+            progress_data.get('timestamp', 0) <= since
+            and progress_data.get('status') not in ('completed', 'failed')
+        ):
+            if time.monotonic() >= deadline:
+                if etag == if_none_match:
+                    return Response(status_code=304, headers={"ETag": etag})
+                return Response(status_code=204)
+            await asyncio.sleep(PROGRESS_CHECK_INTERVAL)
+            progress_data = await progress_store.get.aio(job_id, {})
+            etag = progress_etag(progress_data)
+
         print(f"[PROGRESS] Retrieved progress for {job_id}: {progress_data.get('status')} | {progress_data.get('stage')}")
-        return JSONResponse(progress_data)
+        return progress_response(progress_data, accept_encoding, etag)
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"[PROGRESS] Error retrieving progress for {job_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error retrieving progress: {str(e)}")
 
+@web_app.get("/progress")
+async def get_batch_progress(
+    ids: str = Query(..., description="Comma-separated job IDs"),
+    wait: float = Query(0, ge=0, le=PROGRESS_MAX_WAIT),
+    since: float = Query(0),
+    accept_encoding: Optional[str] = Header(None),
+    token: str = Depends(verify_token),
+):
+    """Get progress for several jobs at once, keyed by job ID
+
+    Long-polls like /progress/{job_id}: with ``wait``, holds the request open
+    until any job's progress timestamp is newer than ``since`` (or every job
+    has finished), returning 204 if nothing changed within ``wait`` seconds.
+    """
+    job_ids = [job_id for job_id in ids.split(",") if job_id]
+    if not job_ids or len(job_ids) > MAX_BATCH_FILES:
+        raise HTTPException(status_code=400, detail=f"Pass between 1 and {MAX_BATCH_FILES} job IDs")
+
+    try:
+        deadline = time.monotonic() + wait
+        while True:
+            # Fetch every job concurrently without blocking the event loop
+            records = await asyncio.gather(*(progress_store.get.aio(job_id) for job_id in job_ids))
+            jobs = dict(zip(job_ids, records))
+            missing = [job_id for job_id, progress_data in jobs.items() if progress_data is None]
+            if missing:
+                raise HTTPException(status_code=404, detail=f"Jobs not found: {', '.join(missing)}")
+
+            if (
+                any(progress_data.get('timestamp', 0) > since for progress_data in jobs.values())
+                or all(progress_data.get('status') in ('completed', 'failed') for progress_data in jobs.values())
+            ):
+                return progress_response({"jobs": jobs}, accept_encoding)
+            if time.monotonic() >= deadline:
+                return Response(status_code=204)
+            await asyncio.sleep(PROGRESS_CHECK_INTERVAL)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"[PROGRESS] Error retrieving batch progress: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error retrieving progress: {str(e)}")
+
 @web_app.get("/health")
 async def health_check():
     """Health check endpoint"""
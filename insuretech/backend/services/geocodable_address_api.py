@@ -1,6 +1,7 @@
 import modal
 import os
 import json
+import hashlib
 import time
 from typing import Dict, Any
 from fastapi import FastAPI, HTTPException, Depends
@@ -269,6 +270,17 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
 
     return credentials.credentials
 
+# Extraction is a pure function of the request body, so clients may reuse a
+# response briefly; health responses are likewise cacheable for a minute.
+CACHE_MAX_AGE = 60
+
+def cacheable_response(content: dict) -> JSONResponse:
+    """JSONResponse with a strong ETag over its body and a short max-age"""
+    response = JSONResponse(content=content)
+    response.headers["ETag"] = f'"{hashlib.sha256(response.body).hexdigest()[:16]}"'
+    response.headers["Cache-Control"] = f"private, max-age={CACHE_MAX_AGE}"
+    return response
+
 # FastAPI app
 web_app = FastAPI(title="Geocodable Address API", version="1.0.0")
 
@@ -311,7 +323,7 @@ async def extract_address(request: GeocodeRequest, token: str = Depends(verify_t
             return JSONResponse(content=result, status_code=200)
 
         print(f"[API] Returning success result")
-        return JSONResponse(content=result)
+        return cacheable_response(result)
 
     except Exception as e:
         print(f"[API] EXCEPTION: {str(e)}")
@@ -323,7 +335,7 @@ async def extract_address(request: GeocodeRequest, token: str = Depends(verify_t
 @web_app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "service": "geocodable-address-api", "timestamp": time.time()}
+    return cacheable_response({"status": "healthy", "service": "geocodable-address-api", "timestamp": time.time()})
 
 # Deploy the web app
 @app.function(image=image, secrets=[api_secret])
@@ -0,0 +1,93 @@
+//! PMTiles v3 directory decoding.
+//!
+//! A directory is a varint stream of four columns (tile id deltas, run
+//! lengths, lengths, offsets), usually gzip-compressed. Decoding it in Python
+//! means one interpreted loop iteration per varint, which dominates a cold
+//! tile lookup for archives with large leaf directories.
+
+use std::io::Read;
+
+use flate2::read::GzDecoder;
+
+use crate::mvt::DecodeError;
+
+type Result<T> = std::result::Result<T, DecodeError>;
+
+/// Directory columns, in tile id order.
+#[derive(Debug, Default, Clone, PartialEq)]
+pub struct Directory {
+    pub tile_ids: Vec<u64>,
+    pub offsets: Vec<u64>,
+    pub lengths: Vec<u64>,
+    pub run_lengths: Vec<u64>,
+}
+
+fn read_varint(buf: &[u8], pos: &mut usize) -> Result<u64> {
+    let mut result = 0u64;
+    let mut shift = 0u32;
+    loop {
+        let byte = *buf.get(*pos).ok_or(DecodeError("truncated directory"))?;
+        *pos += 1;
+        if shift >= 64 {
+            return Err(DecodeError("varint too long"));
+        }
+        result |= u64::from(byte & 0x7f) << shift;
+        if byte & 0x80 == 0 {
+            return Ok(result);
+        }
+        shift += 7;
+    }
+}
+
+/// Decode a serialized directory; gzip input is inflated first.
+pub fn deserialize_directory(buf: &[u8]) -> Result<Directory> {
+    let inflated;
+    let data = if buf.starts_with(&[0x1f, 0x8b]) {
+        let mut out = Vec::with_capacity(buf.len() * 4);
+        GzDecoder::new(buf)
+            .read_to_end(&mut out)
+            .map_err(|_| DecodeError("invalid gzip directory"))?;
+        inflated = out;
+        &inflated[..]
+    } else {
+        buf
+    };
+
+    let mut pos = 0;
+    let count = read_varint(data, &mut pos)? as usize;
+    // Every entry takes at least four bytes, so a larger count is corrupt.
+    if count > data.len() {
+        return Err(DecodeError("invalid directory entry count"));
+    }
+
+    let mut dir = Directory {
+        tile_ids: Vec::with_capacity(count),
+        offsets: Vec::with_capacity(count),
+        lengths: Vec::with_capacity(count),
+        run_lengths: Vec::with_capacity(count),
+    };
+
+    let mut last_id = 0u64;
+    for _ in 0..count {
+        last_id = last_id.wrapping_add(read_varint(data, &mut pos)?);
+        dir.tile_ids.push(last_id);
+    }
+    for _ in 0..count {
+        dir.run_lengths.push(read_varint(data, &mut pos)?);
+    }
+    for _ in 0..count {
+        dir.lengths.push(read_varint(data, &mut pos)?);
+    }
+    for i in 0..count {
+        let value = read_varint(data, &mut pos)?;
+        // Zero means "directly after the previous entry"; otherwise offset + 1.
+        let offset = if i > 0 && value == 0 {
+            dir.offsets[i - 1] + dir.lengths[i - 1]
+        } else {
+            value.wrapping_sub(1)
+        };
+        dir.offsets.push(offset);
+    }
+    Ok(dir)
+}
+
@@ -0,0 +1,64 @@
+//! Python bindings for the native flood-zone point query and PMTiles
+//! directory decoding.
+//!
+//! Build into the active virtualenv with `maturin develop --release`.
+
+mod directory;
+mod mvt;
+
+use pyo3::exceptions::PyValueError;
+use pyo3::prelude::*;
+use pyo3::types::PyDict;
+
+/// Return ``(layer_name, properties)`` for the first polygon feature in the
+/// tile covering ``(lng, lat)``, or ``None``. ``tile`` may be gzip-compressed.
+#[pyfunction]
+fn find_covering_feature<'py>(
+    py: Python<'py>,
+    tile: &[u8],
+    z: u32,
+    x: u32,
+    y: u32,
+    lng: f64,
+    lat: f64,
+) -> PyResult<Option<(String, Bound<'py, PyDict>)>> {
+    let found = py
+        .allow_threads(|| mvt::find_covering_feature(tile, z, x, y, lng, lat))
+        .map_err(|err| PyValueError::new_err(err.0))?;
+
+    let Some(found) = found else {
+        return Ok(None);
+    };
+
+    let properties = PyDict::new_bound(py);
+    for (key, value) in found.properties {
+        match value {
+            mvt::Value::String(v) => properties.set_item(key, v)?,
+            mvt::Value::Float(v) => properties.set_item(key, v)?,
+            mvt::Value::Int(v) => properties.set_item(key, v)?,
+            mvt::Value::UInt(v) => properties.set_item(key, v)?,
+            mvt::Value::Bool(v) => properties.set_item(key, v)?,
+        }
+    }
+    Ok(Some((found.layer, properties)))
+}
+
+/// Decode a serialized (optionally gzip-compressed) PMTiles directory into
+/// ``(tile_ids, offsets, lengths, run_lengths)`` lists.
+#[pyfunction]
+fn deserialize_directory(
+    py: Python<'_>,
+    buf: &[u8],
+) -> PyResult<(Vec<u64>, Vec<u64>, Vec<u64>, Vec<u64>)> {
+    let dir = py
+        .allow_threads(|| directory::deserialize_directory(buf))
+        .map_err(|err| PyValueError::new_err(err.0))?;
+    Ok((dir.tile_ids, dir.offsets, dir.lengths, dir.run_lengths))
+}
+
+#[pymodule]
+fn tile_query(m: &Bound<'_, PyModule>) -> PyResult<()> {
+    m.add_function(wrap_pyfunction!(find_covering_feature, m)?)?;
+    m.add_function(wrap_pyfunction!(deserialize_directory, m)?)?;
+    Ok(())
+}
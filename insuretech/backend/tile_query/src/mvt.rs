@@ -0,0 +1,307 @@
+//! Minimal Mapbox Vector Tile reader specialised for point-in-polygon lookups.
+//!
+//! Only the parts of the MVT protobuf schema needed to answer "which polygon
+//! feature covers this point" are decoded: layer names/extents, key/value
+//! tables, feature tags and polygon geometry. Everything else is skipped.
+
+use std::f64::consts::PI;
+use std::io::Read;
+
+use flate2::read::GzDecoder;
+
+const MAX_LATITUDE: f64 = 85.05112878;
+const GEOM_TYPE_POLYGON: u64 = 3;
+
+#[derive(Debug, Clone, PartialEq)]
+pub enum Value {
+    String(String),
+    Float(f64),
+    Int(i64),
+    UInt(u64),
+    Bool(bool),
+}
+
+#[derive(Debug, Clone, PartialEq)]
+pub struct Match {
+    pub layer: String,
+    pub properties: Vec<(String, Value)>,
+}
+
+#[derive(Debug, Clone, PartialEq)]
+pub struct DecodeError(pub &'static str);
+
+type Result<T> = std::result::Result<T, DecodeError>;
+
+/// Cursor over a protobuf-encoded buffer.
+struct Pbf<'a> {
+    buf: &'a [u8],
+    pos: usize,
+}
+
+impl<'a> Pbf<'a> {
+    fn new(buf: &'a [u8]) -> Self {
+        Pbf { buf, pos: 0 }
+    }
+
+    fn has_more(&self) -> bool {
+        self.pos < self.buf.len()
+    }
+
+    fn varint(&mut self) -> Result<u64> {
+        let mut result = 0u64;
+        let mut shift = 0u32;
+        loop {
+            let byte = *self.buf.get(self.pos).ok_or(DecodeError("truncated varint"))?;
+            self.pos += 1;
+            if shift >= 64 {
+                return Err(DecodeError("varint too long"));
+            }
+            result |= u64::from(byte & 0x7f) << shift;
+            if byte & 0x80 == 0 {
+                return Ok(result);
+            }
+            shift += 7;
+        }
+    }
+
+    fn take(&mut self, len: usize) -> Result<&'a [u8]> {
+        let end = self
+            .pos
+            .checked_add(len)
+            .filter(|&end| end <= self.buf.len())
+            .ok_or(DecodeError("truncated field"))?;
+        let out = &self.buf[self.pos..end];
+        self.pos = end;
+        Ok(out)
+    }
+
+    fn bytes(&mut self) -> Result<&'a [u8]> {
+        let len = self.varint()? as usize;
+        self.take(len)
+    }
+
+    /// Returns (field number, wire type).
+    fn key(&mut self) -> Result<(u64, u64)> {
+        let key = self.varint()?;
+        Ok((key >> 3, key & 0x7))
+    }
+
+    fn skip(&mut self, wire_type: u64) -> Result<()> {
+        match wire_type {
+            0 => self.varint().map(|_| ()),
+            1 => self.take(8).map(|_| ()),
+            2 => self.bytes().map(|_| ()),
+            5 => self.take(4).map(|_| ()),
+            _ => Err(DecodeError("unsupported wire type")),
+        }
+    }
+}
+
+fn zigzag(n: u64) -> i64 {
+    ((n >> 1) as i64) ^ -((n & 1) as i64)
+}
+
+fn packed_varints(buf: &[u8]) -> Result<Vec<u64>> {
+    let mut pbf = Pbf::new(buf);
+    let mut out = Vec::with_capacity(buf.len());
+    while pbf.has_more() {
+        out.push(pbf.varint()?);
+    }
+    Ok(out)
+}
+
+fn decode_value(buf: &[u8]) -> Result<Value> {
+    let mut pbf = Pbf::new(buf);
+    let mut value = Value::String(String::new());
+    while pbf.has_more() {
+        let (field, wire_type) = pbf.key()?;
+        value = match (field, wire_type) {
+            (1, 2) => Value::String(String::from_utf8_lossy(pbf.bytes()?).into_owned()),
+            (2, 5) => {
+                let raw = pbf.take(4)?;
+                Value::Float(f64::from(f32::from_le_bytes([raw[0], raw[1], raw[2], raw[3]])))
+            }
+            (3, 1) => {
+                let raw = pbf.take(8)?;
+                let mut bytes = [0u8; 8];
+                bytes.copy_from_slice(raw);
+                Value::Float(f64::from_le_bytes(bytes))
+            }
+            (4, 0) => Value::Int(pbf.varint()? as i64),
+            (5, 0) => Value::UInt(pbf.varint()?),
+            (6, 0) => Value::Int(zigzag(pbf.varint()?)),
+            (7, 0) => Value::Bool(pbf.varint()? != 0),
+            _ => {
+                pbf.skip(wire_type)?;
+                continue;
+            }
+        };
+    }
+    Ok(value)
+}
+
+/// Decode polygon geometry commands into rings of tile-space coordinates.
+fn decode_rings(commands: &[u64]) -> Vec<Vec<(f64, f64)>> {
+    let mut rings = Vec::new();
+    let mut ring: Vec<(f64, f64)> = Vec::new();
+    let (mut cx, mut cy) = (0i64, 0i64);
+    let mut i = 0;
+    while i < commands.len() {
+        let command = commands[i] & 0x7;
+        let count = (commands[i] >> 3) as usize;
+        i += 1;
+        match command {
+            1 | 2 => {
+                for _ in 0..count {
+                    if i + 1 >= commands.len() {
+                        return rings;
+                    }
+                    cx += zigzag(commands[i]);
+                    cy += zigzag(commands[i + 1]);
+                    i += 2;
+                    if command == 1 && !ring.is_empty() {
+                        rings.push(std::mem::take(&mut ring));
+                    }
+                    ring.push((cx as f64, cy as f64));
+                }
+            }
+            7 => {
+                if !ring.is_empty() {
+                    rings.push(std::mem::take(&mut ring));
+                }
+            }
+            _ => return rings,
+        }
+    }
+    if !ring.is_empty() {
+        rings.push(ring);
+    }
+    rings
+}
+
+/// Even-odd test across all rings, which handles holes and multipolygons.
+fn rings_contain(rings: &[Vec<(f64, f64)>], px: f64, py: f64) -> bool {
+    let mut inside = false;
+    for ring in rings {
+        let n = ring.len();
+        if n < 3 {
+            continue;
+        }
+        let mut j = n - 1;
+        for i in 0..n {
+            let (xi, yi) = ring[i];
+            let (xj, yj) = ring[j];
+            if (yi > py) != (yj > py) && px < (xj - xi) * (py - yi) / (yj - yi) + xi {
+                inside = !inside;
+            }
+            j = i;
+        }
+    }
+    inside
+}
+
+/// Position of (lng, lat) inside tile z/x/y as fractions of the tile size,
+/// y growing southwards like MVT geometry.
+fn tile_fraction(z: u32, x: u32, y: u32, lng: f64, lat: f64) -> (f64, f64) {
+    let n = f64::from(2u32).powi(z as i32);
+    let lat_rad = lat.clamp(-MAX_LATITUDE, MAX_LATITUDE).to_radians();
+    let fx = (lng + 180.0) / 360.0 * n - f64::from(x);
+    let fy = (1.0 - (lat_rad.tan() + 1.0 / lat_rad.cos()).ln() / PI) / 2.0 * n - f64::from(y);
+    (fx, fy)
+}
+
+struct Feature<'a> {
+    tags: Vec<u64>,
+    geom_type: u64,
+    geometry: &'a [u8],
+}
+
+fn decode_feature(buf: &[u8]) -> Result<Feature<'_>> {
+    let mut pbf = Pbf::new(buf);
+    let mut feature = Feature { tags: Vec::new(), geom_type: 0, geometry: &[] };
+    while pbf.has_more() {
+        match pbf.key()? {
+            (2, 2) => feature.tags = packed_varints(pbf.bytes()?)?,
+            (3, 0) => feature.geom_type = pbf.varint()?,
+            (4, 2) => feature.geometry = pbf.bytes()?,
+            (_, wire_type) => pbf.skip(wire_type)?,
+        }
+    }
+    Ok(feature)
+}
+
+fn search_layer(buf: &[u8], fraction: (f64, f64)) -> Result<Option<Match>> {
+    let mut pbf = Pbf::new(buf);
+    let mut name = String::new();
+    let mut extent = 4096u64;
+    let mut keys: Vec<&[u8]> = Vec::new();
+    let mut values: Vec<&[u8]> = Vec::new();
+    let mut features: Vec<&[u8]> = Vec::new();
+    while pbf.has_more() {
+        match pbf.key()? {
+            (1, 2) => name = String::from_utf8_lossy(pbf.bytes()?).into_owned(),
+            (2, 2) => features.push(pbf.bytes()?),
+            (3, 2) => keys.push(pbf.bytes()?),
+            (4, 2) => values.push(pbf.bytes()?),
+            (5, 0) => extent = pbf.varint()?,
+            (_, wire_type) => pbf.skip(wire_type)?,
+        }
+    }
+    if extent == 0 {
+        extent = 4096;
+    }
+
+    let px = fraction.0 * extent as f64;
+    let py = fraction.1 * extent as f64;
+
+    for raw in features {
+        let feature = decode_feature(raw)?;
+        if feature.geom_type != GEOM_TYPE_POLYGON || feature.tags.len() < 2 {
+            continue;
+        }
+        let rings = decode_rings(&packed_varints(feature.geometry)?);
+        if !rings_contain(&rings, px, py) {
+            continue;
+        }
+
+        let mut properties = Vec::with_capacity(feature.tags.len() / 2);
+        for pair in feature.tags.chunks_exact(2) {
+            let key = keys.get(pair[0] as usize).ok_or(DecodeError("tag key out of range"))?;
+            let value = values.get(pair[1] as usize).ok_or(DecodeError("tag value out of range"))?;
+            properties.push((String::from_utf8_lossy(key).into_owned(), decode_value(value)?));
+        }
+        return Ok(Some(Match { layer: name, properties }));
+    }
+    Ok(None)
+}
+
+/// Find the first polygon feature with properties that covers (lng, lat).
+///
+/// `tile` may be gzip-compressed or raw MVT bytes for tile z/x/y.
+pub fn find_covering_feature(tile: &[u8], z: u32, x: u32, y: u32, lng: f64, lat: f64) -> Result<Option<Match>> {
+    let inflated;
+    let data = if tile.starts_with(&[0x1f, 0x8b]) {
+        let mut out = Vec::with_capacity(tile.len() * 4);
+        GzDecoder::new(tile)
+            .read_to_end(&mut out)
+            .map_err(|_| DecodeError("invalid gzip data"))?;
+        inflated = out;
+        &inflated[..]
+    } else {
+        tile
+    };
+
+    let fraction = tile_fraction(z, x, y, lng, lat);
+    let mut pbf = Pbf::new(data);
+    while pbf.has_more() {
+        match pbf.key()? {
+            (3, 2) => {
+                if let Some(found) = search_layer(pbf.bytes()?, fraction)? {
+                    return Ok(Some(found));
+                }
+            }
+            (_, wire_type) => pbf.skip(wire_type)?,
+        }
+    }
+    Ok(None)
+}
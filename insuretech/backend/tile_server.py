@@ -9,31 +9,72 @@ request based on zoom level and tile bounds.
 
 Install dependencies: pip install fastapi uvicorn pmtiles jinja2
 Run with: uvicorn tile_server:app --host 0.0.0.0 --port 8000 --reload
+Production: uvicorn tile_server:app --host 0.0.0.0 --port 8000 --loop uvloop --http httptools --workers 4
 """
 
+import asyncio
+import bisect
+import concurrent.futures
+import functools
 import gzip
 import io
+import itertools
 import logging
 import math
+import mmap
 import os
-import traceback
+import struct
+import threading
+import time
 from contextlib import asynccontextmanager
-from typing import Dict, List, Optional, Tuple
+from email.utils import formatdate
+from typing import Dict, List, NamedTuple, Optional, Tuple
 
 import jinja2
+from markupsafe import escape
+import numpy as np
+import orjson
 from fastapi import FastAPI, HTTPException, Query, Request
-from pmtiles.reader import Reader, MmapSource
+from fastapi.responses import ORJSONResponse
+from pmtiles.reader import Reader
+from pmtiles.tile import zxy_to_tileid
 from starlette.middleware.cors import CORSMiddleware
+from starlette.middleware.gzip import GZipMiddleware
 from starlette.responses import HTMLResponse, Response
-from starlette.templating import Jinja2Templates
 
 from mapbox_vector_tile import decode as decode_mvt
-# from PIL import Image
-from shapely.geometry import Point, shape
+from PIL import Image
+import shapely
+from shapely.geometry import shape
+
+try:  # native MVT point query and directory decoding (backend/tile_query, `make tile-query`)
+    import tile_query
+except ImportError:  # pragma: no cover - fall back to the Shapely path
+    tile_query = None
+
+try:  # libdeflate bindings (pip install deflate); inflates ~2-3x faster than zlib
+    import deflate
+except ImportError:  # pragma: no cover - fall back to isal or the stdlib
+    deflate = None
+
+try:  # JIT for the per-lookup Hilbert tile id (pip install numba)
+    import numba
+except ImportError:  # pragma: no cover - fall back to pmtiles' pure-Python version
+    numba = None
+
+try:  # Intel ISA-L bindings (pip install isal); also ~2x faster than zlib
+    from isal import igzip
+except ImportError:  # pragma: no cover - fall back to the stdlib
+    igzip = None
 
 # --- CONFIGURATION ---
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
+# Per-tile events are logged at DEBUG so busy tile traffic does not pay for
+# synchronous stderr writes; set TILE_LOG_LEVEL=DEBUG to see them.
+logging.basicConfig(level=os.environ.get("TILE_LOG_LEVEL", "WARNING").upper())
+logger = logging.getLogger("tile_server")
+
 # Describe the PMTiles archives that should be loaded. Each entry should point
 # to a PMTiles file on disk; if it is missing it will simply be skipped.
 SLOSH_CATEGORIES = [
@@ -54,6 +95,21 @@ for category in SLOSH_CATEGORIES:
     SLOSH_CATEGORY_LOOKUP[short] = category
     SLOSH_CATEGORY_LOOKUP[digit] = category
 
+# Also key the spellings clients actually send ("Category1", "CAT1", ...) so
+# the common case is a single dict hit without allocating a normalised copy.
+for alias, category in list(SLOSH_CATEGORY_LOOKUP.items()):
+    SLOSH_CATEGORY_LOOKUP.setdefault(category, category)
+    SLOSH_CATEGORY_LOOKUP.setdefault(alias.upper(), category)
+    SLOSH_CATEGORY_LOOKUP.setdefault(alias.capitalize(), category)
+
+
+def _canonical_slosh_category(category: str) -> Optional[str]:
+    """Map a client-supplied SLOSH category to its canonical name, or None."""
+    canonical = SLOSH_CATEGORY_LOOKUP.get(category)
+    if canonical is None:
+        canonical = SLOSH_CATEGORY_LOOKUP.get(category.strip().lower())
+    return canonical
+
 PMTILES_VARIANTS: List[Dict[str, str]] = [
     {
         "key": "nfhl_combined",
@@ -72,11 +128,75 @@ PMTILES_VARIANTS: List[Dict[str, str]] = [
     },
 ]
 
+class Directory(NamedTuple):
+    """A deserialized PMTiles directory as parallel columns (tile ids sorted for bisect)."""
+
+    tile_ids: List[int]
+    offsets: List[int]
+    lengths: List[int]
+    run_lengths: List[int]
+
+
+class CatalogEntry(NamedTuple):
+    """A loaded PMTiles archive. Attribute access keeps the tile hot path off dict lookups."""
+
+    key: str
+    dataset: str
+    path: str
+    mapping: mmap.mmap
+    reader: Reader
+    header: Dict[str, object]
+    # Deserialized root directory; consulted by every tile lookup.
+    root_directory: Directory
+    metadata: Dict[str, object]
+    min_zoom: int
+    max_zoom: int
+    bounds: Tuple[float, float, float, float]
+    tile_type: object
+    content_type: str
+    # Response headers for every tile when the header declares the tile
+    # compression, None when it is unknown and each tile must be sniffed.
+    tile_headers: Optional[Dict[str, str]]
+    # Fallbacks for the sniffing path.
+    plain_headers: Dict[str, str]
+    gzip_headers: Dict[str, str]
+    # Archive mtime in hex; tile ETags are this plus the tile's offset/length.
+    etag_prefix: str
+    category: Optional[str] = None
+    # Every tile entry of the archive with leaf directories resolved, as
+    # uint64 arrays sorted by tile id; None for archives too big to flatten.
+    flat_directory: Optional[Directory] = None
+
+
 # Global catalogue of loaded PMTiles variants indexed by their key.
-CatalogEntry = Dict[str, object]
 pmtiles_catalog: Dict[str, CatalogEntry] = {}
 # Map dataset name -> list of variant keys for quick lookup.
 pmtiles_datasets: Dict[str, List[str]] = {}
+# File status per configured variant, captured once at startup for /health.
+pmtiles_file_status: Dict[str, Dict[str, object]] = {}
+# Per-archive concurrency limits so one slow (cold, paging) archive cannot
+# occupy every threadpool slot and stall tiles served from the others.
+READER_CONCURRENCY = int(os.environ.get("TILE_READER_CONCURRENCY", 16))
+pmtiles_semaphores: Dict[str, asyncio.Semaphore] = {}
+# Requests currently waiting on or holding each archive's semaphore.
+pmtiles_in_flight: Dict[str, int] = {}
+# Per dataset, a tuple indexed by zoom holding variant keys already ordered by
+# preference (zoom penalty, then highest max zoom). Built once at startup so
+# tile requests only need the bounds check.
+MAX_ZOOM_LEVELS = 32
+pmtiles_zoom_order: Dict[str, Tuple[Tuple[str, ...], ...]] = {}
+# Datasets with many variants (e.g. regionally tiled archives) also keep, per
+# zoom, an (N, 4) array of bounds in preference order so picking an archive is
+# one vectorised overlap test; below the threshold a linear scan of a few
+# tuples is cheaper than the NumPy call overhead.
+SPATIAL_INDEX_MIN_VARIANTS = 8
+pmtiles_zoom_bounds: Dict[str, Tuple[np.ndarray, ...]] = {}
+# TileJSON for /info (without the request-relative "tiles" URL) and the
+# per-archive summary shown on the landing pages, built once at startup.
+pmtiles_info: Dict[str, object] = {}
+pmtiles_files_info: Dict[str, Dict[str, object]] = {}
+# Response headers for /tiles-batch; Last-Modified is the newest archive mtime.
+pmtiles_batch_headers: Dict[str, str] = {}
 
 TILE_TYPE_TO_MIME = {
     1: "application/vnd.mapbox-vector-tile",
@@ -85,6 +205,43 @@ TILE_TYPE_TO_MIME = {
     4: "image/webp",
 }
 
+# PMTiles header "tile_compression" values (spec v3).
+COMPRESSION_NONE = 1
+COMPRESSION_GZIP = 2
+COMPRESSION_BROTLI = 3
+COMPRESSION_ZSTD = 4
+
+# Content-Encoding for tiles stored compressed; served as-is to the client.
+COMPRESSION_TO_CONTENT_ENCODING = {
+    COMPRESSION_GZIP: "gzip",
+    COMPRESSION_BROTLI: "br",
+    COMPRESSION_ZSTD: "zstd",
+}
+
+# Tile bytes at a URL only change when an archive is rebuilt; immutable stops
+# browsers revalidating on reload within max-age, and the ETag covers the rest.
+TILE_CACHE_CONTROL = "public, max-age=86400, immutable"
+# Headers for 204 responses. Tiles outside every archive's bounds can never
+# exist, so clients may cache them for good; misses inside the bounds are
+# cached briefly in case an archive is rebuilt with more coverage.
+OUT_OF_BOUNDS_TILE_HEADERS = {"Cache-Control": "public, max-age=86400, immutable"}
+MISSING_TILE_HEADERS = {"Cache-Control": "public, max-age=3600"}
+
+# /tiles-batch: URL layer name -> dataset, and the frame prefix written before
+# each tile: payload length, PMTiles tile_type, PMTiles tile_compression.
+# A zero-length frame marks a tile the archive does not contain.
+TILE_BATCH_MAX = 32
+TILE_ROUTE_DATASETS = {"floodzone": "flood_zones", "slosh": "slosh", "fema_structures": "fema_structures"}
+TILE_BATCH_FRAME = struct.Struct(">IBB")
+
+# PMTiles allows at most three levels of leaf directories below the root.
+MAX_DIRECTORY_DEPTH = 4
+
+
+def _enum_value(value: object) -> object:
+    """Unwrap pmtiles header enums (TileType, Compression) to their int codes."""
+    return getattr(value, "value", value)
+
 
 def _lon_lat_bounds_from_header(header: Dict[str, int]) -> Tuple[float, float, float, float]:
     """Convert fixed-point header bounds to floats."""
@@ -96,19 +253,30 @@ def _lon_lat_bounds_from_header(header: Dict[str, int]) -> Tuple[float, float, f
     )
 
 
+def _mercator_to_lat(tile_y: int, n: int) -> float:
+    exp = math.pi * (1 - 2 * tile_y / n)
+    return math.degrees(math.atan(math.sinh(exp)))
+
+
+# Tile bounds are requested for the same z/x/y by catalog selection and by
+# feature decoding, so memoise them instead of redoing the transcendentals.
+@functools.lru_cache(maxsize=65536)
 def _tile_xyz_to_lon_lat_bounds(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
     """Return lon/lat bounds for a WebMercator tile."""
     n = 2 ** z
     lon_min = x / n * 360.0 - 180.0
     lon_max = (x + 1) / n * 360.0 - 180.0
+    lat_max = _mercator_to_lat(y, n)
+    lat_min = _mercator_to_lat(y + 1, n)
+    return (lon_min, lat_min, lon_max, lat_max)
 
-    def mercator_to_lat(tile_y: int) -> float:
-        exp = math.pi * (1 - 2 * tile_y / n)
-        return math.degrees(math.atan(math.sinh(exp)))
 
-    lat_max = mercator_to_lat(y)
-    lat_min = mercator_to_lat(y + 1)
-    return (lon_min, lat_min, lon_max, lat_max)
+def _zoom_penalty(z: int, min_zoom: int, max_zoom: int) -> int:
+    if min_zoom <= z <= max_zoom:
+        return 0
+    if z < min_zoom:
+        return min_zoom - z
+    return z - max_zoom
 
 
 def _bbox_intersects(a: Tuple[float, float, float, float], b: Tuple[float, float, float, float]) -> bool:
@@ -116,14 +284,23 @@ def _bbox_intersects(a: Tuple[float, float, float, float], b: Tuple[float, float
     return not (a[2] <= b[0] or a[0] >= b[2] or a[3] <= b[1] or a[1] >= b[3])
 
 
-def _latlng_to_slippy(lat: float, lon: float, z: int) -> Tuple[int, int, int, int]:
-    lat = max(min(lat, 85.05112878), -85.05112878)
+# Latitude limit of the square WebMercator world.
+MAX_MERCATOR_LAT = 85.05112878
+
+
+def _mercator_fraction(lon: float, lat: float) -> Tuple[float, float]:
+    """Return WebMercator x/y as fractions of the world (y grows southwards)."""
+    lat = max(min(lat, MAX_MERCATOR_LAT), -MAX_MERCATOR_LAT)
     lon = (lon + 180.0) % 360.0 - 180.0
+    # asinh(tan(lat)) == log(tan(lat) + sec(lat)) with one transcendental fewer.
+    return (lon + 180.0) / 360.0, (1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0
 
-    lat_rad = math.radians(lat)
-    n = 2 ** z
-    x_float = (lon + 180.0) / 360.0 * n
-    y_float = (1.0 - math.log(math.tan(lat_rad) + 1 / math.cos(lat_rad)) / math.pi) / 2.0 * n
+
+def _latlng_to_slippy(lat: float, lon: float, z: int) -> Tuple[int, int, int, int]:
+    n = 1 << z
+    x_frac, y_frac = _mercator_fraction(lon, lat)
+    x_float = x_frac * n
+    y_float = y_frac * n
 
     x_tile = int(math.floor(x_float))
     y_tile = int(math.floor(y_float))
@@ -137,47 +314,108 @@ def _latlng_to_slippy(lat: float, lon: float, z: int) -> Tuple[int, int, int, in
     return x_tile, y_tile, x_pixel, y_pixel
 
 
-def _lon_lat_to_tile(z: int, lon: float, lat: float) -> Tuple[int, int]:
-    """Convert geographic coordinates to XYZ tile indices for a zoom level."""
-    # Clamp latitude to WebMercator valid range to avoid math overflow.
-    lat = max(min(lat, 85.05112878), -85.05112878)
-    lon = (lon + 180.0) % 360.0 - 180.0
+def _fraction_to_tile(z: int, x_frac: float, y_frac: float) -> Tuple[int, int]:
+    """Scale world fractions from `_mercator_fraction` to XYZ tile indices."""
+    n = 1 << z
+    x = int(min(max(x_frac * n, 0), n - 1))
+    y = int(min(max(y_frac * n, 0), n - 1))
+    return x, y
 
-    lat_rad = math.radians(lat)
-    n = 2 ** z
-    x_float = (lon + 180.0) / 360.0 * n
-    y_float = (1.0 - math.log(math.tan(lat_rad) + 1 / math.cos(lat_rad)) / math.pi) / 2.0 * n
 
-    x = int(min(max(x_float, 0), n - 1))
-    y = int(min(max(y_float, 0), n - 1))
-    return x, y
+def _lon_lat_to_tile(z: int, lon: float, lat: float) -> Tuple[int, int]:
+    """Convert geographic coordinates to XYZ tile indices for a zoom level."""
+    return _fraction_to_tile(z, *_mercator_fraction(lon, lat))
+
+
+def _hilbert_tile_id(z: int, x: int, y: int) -> int:
+    """Return the PMTiles tile id of z/x/y, as pmtiles.tile.zxy_to_tileid does.
+
+    Ids count every tile of the lower zooms, then walk zoom z along a
+    Hilbert curve. Kept free of Python objects so numba can compile it.
+    """
+    if z > 31:
+        raise OverflowError("tile zoom exceeds 64-bit limit")
+    n = 1 << z
+    if x < 0 or y < 0 or x >= n or y >= n:
+        raise ValueError("tile x/y outside zoom level bounds")
+    tile_id = ((1 << (2 * z)) - 1) // 3
+    s = n >> 1
+    while s > 0:
+        rx = 1 if x & s else 0
+        ry = 1 if y & s else 0
+        tile_id += s * s * ((3 * rx) ^ ry)
+        if ry == 0:
+            if rx == 1:
+                x = n - 1 - x
+                y = n - 1 - y
+            x, y = y, x
+        s >>= 1
+    return tile_id
+
+
+# Only compiled when numba is installed; otherwise use the pmtiles original.
+_tile_id = numba.njit(cache=True)(_hilbert_tile_id) if numba is not None else zxy_to_tileid
 
 
 def _decompress_tile(tile_data: bytes) -> bytes:
     """Return decompressed tile bytes, handling gzip-compressed payloads."""
     if tile_data.startswith(b"\x1f\x8b"):
+        if deflate is not None:
+            return deflate.gzip_decompress(tile_data)
+        if igzip is not None:
+            return igzip.decompress(tile_data)
         return gzip.decompress(tile_data)
     return tile_data
 
 
-def _project_point_to_lonlat(x: float, y: float, bbox: Tuple[float, float, float, float], extent: int) -> Tuple[float, float]:
+def _is_point(coords) -> bool:
+    return isinstance(coords, (list, tuple)) and bool(coords) and isinstance(coords[0], (int, float))
+
+
+def _tile_affine(bbox: Tuple[float, float, float, float], extent: int) -> Tuple[float, float, float, float]:
+    """Return (lon_min, lon_step, lat_min, lat_step) mapping tile units to degrees.
+
+    mapbox_vector_tile.decode flips MVT's y-down axis by default, so decoded
+    y grows northwards from the bottom edge of the tile.
+    """
     lon_min, lat_min, lon_max, lat_max = bbox
-    lon_span = lon_max - lon_min
-    lat_span = lat_max - lat_min
-
-    lon = lon_min + (x / extent) * lon_span
-    lat = lat_max - (y / extent) * lat_span
-    return lon, lat
-
-
-def _transform_geometry_coordinates(coords, bbox, extent):
-    if isinstance(coords, (list, tuple)) and coords and isinstance(coords[0], (int, float)):
-        return _project_point_to_lonlat(coords[0], coords[1], bbox, extent)
-    if isinstance(coords, (list, tuple)):
-        return [
-            _transform_geometry_coordinates(child, bbox, extent)
-            for child in coords
-        ]
+    return lon_min, (lon_max - lon_min) / extent, lat_min, (lat_max - lat_min) / extent
+
+
+def _transform_geometry_coordinates(coords, affine: Tuple[float, float, float, float]):
+    """Project tile-space coordinates to lon/lat with one vectorised affine.
+
+    Decoded MVT coordinates are freshly built nested lists, so points are
+    replaced in place: one iterative walk collects every vertex slot, NumPy
+    transforms them all at once and the results are written back.
+    """
+    lon_min, lon_step, lat_min, lat_step = affine
+    if _is_point(coords):
+        return (lon_min + coords[0] * lon_step, lat_min + coords[1] * lat_step)
+    if not isinstance(coords, list):
+        return coords
+
+    slots: List[Tuple[list, int]] = []
+    flat: List[float] = []
+    stack = [coords]
+    while stack:
+        node = stack.pop()
+        for index, child in enumerate(node):
+            if _is_point(child):
+                slots.append((node, index))
+                flat.append(child[0])
+                flat.append(child[1])
+            elif isinstance(child, list):
+                stack.append(child)
+
+    if not slots:
+        return coords
+
+    xy = np.asarray(flat, dtype=np.float64).reshape(-1, 2)
+    xy[:, 0] = lon_min + xy[:, 0] * lon_step
+    xy[:, 1] = lat_min + xy[:, 1] * lat_step
+    for (node, index), point in zip(slots, xy.tolist()):
+        node[index] = tuple(point)
     return coords
 
 
@@ -192,22 +430,238 @@ def _iter_tile_features(tile_bytes: bytes, z: int, x: int, y: int):
 
         features = layer.get("features", [])
         extent = layer.get("extent", 4096) or 4096
+        affine = _tile_affine(bbox, extent)
 
         for feature in features:
             geometry = feature.get("geometry")
             if geometry and "coordinates" in geometry:
                 transformed = {
                     "type": geometry.get("type"),
-                    "coordinates": _transform_geometry_coordinates(geometry.get("coordinates"), bbox, extent),
+                    "coordinates": _transform_geometry_coordinates(geometry.get("coordinates"), affine),
                 }
                 feature = {**feature, "geometry": transformed}
 
             yield layer_name, feature
 
 
+def _feature_shape(geometry: Dict[str, object]):
+    """Build a Shapely geometry, or None for malformed/empty input."""
+    try:
+        geom = shape(geometry)
+    except Exception as exc:  # pragma: no cover - invalid geometry
+        logger.debug("Invalid feature geometry: %s", exc)
+        return None
+    return None if geom.is_empty else geom
+
+
+class DecodedTile(NamedTuple):
+    """Features of one tile, ready for point-in-polygon queries."""
+
+    layers: Tuple[str, ...]
+    properties: Tuple[Dict[str, object], ...]
+    # Prepared Shapely geometries (None where a geometry was invalid/empty).
+    geometries: np.ndarray
+
+
+@functools.lru_cache(maxsize=512)
+def _decoded_tile(key: str, z: int, x: int, y: int) -> Optional[DecodedTile]:
+    """Decode a tile once and keep its features as prepared geometries.
+
+    Point queries around the same location keep hitting the same tiles, so
+    the inflate, protobuf decode and GEOS geometry construction are only paid
+    on the first lookup; prepared geometries also make later containment
+    tests cheaper. Returns None when the archive has no tile at z/x/y.
+    """
+    _cache_miss.flag = True
+    tile_data = _read_tile_view(pmtiles_catalog[key], z, x, y)
+    if tile_data is None:
+        return None
+
+    layers: List[str] = []
+    properties: List[Dict[str, object]] = []
+    geoms = []
+    for layer_name, feature in _iter_tile_features(_decompress_tile(bytes(tile_data)), z, x, y):
+        geometry = feature.get("geometry")
+        props = feature.get("properties")
+        if not geometry or not props:
+            continue
+        layers.append(layer_name)
+        properties.append(props)
+        geoms.append(_feature_shape(geometry))
+
+    geometries = np.array(geoms, dtype=object)
+    shapely.prepare(geometries)
+    return DecodedTile(tuple(layers), tuple(properties), geometries)
+
+
+# Background pool warming the 3x3 neighbourhood of a request that missed the
+# cache: decoded tiles for point queries (clicking around a map) and tile
+# locations plus their pages for tile requests (panning). Created in
+# initialize_pmtiles(). Queued warm-ups are capped so a cold burst cannot
+# grow the queue without bound; extra prefetches are simply dropped.
+_prefetch_pool: Optional[concurrent.futures.ThreadPoolExecutor] = None
+PREFETCH_MAX_PENDING = 256
+_prefetch_slots = threading.BoundedSemaphore(PREFETCH_MAX_PENDING)
+
+
+def _warm_decoded_tile(key: str, z: int, x: int, y: int) -> None:
+    try:
+        _decoded_tile(key, z, x, y)
+    except Exception as exc:  # pragma: no cover - best effort, catalog may be gone
+        logger.debug("Prefetch of tile %s/%s/%s failed: %s", z, x, y, exc)
+
+
+def _warm_tile_location(key: str, z: int, x: int, y: int) -> None:
+    try:
+        location = _cached_tile_location(key, z, x, y)
+        if location is not None:
+            offset, length = location
+            start = offset - offset % mmap.PAGESIZE
+            pmtiles_catalog[key].mapping.madvise(mmap.MADV_WILLNEED, start, offset + length - start)
+    except Exception as exc:  # pragma: no cover - best effort, catalog may be gone
+        logger.debug("Prefetch of tile %s/%s/%s failed: %s", z, x, y, exc)
+
+
+def _release_prefetch_slot(_future) -> None:
+    _prefetch_slots.release()
+
+
+def _prefetch_neighbors(key: str, z: int, x: int, y: int, warm=_warm_decoded_tile) -> None:
+    pool = _prefetch_pool
+    if pool is None:
+        return
+    n = 1 << z
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            nx, ny = x + dx, y + dy
+            if (dx or dy) and 0 <= nx < n and 0 <= ny < n:
+                if not _prefetch_slots.acquire(blocking=False):
+                    return
+                pool.submit(warm, key, z, nx, ny).add_done_callback(_release_prefetch_slot)
+
+
+def _open_mmap(path: str) -> mmap.mmap:
+    """Map a PMTiles archive read-only, hinting random access to the kernel.
+
+    Tile lookups jump between directories and tile data, so readahead mostly
+    pulls in pages that are never used. The mapping is shared and file-backed,
+    so uvicorn workers mapping the same archive share one copy in the page
+    cache. It keeps its own reference to the file, so no handle stays open.
+    """
+    with open(path, "rb") as file_handle:
+        fd = file_handle.fileno()
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_RANDOM)
+        mapping = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+    if hasattr(mmap, "MADV_RANDOM"):
+        mapping.madvise(mmap.MADV_RANDOM)
+    return mapping
+
+
+def _prefetch_directories(mapping: mmap.mmap, header: Dict[str, object]) -> None:
+    """Ask the kernel to page in the root and leaf directories ahead of use.
+
+    MADV_RANDOM disables readahead for the whole mapping, but every tile
+    lookup walks these regions, so fault them in with one async request
+    rather than page by page on the first tiles served.
+    """
+    if not hasattr(mmap, "MADV_WILLNEED"):
+        return
+    regions = (
+        (0, header["root_offset"] + header["root_length"]),
+        (header.get("leaf_directory_offset", 0), header.get("leaf_directory_length", 0)),
+    )
+    for offset, length in regions:
+        if length <= 0:
+            continue
+        start = offset - offset % mmap.PAGESIZE
+        length = min(offset + length, len(mapping)) - start
+        try:
+            mapping.madvise(mmap.MADV_WILLNEED, start, length)
+        except (OSError, ValueError):  # pragma: no cover - advisory only
+            logger.debug("madvise(WILLNEED) failed for offset %d", start)
+
+
+def _mmap_get_bytes(mapping: mmap.mmap):
+    """Return a pmtiles ``get_bytes(offset, length)`` source slicing ``mapping``."""
+
+    def get_bytes(offset: int, length: int) -> bytes:
+        return mapping[offset : offset + length]
+
+    return get_bytes
+
+
+def _check_protobuf_backend() -> str:
+    """Warn when MVT decoding would run on protobuf's pure-Python backend.
+
+    mapbox_vector_tile parses tiles through protobuf; the upb (protobuf>=4.21)
+    and C++ backends decode dense tiles many times faster than pure Python.
+    """
+    try:
+        from google.protobuf.internal import api_implementation
+    except ImportError:  # pragma: no cover - protobuf internals moved
+        return "unknown"
+
+    backend = api_implementation.Type()
+    if backend == "python":
+        logger.warning(
+            "protobuf is using its pure-Python backend; install protobuf>=4.21 "
+            "(upb) for faster vector tile decoding"
+        )
+    return backend
+
+
+def _build_info(dataset: str = "flood_zones") -> Dict[str, object]:
+    """Assemble the TileJSON served by /info, minus the request-relative tile URL."""
+    entries = [pmtiles_catalog[key] for key in pmtiles_datasets.get(dataset, [])]
+    if not entries:
+        return {}
+
+    min_zoom = min(entry.min_zoom for entry in entries)
+    max_zoom = max(entry.max_zoom for entry in entries)
+
+    bounds = (
+        min(entry.bounds[0] for entry in entries),
+        min(entry.bounds[1] for entry in entries),
+        max(entry.bounds[2] for entry in entries),
+        max(entry.bounds[3] for entry in entries),
+    )
+
+    # Use the highest-resolution archive for name/center metadata.
+    reference_entry = max(entries, key=lambda entry: entry.max_zoom)
+    header = reference_entry.header
+    metadata = reference_entry.metadata
+
+    center = [
+        header.get("center_lon_e7", 0) / 1e7,
+        header.get("center_lat_e7", 0) / 1e7,
+        header.get("center_zoom", max_zoom),
+    ]
+
+    return {
+        "tilejson": "2.2.0",
+        "name": metadata.get("name", "Flood Zones"),
+        "minzoom": min_zoom,
+        "maxzoom": max_zoom,
+        "bounds": bounds,
+        "center": center,
+        "vector_layers": metadata.get("vector_layers", []),
+        "variants": [
+            {
+                "key": entry.key,
+                "filename": os.path.basename(entry.path),
+                "minzoom": entry.min_zoom,
+                "maxzoom": entry.max_zoom,
+                "bounds": entry.bounds,
+            }
+            for entry in entries
+        ],
+    }
+
+
 def initialize_pmtiles() -> bool:
     """Initialize all configured PMTiles archives."""
-    global pmtiles_catalog, pmtiles_datasets
+    global pmtiles_catalog, pmtiles_datasets, _prefetch_pool
 
     if pmtiles_catalog:
         # Already initialized (useful in reload scenarios)
@@ -219,41 +673,77 @@ def initialize_pmtiles() -> bool:
         dataset = entry["dataset"]
         path = entry["path"]
 
-        if not os.path.exists(path):
-            logging.warning("PMTiles file missing, skipping: %s", path)
+        exists = os.path.exists(path)
+        pmtiles_file_status[key] = {
+            "filename": os.path.basename(path),
+            "exists": exists,
+            "size_bytes": os.path.getsize(path) if exists else None,
+            "mtime": os.path.getmtime(path) if exists else None,
+            "loaded": False,
+        }
+        if not exists:
+            logger.warning("PMTiles file missing, skipping: %s", path)
             continue
 
         try:
-            file_handle = open(path, "rb")
-            reader = Reader(MmapSource(file_handle))
+            mapping = _open_mmap(path)
+            reader = Reader(_mmap_get_bytes(mapping))
             header = reader.header()
+            _prefetch_directories(mapping, header)
             metadata = reader.metadata() or {}
 
-            tile_type = header.get("tile_type")
-            catalog_entry: CatalogEntry = {
-                "key": key,
-                "dataset": dataset,
-                "path": path,
-                "file_handle": file_handle,
-                "reader": reader,
-                "header": header,
-                "metadata": metadata,
-                "min_zoom": header.get("min_zoom", 0),
-                "max_zoom": header.get("max_zoom", 0),
-                "bounds": _lon_lat_bounds_from_header(header),
-                "tile_type": tile_type,
-                "content_type": TILE_TYPE_TO_MIME.get(tile_type, "application/octet-stream"),
-            }
-
-            if "category" in entry:
-                catalog_entry["category"] = entry["category"]
+            tile_type = _enum_value(header.get("tile_type"))
+            content_type = TILE_TYPE_TO_MIME.get(tile_type, "application/octet-stream")
+            compression = _enum_value(header.get("tile_compression"))
+            plain_headers = {"Cache-Control": TILE_CACHE_CONTROL, "Content-Type": content_type}
+            # Browsers transparently inflate these before deck.gl/protomaps parse the bytes.
+            gzip_headers = {**plain_headers, "Content-Encoding": "gzip", "Vary": "Accept-Encoding"}
+            if compression == COMPRESSION_NONE:
+                tile_headers = plain_headers
+            elif compression in COMPRESSION_TO_CONTENT_ENCODING:
+                tile_headers = {
+                    **plain_headers,
+                    "Content-Encoding": COMPRESSION_TO_CONTENT_ENCODING[compression],
+                    "Vary": "Accept-Encoding",
+                }
+            else:
+                tile_headers = None
+            catalog_entry = CatalogEntry(
+                key=key,
+                dataset=dataset,
+                path=path,
+                mapping=mapping,
+                reader=reader,
+                header=header,
+                root_directory=_parse_directory(
+                    mapping[header["root_offset"] : header["root_offset"] + header["root_length"]]
+                ),
+                metadata=metadata,
+                min_zoom=header.get("min_zoom", 0),
+                max_zoom=header.get("max_zoom", 0),
+                bounds=_lon_lat_bounds_from_header(header),
+                tile_type=tile_type,
+                content_type=content_type,
+                tile_headers=tile_headers,
+                plain_headers=plain_headers,
+                gzip_headers=gzip_headers,
+                etag_prefix=f"{int(pmtiles_file_status[key]['mtime']):x}",
+                category=entry.get("category"),
+            )
+            flat_directory = _flatten_directory(mapping, header, catalog_entry.root_directory)
+            if flat_directory is not None:
+                catalog_entry = catalog_entry._replace(flat_directory=flat_directory)
+                logger.info("Flattened %d directory entries for %s", len(flat_directory.tile_ids), key)
 
             pmtiles_catalog[key] = catalog_entry
             pmtiles_datasets.setdefault(dataset, []).append(key)
+            pmtiles_file_status[key]["loaded"] = True
+            pmtiles_semaphores[key] = asyncio.Semaphore(READER_CONCURRENCY)
+            pmtiles_in_flight[key] = 0
             loaded_count += 1
             print(f"✓ Loaded {dataset}: {os.path.basename(path)} (key={key})")
         except Exception as exc:  # pragma: no cover - initialization should succeed, log otherwise
-            logging.exception("Failed to load PMTiles archive %s: %s", path, exc)
+            logger.exception("Failed to load PMTiles archive %s: %s", path, exc)
 
     if loaded_count == 0:
         raise FileNotFoundError("No PMTiles archives could be loaded; check configuration paths.")
@@ -262,24 +752,87 @@ def initialize_pmtiles() -> bool:
     for dataset, keys in pmtiles_datasets.items():
         pmtiles_datasets[dataset] = sorted(
             keys,
-            key=lambda k: (pmtiles_catalog[k]["min_zoom"], pmtiles_catalog[k]["max_zoom"]),
+            key=lambda k: (pmtiles_catalog[k].min_zoom, pmtiles_catalog[k].max_zoom),
         )
 
+    for dataset, keys in pmtiles_datasets.items():
+        pmtiles_zoom_order[dataset] = tuple(
+            tuple(
+                sorted(
+                    keys,
+                    key=lambda k: (
+                        _zoom_penalty(z, pmtiles_catalog[k].min_zoom, pmtiles_catalog[k].max_zoom),
+                        -pmtiles_catalog[k].max_zoom,
+                    ),
+                )
+            )
+            for z in range(MAX_ZOOM_LEVELS)
+        )
+
+        if len(keys) >= SPATIAL_INDEX_MIN_VARIANTS:
+            pmtiles_zoom_bounds[dataset] = tuple(
+                np.array([pmtiles_catalog[k].bounds for k in order], dtype=np.float64)
+                for order in pmtiles_zoom_order[dataset]
+            )
+
+    # Archives never change after boot, so /info and the landing pages are
+    # built from these instead of walking the catalogue per request.
+    pmtiles_info.update(_build_info())
+    last_modified = max(status["mtime"] for status in pmtiles_file_status.values() if status["loaded"])
+    pmtiles_batch_headers.update({
+        "Cache-Control": TILE_CACHE_CONTROL,
+        "Last-Modified": formatdate(last_modified, usegmt=True),
+    })
+    pmtiles_files_info.update(
+        (key, {"filename": os.path.basename(entry.path), "minzoom": entry.min_zoom, "maxzoom": entry.max_zoom})
+        for key, entry in pmtiles_catalog.items()
+    )
+
+    # Trigger numba compilation (or load its cache) before the first request.
+    _tile_id(0, 0, 0)
+
+    _prefetch_pool = concurrent.futures.ThreadPoolExecutor(
+        max_workers=os.cpu_count() or 1, thread_name_prefix="tile-prefetch"
+    )
+
     return True
 
 
 def cleanup_pmtiles():
     """Clean up PMTiles resources on shutdown."""
-    print("Shutting down and closing PMTiles file handles...")
-    global pmtiles_catalog, pmtiles_datasets
+    print("Shutting down and unmapping PMTiles archives...")
+    global pmtiles_catalog, pmtiles_datasets, _prefetch_pool
 
-    for entry in pmtiles_catalog.values():
-        file_handle = entry.get("file_handle")
-        if file_handle:
-            file_handle.close()
+    if _prefetch_pool is not None:
+        # Drop queued prefetches and let running ones finish before unmapping.
+        _prefetch_pool.shutdown(wait=True, cancel_futures=True)
+        _prefetch_pool = None
 
+    for entry in pmtiles_catalog.values():
+        try:
+            entry.mapping.close()
+        except BufferError:
+            # A tile view is still referenced by an in-flight response; the
+            # mapping is released when that view is garbage collected.
+            logger.warning("PMTiles mmap still in use, not closing: %s", entry.path)
+
+    _decoded_tile.cache_clear()
+    _cached_tile_location.cache_clear()
+    _leaf_directory.cache_clear()
+    _webp_tile.cache_clear()
     pmtiles_catalog.clear()
     pmtiles_datasets.clear()
+    pmtiles_file_status.clear()
+    pmtiles_semaphores.clear()
+    pmtiles_in_flight.clear()
+    pmtiles_zoom_order.clear()
+    pmtiles_zoom_bounds.clear()
+    pmtiles_info.clear()
+    pmtiles_files_info.clear()
+    pmtiles_batch_headers.clear()
+    _PAGE_HTML.clear()
+    _INFO_JSON.clear()
+    _PAGE_SKELETONS.clear()
     print("Cleanup complete.")
 
 
@@ -291,44 +844,59 @@ def _select_catalog_entry(
     category: Optional[str] = None,
 ) -> Optional[CatalogEntry]:
     """Find the best PMTiles archive for the requested tile."""
-    if dataset not in pmtiles_datasets:
+    zoom_order = pmtiles_zoom_order.get(dataset)
+    if zoom_order is None:
         return None
 
     bbox = _tile_xyz_to_lon_lat_bounds(z, x, y)
-    candidates = []
+    # Preference order for zooms outside 0..MAX_ZOOM_LEVELS-1 matches the
+    # nearest precomputed level, so clamping is exact.
+    zoom_index = min(max(z, 0), MAX_ZOOM_LEVELS - 1)
+
+    filter_category = dataset != "slosh" and category
+    zoom_bounds = pmtiles_zoom_bounds.get(dataset)
+    if zoom_bounds is not None and not filter_category:
+        # Same test as _bbox_intersects over every variant at once; rows are
+        # already in preference order, so the first overlap wins.
+        b = zoom_bounds[zoom_index]
+        lon_min, lat_min, lon_max, lat_max = bbox
+        overlaps = ~(
+            (b[:, 2] <= lon_min) | (b[:, 0] >= lon_max) | (b[:, 3] <= lat_min) | (b[:, 1] >= lat_max)
+        )
+        best = int(np.argmax(overlaps))
+        return pmtiles_catalog[zoom_order[zoom_index][best]] if overlaps[best] else None
 
-    for key in pmtiles_datasets[dataset]:
+    for key in zoom_order[zoom_index]:
         entry = pmtiles_catalog[key]
         # For SLOSH, we no longer filter by category since the global file contains all categories
-        if dataset != "slosh" and category and entry.get("category") != category:
+        if filter_category and entry.category != category:
             continue
-        if not _bbox_intersects(bbox, entry["bounds"]):
-            continue
-
-        min_zoom = entry["min_zoom"]
-        max_zoom = entry["max_zoom"]
-
-        if min_zoom <= z <= max_zoom:
-            zoom_penalty = 0
-        elif z < min_zoom:
-            zoom_penalty = min_zoom - z
-        else:
-            zoom_penalty = z - max_zoom
-
-        # Prefer smaller penalty (exact zoom match wins) and higher max zoom.
-        candidates.append((zoom_penalty, -max_zoom, entry))
-
-    if not candidates:
-        return None
+        if _bbox_intersects(bbox, entry.bounds):
+            return entry
 
-    candidates.sort(key=lambda item: (item[0], item[1]))
-    return candidates[0][2]
+    return None
 
 
 def _dataset_entries(dataset: str) -> List[CatalogEntry]:
     return [pmtiles_catalog[key] for key in pmtiles_datasets.get(dataset, [])]
 
 
+def _floodzone_match(
+    layer_name: str,
+    properties: Dict[str, object],
+    z: int,
+    x: int,
+    y: int,
+    entry: CatalogEntry,
+) -> Dict[str, object]:
+    return {
+        "layer": layer_name,
+        "properties": properties,
+        "tile": {"z": z, "x": x, "y": y},
+        "variant": entry.key,
+    }
+
+
 def find_floodzone_feature(lat: float, lng: float) -> Optional[Dict[str, object]]:
     """Locate the flood-zone feature covering the provided coordinate."""
     if not (-90.0 <= lat <= 90.0 and -180.0 <= lng <= 180.0):
@@ -337,55 +905,54 @@ def find_floodzone_feature(lat: float, lng: float) -> Optional[Dict[str, object]
     entries = _dataset_entries("flood_zones")
     if not entries:
         raise RuntimeError("Flood zone dataset is not loaded.")
-    
-    min_zoom = int(min(entry["min_zoom"] for entry in entries))
-    max_zoom = int(max(entry["max_zoom"] for entry in entries))
 
-    point = Point(lng, lat)
+    # The projection is the same for every archive; only the zoom differs, so
+    # run the transcendentals once and rescale per entry.
+    x_frac, y_frac = _mercator_fraction(lng, lat)
 
-    for z in range(max_zoom, min_zoom - 1, -1):
-        tile_x, tile_y = _lon_lat_to_tile(z, lng, lat)
-        entry = _select_catalog_entry(z, tile_x, tile_y, dataset="flood_zones")
-        if entry is None:
+    # Entries are sorted by zoom range, so walk them highest-resolution first.
+    # The max-zoom tile of the first archive covering the point holds the
+    # most detailed features, so a single tile read answers the query.
+    for entry in reversed(entries):
+        lon_min, lat_min, lon_max, lat_max = entry.bounds
+        if not (lon_min <= lng <= lon_max and lat_min <= lat <= lat_max):
             continue
 
-        reader: Reader = entry["reader"]  # type: ignore[index]
-        tile_data = reader.get(z, tile_x, tile_y)
-        if tile_data is None:
+        z = int(entry.max_zoom)
+        tile_x, tile_y = _fraction_to_tile(z, x_frac, y_frac)
+
+        if tile_query is not None:
+            # Inflate, decode and point-in-polygon all happen in Rust; it is
+            # fast enough that the decoded-tile cache is not needed.
+            tile_data = _read_tile_view(entry, z, tile_x, tile_y)
+            if tile_data is None:
+                continue
+            try:
+                hit = tile_query.find_covering_feature(bytes(tile_data), z, tile_x, tile_y, lng, lat)
+            except ValueError as exc:  # pragma: no cover - guard against corrupt tiles
+                logger.exception("Failed to decode tile %s/%s/%s: %s", z, tile_x, tile_y, exc)
+                continue
+            if hit is not None:
+                layer_name, properties = hit
+                return _floodzone_match(layer_name, properties, z, tile_x, tile_y, entry)
             continue
 
-        tile_bytes = _decompress_tile(tile_data)
-
         try:
-            feature_iter = _iter_tile_features(tile_bytes, z, tile_x, tile_y)
+            tile, missed = _call_tracking_miss(_decoded_tile, entry.key, z, tile_x, tile_y)
         except Exception as exc:  # pragma: no cover - guard against corrupt tiles
-            logging.exception("Failed to decode tile %s/%s/%s: %s", z, tile_x, tile_y, exc)
+            logger.exception("Failed to decode tile %s/%s/%s: %s", z, tile_x, tile_y, exc)
             continue
-
-    for layer_name, feature in feature_iter:
-        geometry = feature.get("geometry")
-        if not geometry:
+        if missed:
+            _prefetch_neighbors(entry.key, z, tile_x, tile_y)
+        if tile is None or not tile.properties:
             continue
 
-        # try:
-        #     geom = shape(geometry)
-        # except Exception as exc:  # pragma: no cover - invalid geometry
-        #     logging.debug("Invalid geometry in tile %s/%s/%s: %s", z, tile_x, tile_y, exc)
-        #     continue
-
-        # if geom.is_empty:
-        #     continue
-
-        features = feature.get("properties", {})
-
-        if features:
-            return {
-                "layer": layer_name,
-                "properties": features,
-                # "geometry": geometry,
-                "tile": {"z": z, "x": tile_x, "y": tile_y},
-                "variant": entry["key"],
-            }
+        # One vectorised GEOS call tests every feature; intersects_xy matches
+        # covers() semantics, so points on a zone boundary still count.
+        hits = np.flatnonzero(shapely.intersects_xy(tile.geometries, lng, lat))
+        if hits.size:
+            index = int(hits[0])
+            return _floodzone_match(tile.layers[index], tile.properties[index], z, tile_x, tile_y, entry)
 
     return None
 
@@ -447,23 +1014,333 @@ def get_tile_data(
     if entry is None:
         return None, None
 
-    reader: Reader = entry["reader"]  # type: ignore[index]
     source_y = y
     # if dataset == "slosh":
     #     source_y = (1 << z) - 1 - y
 
-    tile_data = reader.get(z, x, source_y)
+    tile_data = _read_tile_view(entry, z, x, source_y)
 
     if tile_data is None:
         return None, None
 
-    content_type = entry.get("content_type", "application/octet-stream")
-    return tile_data, content_type
+    content_type = entry.content_type
+    return bytes(tile_data), content_type
+
+
+# Neighbouring tiles share leaf directories, so keep recently used ones
+# parsed; each is a gzip inflate plus a varint decode of thousands of entries.
+LEAF_DIRECTORY_CACHE_SIZE = int(os.environ.get("PMTILES_LEAF_CACHE_SIZE", 256))
+
+
+def _parse_directory(buf: bytes) -> Directory:
+    if tile_query is not None:
+        # Inflate + varint decode in Rust, without holding the GIL.
+        return Directory(*tile_query.deserialize_directory(buf))
+    # Same layout pmtiles.tile.deserialize_directory reads, but inflated with
+    # libdeflate/ISA-L when available and decoded in one pass over the bytes
+    # instead of one BytesIO read per varint.
+    values = []
+    value = shift = 0
+    for byte in _decompress_tile(buf):
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            values.append(value)
+            value = shift = 0
+    count = values[0] if values else 0
+    if len(values) < 4 * count + 1:
+        raise ValueError("Truncated PMTiles directory")
+
+    tile_ids = list(itertools.accumulate(values[1 : count + 1]))
+    run_lengths = values[count + 1 : 2 * count + 1]
+    lengths = values[2 * count + 1 : 3 * count + 1]
+    offsets = values[3 * count + 1 : 4 * count + 1]
+    for i in range(count):
+        # Zero means "directly after the previous entry"; otherwise offset + 1.
+        if i > 0 and offsets[i] == 0:
+            offsets[i] = offsets[i - 1] + lengths[i - 1]
+        else:
+            offsets[i] -= 1
+    return Directory(tile_ids, offsets, lengths, run_lengths)
+
+
+def _find_entry(directory: Directory, tile_id: int) -> Optional[int]:
+    """Same result as pmtiles.tile.find_tile, with the search done by C bisect.
+
+    Returns the index of the entry holding tile_id (or of the leaf directory
+    covering it), or None.
+    """
+    index = bisect.bisect_right(directory.tile_ids, tile_id) - 1
+    if index < 0:
+        return None
+    run_length = directory.run_lengths[index]
+    if run_length == 0 or tile_id - directory.tile_ids[index] < run_length:
+        return index
+    return None
+
+
+@functools.lru_cache(maxsize=LEAF_DIRECTORY_CACHE_SIZE)
+def _leaf_directory(key: str, offset: int, length: int) -> Directory:
+    return _parse_directory(pmtiles_catalog[key].mapping[offset : offset + length])
+
+
+# Archives with at most this many tile entries have all their leaf
+# directories decoded at startup into one sorted index (~32 bytes per entry,
+# per worker), so lookups are a single searchsorted with no leaf parsing.
+FLAT_DIRECTORY_MAX_ENTRIES = int(os.environ.get("PMTILES_FLAT_DIRECTORY_MAX_ENTRIES", 1_000_000))
+
+
+def _flatten_directory(mapping: mmap.mmap, header: Dict[str, object], root: Directory) -> Optional[Directory]:
+    """Resolve every leaf directory below ``root`` into one sorted Directory.
+
+    Returns None when the archive holds more than FLAT_DIRECTORY_MAX_ENTRIES
+    tile entries; those keep walking leaf directories per lookup.
+    """
+    chunks = []
+    total = 0
+    pending = [(root, 0)]
+    while pending:
+        directory, depth = pending.pop()
+        columns = [np.asarray(column, dtype=np.uint64) for column in directory]
+        is_leaf = columns[3] == 0
+        chunks.append([column[~is_leaf] for column in columns])
+        total += len(is_leaf) - int(is_leaf.sum())
+        if total > FLAT_DIRECTORY_MAX_ENTRIES:
+            return None
+        if depth + 1 >= MAX_DIRECTORY_DEPTH:
+            continue
+        for offset, length in zip(columns[1][is_leaf].tolist(), columns[2][is_leaf].tolist()):
+            start = header["leaf_directory_offset"] + offset
+            pending.append((_parse_directory(mapping[start : start + length]), depth + 1))
+
+    columns = [np.concatenate(parts) for parts in zip(*chunks)]
+    order = np.argsort(columns[0], kind="stable")
+    return Directory(*(column[order] for column in columns))
+
+
+def _locate_tile(entry: CatalogEntry, z: int, x: int, y: int) -> Optional[Tuple[int, int]]:
+    """Return the (offset, length) of tile z/x/y inside the archive, or None.
+
+    Mirrors pmtiles.reader.Reader.get but reuses the header and root
+    directory parsed at load time and stops short of copying the tile bytes
+    out of the mmap.
+    """
+    header = entry.header
+    tile_id = _tile_id(z, x, y)
+    flat = entry.flat_directory
+    if flat is not None:
+        index = int(flat.tile_ids.searchsorted(tile_id, side="right")) - 1
+        if index < 0 or tile_id - int(flat.tile_ids[index]) >= int(flat.run_lengths[index]):
+            return None
+        return header["tile_data_offset"] + int(flat.offsets[index]), int(flat.lengths[index])
+
+    directory = entry.root_directory
+    for _ in range(MAX_DIRECTORY_DEPTH):
+        index = _find_entry(directory, tile_id)
+        if index is None:
+            return None
+        offset, length = directory.offsets[index], directory.lengths[index]
+        if directory.run_lengths[index] == 0:
+            directory = _leaf_directory(entry.key, header["leaf_directory_offset"] + offset, length)
+        else:
+            return header["tile_data_offset"] + offset, length
+    return None
+
+
+# Sessions all start on the same low-zoom tiles, so remember where recently
+# served tiles live and skip the directory decode and search on repeat hits.
+# Only (offset, length) pairs are kept; the bytes stay in the page cache.
+TILE_LOCATION_CACHE_SIZE = int(os.environ.get("PMTILES_LRU_SIZE", 4096))
+TILE_PREFETCH = os.environ.get("TILE_PREFETCH", "1") != "0"
+
+
+# Set by the cached functions' bodies, which only run on a miss. cache_info()
+# deltas also count misses from other threads, so callers that react to their
+# own cold lookup (neighbour prefetch) read this per-thread flag instead.
+_cache_miss = threading.local()
+
+
+def _call_tracking_miss(fn, *args):
+    """Call fn, returning (value, missed) where missed says whether this call ran a cached body."""
+    _cache_miss.flag = False
+    value = fn(*args)
+    return value, _cache_miss.flag
+
+
+@functools.lru_cache(maxsize=TILE_LOCATION_CACHE_SIZE)
+def _cached_tile_location(key: str, z: int, x: int, y: int) -> Optional[Tuple[int, int]]:
+    _cache_miss.flag = True
+    return _locate_tile(pmtiles_catalog[key], z, x, y)
+
+
+def _read_tile_view(entry: CatalogEntry, z: int, x: int, y: int) -> Optional[memoryview]:
+    """Return tile z/x/y as a zero-copy view into the archive's mmap."""
+    location = _cached_tile_location(entry.key, z, x, y)
+    if location is None:
+        return None
+    offset, length = location
+    return memoryview(entry.mapping)[offset : offset + length]
+
+
+def _tile_headers(entry: CatalogEntry, tile_data: memoryview) -> Dict[str, str]:
+    headers = entry.tile_headers
+    if headers is not None:
+        return headers
+    return entry.gzip_headers if tile_data[:2] == b"\x1f\x8b" else entry.plain_headers
+
+
+def _accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """Return False only when an Accept-Encoding header rules out gzip."""
+    if accept_encoding is None:
+        return True
+    for token in accept_encoding.lower().split(","):
+        coding, _, params = token.partition(";")
+        if coding.strip() in ("gzip", "*"):
+            _, _, quality = params.partition("=")
+            try:
+                return not quality.strip() or float(quality) > 0
+            except ValueError:
+                return True
+    return False
+
+
+# Raster tiles are re-encoded as WebP for clients that accept it, once per
+# tile. PNG rasters (e.g. SLOSH categories) are categorical, so they are
+# re-encoded losslessly; JPEG sources are already lossy and use quality 80.
+TILE_WEBP_TRANSCODE = os.environ.get("TILE_WEBP_TRANSCODE", "1") != "0"
+WEBP_CACHE_SIZE = int(os.environ.get("TILE_WEBP_CACHE_SIZE", 2048))
+WEBP_SOURCE_TYPES = {"image/png": {"lossless": True}, "image/jpeg": {"quality": 80}}
+WEBP_TILE_HEADERS = {"Cache-Control": TILE_CACHE_CONTROL, "Content-Type": "image/webp", "Vary": "Accept"}
+
+
+@functools.lru_cache(maxsize=WEBP_CACHE_SIZE)
+def _webp_tile(key: str, z: int, x: int, y: int) -> Optional[bytes]:
+    """Return tile z/x/y re-encoded as WebP, or None to serve the original.
+
+    None is also returned when the WebP would not be smaller than the stored
+    tile, so the cache never makes a response larger.
+    """
+    entry = pmtiles_catalog[key]
+    tile_data = _read_tile_view(entry, z, x, y)
+    if tile_data is None:
+        return None
+
+    buffer = io.BytesIO()
+    with Image.open(io.BytesIO(tile_data)) as image:
+        image.save(buffer, "WEBP", method=6, **WEBP_SOURCE_TYPES[entry.content_type])
+    webp = buffer.getvalue()
+    return webp if len(webp) < len(tile_data) else None
+
+
+async def fetch_tile_data(
+    z: int,
+    x: int,
+    y: int,
+    dataset: str = "flood_zones",
+    category: Optional[str] = None,
+    accept_encoding: Optional[str] = None,
+    accept: Optional[str] = None,
+) -> Tuple[Optional[memoryview], Optional[Dict[str, str]]]:
+    """Async variant of get_tile_data that reads off the event loop.
+
+    Returns a zero-copy view of the tile inside the archive's mmap (Starlette
+    writes it to the socket without an intermediate bytes object) and the
+    archive's precomputed response headers. For an empty tile the view is
+    None and the headers are the caching headers for the 204 response.
+
+    Reads are bounded per archive by its semaphore and run in the default
+    threadpool, so page faults on one mmap'd file only block its own slots.
+    gzip tiles are never re-encoded; they are only inflated (also in the
+    threadpool) for the rare client whose Accept-Encoding excludes gzip.
+    PNG/JPEG tiles are swapped for a memoised WebP copy when ``accept``
+    allows it. Tile headers include a strong ETag for each representation.
+    """
+    entry = _select_catalog_entry(z, x, y, dataset=dataset, category=category)
+    if entry is None:
+        # An unloaded dataset may come back after a restart; only bounds misses are permanent.
+        return None, OUT_OF_BOUNDS_TILE_HEADERS if dataset in pmtiles_zoom_order else MISSING_TILE_HEADERS
+
+    key = entry.key
+    pmtiles_in_flight[key] += 1
+    try:
+        async with pmtiles_semaphores[key]:
+            tile_data, missed = await asyncio.to_thread(_call_tracking_miss, _read_tile_view, entry, z, x, y)
+    finally:
+        pmtiles_in_flight[key] -= 1
+
+    if TILE_PREFETCH and missed:
+        # A cold tile usually means the viewport moved; warm the tiles around it.
+        _prefetch_neighbors(key, z, x, y, _warm_tile_location)
+
+    if tile_data is None:
+        return None, MISSING_TILE_HEADERS
+
+    # Archives are immutable while their mtime is unchanged, so the tile's
+    # position in the file identifies its bytes; the location is cached.
+    offset, length = _cached_tile_location(key, z, x, y)
+    etag = f'"{entry.etag_prefix}-{offset:x}-{length:x}'
+
+    headers = _tile_headers(entry, tile_data)
+    if headers.get("Content-Encoding") == "gzip" and not _accepts_gzip(accept_encoding):
+        raw = await asyncio.to_thread(_decompress_tile, bytes(tile_data))
+        return memoryview(raw), {**entry.plain_headers, "Vary": "Accept-Encoding", "ETag": f'{etag}-raw"'}
+
+    if TILE_WEBP_TRANSCODE and entry.content_type in WEBP_SOURCE_TYPES:
+        if accept and "image/webp" in accept:
+            webp = await asyncio.to_thread(_webp_tile, key, z, x, y)
+            if webp is not None:
+                return memoryview(webp), {**WEBP_TILE_HEADERS, "ETag": f'{etag}-webp"'}
+        return tile_data, {**headers, "Vary": "Accept", "ETag": f'{etag}"'}
+
+    return tile_data, {**headers, "ETag": f'{etag}"'}
+
+
+def _parse_tile_coords(spec: str) -> List[Tuple[int, int, int]]:
+    """Parse a comma-separated ``z/x/y`` list, rejecting malformed or out-of-range tiles."""
+    items = [item for item in spec.split(",") if item.strip()]
+    if not items:
+        raise ValueError("No tiles requested.")
+    if len(items) > TILE_BATCH_MAX:
+        raise ValueError(f"At most {TILE_BATCH_MAX} tiles may be requested per batch.")
+
+    coords = []
+    for item in items:
+        parts = item.strip().split("/")
+        try:
+            z, x, y = (int(part) for part in parts)
+        except ValueError:
+            raise ValueError(f"Invalid tile coordinate: {item.strip()!r}") from None
+        n = 1 << z if 0 <= z < MAX_ZOOM_LEVELS else 0
+        if not (0 <= x < n and 0 <= y < n):
+            raise ValueError(f"Tile out of range: {item.strip()!r}")
+        coords.append((z, x, y))
+    return coords
+
+
+MIME_TO_TILE_TYPE = {mime: tile_type for tile_type, mime in TILE_TYPE_TO_MIME.items()}
+CONTENT_ENCODING_TO_COMPRESSION = {
+    encoding: compression for compression, encoding in COMPRESSION_TO_CONTENT_ENCODING.items()
+}
+
+
+def _tile_batch_frame(tile_data: Optional[memoryview], headers: Optional[Dict[str, str]]) -> bytes:
+    if tile_data is None:
+        return TILE_BATCH_FRAME.pack(0, 0, 0)
+    return TILE_BATCH_FRAME.pack(
+        len(tile_data),
+        MIME_TO_TILE_TYPE.get(headers["Content-Type"], 0),
+        CONTENT_ENCODING_TO_COMPRESSION.get(headers.get("Content-Encoding"), COMPRESSION_NONE),
+    )
 
 # --- TEMPLATES ---
 
+# Every uvicorn worker compiles both templates at startup; the filesystem
+# bytecode cache (in the system temp dir) lets workers after the first skip
+# the parse and compile.
 jinja2_env = jinja2.Environment(
     autoescape=True,
+    bytecode_cache=jinja2.FileSystemBytecodeCache(),
     loader=jinja2.DictLoader({
         "index.html": """
 <!DOCTYPE html>
@@ -516,6 +1393,10 @@ jinja2_env = jinja2.Environment(
             <div class="endpoint">
                 <strong>Tiles:</strong> <a href="{{ api_root }}/tiles/floodzone/8/82/97">{{ api_root }}/tiles/floodzone/{z}/{x}/{y}</a>
                 <div class="endpoint-desc">Get individual map tiles by zoom/x/y coordinates.</div>
+            </div>
+            <div class="endpoint">
+                <strong>Tile batch:</strong> <a href="{{ api_root }}/tiles-batch/floodzone?t=8/82/97,8/83/97">{{ api_root }}/tiles-batch/floodzone?t=z/x/y,...</a>
+                <div class="endpoint-desc">Up to 32 tiles in one length-prefixed binary response.</div>
             </div>
              <div class="endpoint">
                 <strong>Info / TileJSON:</strong> <a href="{{ api_root }}/info">{{ api_root }}/info</a>
@@ -606,17 +1487,91 @@ jinja2_env = jinja2.Environment(
         """
     })
 )
-templates = Jinja2Templates(env=jinja2_env)
+# Pages only depend on the API root and the catalog (static after startup),
+# so render each (template, root) pair once and serve the cached bytes.
+# Bounded so arbitrary Host headers cannot grow the cache without limit.
+_PAGE_CACHE_MAX = 32
+_PAGE_HTML: Dict[Tuple[str, str], bytes] = {}
+# Serialized /info bodies keyed by API root.
+_INFO_JSON: Dict[str, bytes] = {}
+# Each page rendered once at startup with a placeholder API root; a new root
+# is then a string replace rather than a Jinja render.
+_API_ROOT_TOKEN = "__PMTILES_API_ROOT__"
+_PAGE_SKELETONS: Dict[str, str] = {}
+
+
+def _landing_context() -> Dict[str, object]:
+    return {"files": pmtiles_files_info, "loaded_count": len(pmtiles_catalog)}
+
+
+_PAGE_CONTEXTS = {"index.html": _landing_context, "map.html": dict}
+
+
+def _prerender_pages() -> None:
+    for template_name, build_context in _PAGE_CONTEXTS.items():
+        template = jinja2_env.get_template(template_name)
+        _PAGE_SKELETONS[template_name] = template.render(api_root=_API_ROOT_TOKEN, **build_context())
+
+
+def _render_page(template_name: str, api_root: str) -> bytes:
+    cache_key = (template_name, api_root)
+    html = _PAGE_HTML.get(cache_key)
+    if html is None:
+        skeleton = _PAGE_SKELETONS.get(template_name)
+        if skeleton is None:
+            _prerender_pages()
+            skeleton = _PAGE_SKELETONS[template_name]
+        # api_root comes from the Host header; escape it as Jinja would have.
+        html = skeleton.replace(_API_ROOT_TOKEN, str(escape(api_root))).encode("utf-8")
+        if len(_PAGE_HTML) < _PAGE_CACHE_MAX:
+            _PAGE_HTML[cache_key] = html
+    return html
 
 # --- LIFESPAN MANAGER ---
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Handles startup and shutdown events for the application."""
     print("🚀 Starting PMTiles Server...")
+    _check_protobuf_backend()
     initialize_pmtiles()
+    _prerender_pages()
+    # asyncio.to_thread uses the loop's default executor, which caps at
+    # min(32, cpu + 4) threads; leave room for every archive to fill its
+    # semaphore so page faults on one archive never queue behind another.
+    threadpool_size = int(
+        os.environ.get(
+            "TILE_THREADPOOL_SIZE",
+            READER_CONCURRENCY * len(pmtiles_catalog) + (os.cpu_count() or 1),
+        )
+    )
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(
+        concurrent.futures.ThreadPoolExecutor(max_workers=threadpool_size, thread_name_prefix="tile-io")
+    )
+    logger.info("Event loop %s, tile I/O threads %d", type(loop).__module__, threadpool_size)
     yield
     cleanup_pmtiles()
 
+# --- MIDDLEWARE ---
+class TileAwareGZipMiddleware:
+    """GZip JSON/HTML responses but pass tile routes straight through.
+
+    Tiles are either already gzip-compressed MVT or compressed images, so
+    re-encoding them only burns CPU.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, skip_prefix: str = "/tiles"):
+        self.app = app
+        self.gzip_app = GZipMiddleware(app, minimum_size=minimum_size)
+        self.skip_prefix = skip_prefix
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith(self.skip_prefix):
+            await self.app(scope, receive, send)
+            return
+        await self.gzip_app(scope, receive, send)
+
+
 # --- APP SETUP ---
 app = FastAPI(
     title="PMTiles Tile Server",
@@ -628,170 +1583,178 @@ app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"], allow_credentials=True, allow_methods=["GET"], allow_headers=["*"],
 )
+app.add_middleware(TileAwareGZipMiddleware, minimum_size=1024)
 
 # --- API ROUTES ---
 
 @app.get("/", response_class=HTMLResponse)
 async def landing(request: Request):
-    files_info = {}
-    for key, entry in pmtiles_catalog.items():
-        files_info[key] = {
-            "filename": os.path.basename(entry["path"]),
-            "minzoom": entry["min_zoom"],
-            "maxzoom": entry["max_zoom"],
-        }
-    return templates.TemplateResponse(
-        "index.html",
-        {
-            "request": request,
-            "api_root": str(request.base_url).rstrip("/"),
-            "files": files_info,
-            "loaded_count": len(pmtiles_catalog),
-        },
-    )
+    api_root = str(request.base_url).rstrip("/")
+    return HTMLResponse(content=_render_page("index.html", api_root))
 
 @app.get("/map", response_class=HTMLResponse)
 async def map_viewer(request: Request):
-    return templates.TemplateResponse("map.html", {"request": request, "api_root": str(request.base_url).rstrip("/")})
+    return HTMLResponse(content=_render_page("map.html", str(request.base_url).rstrip("/")))
 
-@app.get("/tiles/floodzone/{z}/{x}/{y}", response_class=Response)
-async def get_tile(z: int, x: int, y: int):
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if if_none_match is None:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as RFC 9110 requires for If-None-Match.
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+# A broken archive (e.g. truncated mid-swap) fails every tile request; log the
+# traceback once per error type and interval and count the rest, so a burst
+# of 500s does not serialise the workers on stderr.
+TILE_ERROR_LOG_INTERVAL = 60.0
+_tile_error_log: Dict[Tuple[str, str], List[float]] = {}
+
+
+def _log_tile_error(label: str, exc: Exception, message: str, *args) -> None:
+    now = time.monotonic()
+    key = (label, type(exc).__name__)
+    state = _tile_error_log.get(key)
+    if state is not None and now - state[0] < TILE_ERROR_LOG_INTERVAL:
+        state[1] += 1
+        return
+    suppressed = int(state[1]) if state is not None else 0
+    _tile_error_log[key] = [now, 0]
+    if suppressed:
+        message += " (%d similar errors suppressed)"
+        args += (suppressed,)
+    logger.error(message, *args, exc_info=exc)
+
+
+async def _tile_response(request: Request, z: int, x: int, y: int, dataset: str, label: str) -> Response:
+    """Serve one tile: 200 with the body, 304 on an ETag match, 204 when empty."""
     try:
-        tile_data, content_type = get_tile_data(z, x, y, dataset="flood_zones")
+        headers = request.headers
+        tile_data, tile_headers = await fetch_tile_data(
+            z,
+            x,
+            y,
+            dataset=dataset,
+            accept_encoding=headers.get("accept-encoding"),
+            accept=headers.get("accept"),
+        )
         if tile_data is None:
-            return Response(status_code=204)
-        
-        headers = {
-            "Cache-Control": "public, max-age=86400",
-            "Content-Type": "application/vnd.mapbox-vector-tile",
-        }
+            return Response(status_code=204, headers=tile_headers)
+        if _etag_matches(headers.get("if-none-match"), tile_headers["ETag"]):
+            return Response(status_code=304, headers=tile_headers)
 
-        # PMTiles stores all vector tiles gzip-compressed; advertise that so
-        # browsers transparently decompress them before deck.gl parses bytes.
-        if tile_data.startswith(b"\x1f\x8b"):
-            headers["Content-Encoding"] = "gzip"
-
-        return Response(content=tile_data, headers=headers)
+        return Response(content=tile_data, headers=tile_headers)
     except Exception as e:
-        print(f"Error serving tile {z}/{x}/{y}: {e}")
-        traceback.print_exc()
+        _log_tile_error(label, e, "Error serving %s %d/%d/%d", label, z, x, y)
         return Response(status_code=500, content=f"Error serving tile: {e}")
 
 
+@app.get("/tiles/floodzone/{z}/{x}/{y}", response_class=Response)
+async def get_tile(z: int, x: int, y: int, request: Request):
+    return await _tile_response(request, z, x, y, "flood_zones", "tile")
+
+
 @app.get("/tiles/slosh/{z}/{x}/{y}", response_class=Response)
-async def get_slosh_tile(z: int, x: int, y: int):
+async def get_slosh_tile(z: int, x: int, y: int, request: Request):
     """Get SLOSH tile from the global PMTiles file containing all categories."""
-    try:
-        print(f"Serving SLOSH tile {z}/{x}/{y}...")
-        tile_data, content_type = get_tile_data(
-            z,
-            x,
-            y,
-            dataset="slosh",
-        )
-        if tile_data is None:
-            return Response(status_code=204)
+    logger.debug("Serving SLOSH tile %d/%d/%d", z, x, y)
+    return await _tile_response(request, z, x, y, "slosh", "SLOSH tile")
 
-        headers = {
-            "Cache-Control": "public, max-age=86400",
-            "Content-Type": content_type or "application/octet-stream",
-        }
+@app.get("/tiles/fema_structures/{z}/{x}/{y}", response_class=Response)
+async def get_fema_structures_tile(z: int, x: int, y: int, request: Request):
+    """Get FEMA Structures tile from the PMTiles file."""
+    return await _tile_response(request, z, x, y, "fema_structures", "FEMA structures tile")
 
-        if tile_data.startswith(b"\x1f\x8b"):
-            headers["Content-Encoding"] = "gzip"
+@app.get("/tiles-batch/{layer}", response_class=Response)
+async def get_tile_batch(
+    layer: str,
+    t: str = Query(..., description="Comma-separated z/x/y tiles, e.g. 8/82/97,8/83/97 (max 32)"),
+):
+    """Return several tiles in one response as length-prefixed frames.
+
+    Each frame is a big-endian uint32 payload length, a uint8 PMTiles
+    tile_type and a uint8 tile_compression, followed by the tile bytes as
+    stored in the archive. Frames follow the order of ``t``.
+    """
+    dataset = TILE_ROUTE_DATASETS.get(layer)
+    if dataset is None or dataset not in pmtiles_datasets:
+        raise HTTPException(status_code=404, detail=f"Unknown tile layer: {layer}")
+    try:
+        coords = _parse_tile_coords(t)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
 
-        return Response(content=tile_data, headers=headers)
+    try:
+        results = await asyncio.gather(
+            *(fetch_tile_data(z, x, y, dataset=dataset) for z, x, y in coords)
+        )
     except Exception as e:
-        print(f"Error serving SLOSH tile {z}/{x}/{y}: {e}")
-        traceback.print_exc()
-        return Response(status_code=500, content=f"Error serving tile: {e}")
+        _log_tile_error("tile batch", e, "Error serving tile batch %s for %s", t, layer)
+        return Response(status_code=500, content=f"Error serving tiles: {e}")
+
+    parts = []
+    for tile_data, headers in results:
+        parts.append(_tile_batch_frame(tile_data, headers))
+        if tile_data is not None:
+            parts.append(tile_data)
+    return Response(
+        content=b"".join(parts),
+        media_type="application/octet-stream",
+        headers=pmtiles_batch_headers,
+    )
 
-@app.get("/tiles/fema_structures/{z}/{x}/{y}", response_class=Response)
-async def get_fema_structures_tile(z: int, x: int, y: int):
-    """Get FEMA Structures tile from the PMTiles file."""
-    try:
-        tile_data, content_type = get_tile_data(z, x, y, dataset="fema_structures")
-        if tile_data is None:
-            return Response(status_code=204)
+# In-process caches reported by /health (hits, misses, maxsize, currsize).
+_HEALTH_CACHES = {
+    "tile_location": _cached_tile_location,
+    "leaf_directory": _leaf_directory,
+    "decoded_tile": _decoded_tile,
+    "webp_tile": _webp_tile,
+    "tile_bounds": _tile_xyz_to_lon_lat_bounds,
+}
 
-        headers = {
-            "Cache-Control": "public, max-age=86400",
-            "Content-Type": "application/vnd.mapbox-vector-tile",
-        }
 
-        if tile_data.startswith(b"\x1f\x8b"):
-            headers["Content-Encoding"] = "gzip"
+@app.get("/health")
+async def health_check():
+    # Archives are static after boot, so report the status captured by
+    # initialize_pmtiles() instead of stat-ing every file per probe.
+    return {
+        "status": "healthy" if pmtiles_catalog else "unhealthy",
+        "loaded_count": len(pmtiles_catalog),
+        "files": pmtiles_file_status,
+        "reader_concurrency": READER_CONCURRENCY,
+        "reader_in_flight": dict(pmtiles_in_flight),
+        "caches": {name: cache.cache_info()._asdict() for name, cache in _HEALTH_CACHES.items()},
+    }
 
-        return Response(content=tile_data, headers=headers)
-    except Exception as e:
-        print(f"Error serving FEMA structures tile {z}/{x}/{y}: {e}")
-        traceback.print_exc()
-        return Response(status_code=500, content=f"Error serving tile: {e}")
 
-@app.get("/info")
+@app.get("/info", response_class=ORJSONResponse)
 async def get_info(request: Request):
     if not pmtiles_catalog:
         raise HTTPException(status_code=404, detail="PMTiles archives not loaded")
-
-    dataset_keys = pmtiles_datasets.get("flood_zones")
-    if not dataset_keys:
+    if not pmtiles_info:
         raise HTTPException(status_code=404, detail="Requested dataset not available")
 
-    try:
-        entries = [pmtiles_catalog[key] for key in dataset_keys]
-        min_zoom = min(entry["min_zoom"] for entry in entries)
-        max_zoom = max(entry["max_zoom"] for entry in entries)
-
-        bounds = (
-            min(entry["bounds"][0] for entry in entries),
-            min(entry["bounds"][1] for entry in entries),
-            max(entry["bounds"][2] for entry in entries),
-            max(entry["bounds"][3] for entry in entries),
+    api_root = str(request.base_url).rstrip("/")
+    body = _INFO_JSON.get(api_root)
+    if body is None:
+        body = orjson.dumps(
+            {"tiles": [f"{api_root}/tiles/floodzone/{{z}}/{{x}}/{{y}}"], **pmtiles_info}
         )
-
-        # Use the highest-resolution archive for name/center metadata.
-        reference_entry = max(entries, key=lambda entry: entry["max_zoom"])
-        header = reference_entry["header"]
-        metadata = reference_entry["metadata"]
-
-        center = [
-            header.get("center_lon_e7", 0) / 1e7,
-            header.get("center_lat_e7", 0) / 1e7,
-            header.get("center_zoom", max_zoom),
-        ]
-
-        tilejson = {
-            "tilejson": "2.2.0",
-            "name": metadata.get("name", "Flood Zones"),
-            "tiles": [f"{str(request.base_url).rstrip('/')}/tiles/floodzone/{{z}}/{{x}}/{{y}}"],
-            "minzoom": min_zoom,
-            "maxzoom": max_zoom,
-            "bounds": bounds,
-            "center": center,
-            "vector_layers": metadata.get("vector_layers", []),
-            "variants": [
-                {
-                    "key": entry["key"],
-                    "filename": os.path.basename(entry["path"]),
-                    "minzoom": entry["min_zoom"],
-                    "maxzoom": entry["max_zoom"],
-                    "bounds": entry["bounds"],
-                }
-                for entry in entries
-            ],
-        }
-        return tilejson
-    except Exception as e:  # pragma: no cover - surfaces in API response
-        raise HTTPException(status_code=500, detail=f"Error reading metadata: {e}")
+        if len(_INFO_JSON) < _PAGE_CACHE_MAX:
+            _INFO_JSON[api_root] = body
+    return Response(content=body, media_type="application/json")
 
 
-@app.get("/api/v1/floodzone")
+@app.get("/api/v1/floodzone", response_class=ORJSONResponse)
 async def get_floodzone(
     lat: float = Query(..., description="Latitude in decimal degrees"),
     lng: float = Query(..., description="Longitude in decimal degrees"),
 ):
     try:
-        match = find_floodzone_feature(lat, lng)
+        # Tile reads, MVT decoding and GEOS tests all block; keep them off
+        # the event loop so tile requests are not stalled behind a lookup.
+        match = await asyncio.to_thread(find_floodzone_feature, lat, lng)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     except RuntimeError as exc:
@@ -821,8 +1784,7 @@ async def get_floodzone(
 # ):
 #     categories: List[str]
 #     if category:
-#         normalized = category.strip().lower()
-#         canonical = SLOSH_CATEGORY_LOOKUP.get(normalized)
+#         canonical = _canonical_slosh_category(category)
 #         if canonical is None:
 #             raise HTTPException(status_code=400, detail="Unknown SLOSH category")
 #         categories = [canonical]
@@ -851,4 +1813,16 @@ async def get_floodzone(
 # --- MAIN EXECUTION ---
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("tile_server:app", host="0.0.0.0", port=8000, reload=True)
+    # uvloop/httptools are the C event loop and HTTP parser; pin them so
+    # uvicorn never silently falls back to asyncio/h11 for tile traffic.
+    uvicorn.run(
+        "tile_server:app",
+        host="0.0.0.0",
+        port=int(os.environ.get("PORT", 8000)),
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.environ.get("TILE_WORKERS", os.cpu_count() or 1)),
+        # Map clients open bursts of tile connections; the 2048 default
+        # (uvicorn's own) is set explicitly so it can be raised per host.
+        backlog=int(os.environ.get("TILE_BACKLOG", 2048)),
+    )
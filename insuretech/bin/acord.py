@@ -2,43 +2,85 @@
 """
 ACORD Document Processing CLI
 
-Extracts a specific page from an ACORD document and processes it with Claude OCR.
+Renders pages of an ACORD document and extracts their data with Claude.
 """
 
 import click
+import functools
+import hashlib
 import os
+import re
+import threading
 import sys
 import json
 import base64
 from pathlib import Path
-from io import BytesIO
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple, Union
 
 # Add the project root to Python path so we can import from backend
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 try:
     import boto3
+    from botocore.config import Config
     from botocore.exceptions import ClientError
-    from pdf2image import convert_from_path
-    from PIL import Image
-    import PyPDF2
+    import fitz  # PyMuPDF
+    import orjson
 except ImportError as e:
     click.echo(f"Error: Missing required dependency: {e}", err=True)
     click.echo("Please run: pip install -r requirements.txt", err=True)
     sys.exit(1)
 
+try:  # Repairs replies with trailing commas, stray fences or single quotes (pip install json-repair)
+    import json_repair
+except ImportError:
+    json_repair = None
 
-class ACORDProcessor:
-    """Handles ACORD document processing with Claude OCR"""
+try:  # Validates extracted data against the prompt's JSON structure (pip install jsonschema)
+    import jsonschema
+except ImportError:
+    jsonschema = None
 
-    def __init__(self):
-        self.model_id = "us.anthropic.claude-3-5-sonnet-20241022-v2:0"
-        self.ocr_prompt = "Extract all text from this document. Preserve the original formatting and structure as much as possible, including line breaks, paragraphs, and spacing."
-        self.bedrock_client = None
 
-        # ACORD extraction prompts
-        self.acord_125_prompt = """You are a data extraction specialist. Extract ALL information from the provided ACORD 125 insurance form document and return it in valid JSON format only. Do not include any explanatory text, comments, or markdown formatting - return only the JSON object.
+# Pages processed in parallel by default, and Bedrock attempts per call; botocore
+# backs off exponentially (with jitter) between attempts on throttling/5xx.
+MAX_CONCURRENT_PAGES = 8
+BEDROCK_MAX_ATTEMPTS = 3
+
+# Page image encodings accepted by Claude
+IMAGE_MEDIA_TYPES = {"png": "image/png", "jpeg": "image/jpeg"}
+JPEG_QUALITY = 85
+# Claude downsamples large images anyway; 200 DPI grayscale keeps ACORD text
+# and checkboxes legible at a third of the pixels/bytes of 300 DPI RGB.
+DEFAULT_DPI = 200
+# PyMuPDF is not thread-safe, so page workers take turns with fitz; only the
+# Bedrock calls overlap
+FITZ_LOCK = threading.Lock()
+# Form number as printed in the ACORD header/footer (e.g. "ACORD 140 (2016/03)");
+# a bare "125" would also match zip codes, phone numbers and amounts.
+ACORD_FORM_RE = re.compile(r"\bACORD\s*(125|140)\b", re.IGNORECASE)
+
+# On-disk cache of Claude replies (see ACORDProcessor.invoke_claude)
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'acord')
+
+
+MODEL_ID = "us.anthropic.claude-3-5-sonnet-20241022-v2:0"
+OCR_PROMPT = "Extract all text from this document. Preserve the original formatting and structure as much as possible, including line breaks, paragraphs, and spacing."
+
+# Prompts are module constants so every request carries byte-identical static
+# text ahead of the page-specific content, which is what Claude's prompt cache
+# keys on. Caching is opt-in (ACORD_PROMPT_CACHE=1) because not every Bedrock
+# model or batch inference accepts cache_control blocks.
+PROMPT_CACHE = os.environ.get('ACORD_PROMPT_CACHE') == '1'
+
+# Single-call mode: classify the page, then apply the matching prompt below
+COMBINED_PROMPT_PREAMBLE = """The image is one page of an ACORD insurance form. First identify whether it is an ACORD 125 or an ACORD 140 form, then extract its data following the matching instructions below.
+
+Return only a JSON object of the form {"acord_type": "125" or "140", "data": <the completed JSON structure for that form>}. Do not include any explanatory text, comments, or markdown formatting."""
+
+# ACORD extraction prompts
+ACORD_125_PROMPT = """You are a data extraction specialist. Extract ALL information from the provided ACORD 125 insurance form document and return it in valid JSON format only. Do not include any explanatory text, comments, or markdown formatting - return only the JSON object.
 
 Instructions:
 1. Extract every field visible in the document, even if empty
@@ -185,7 +227,7 @@ JSON Structure:
 
 Extract all data from the document and populate this JSON structure with the actual values found in the form. Return only the completed JSON object."""
 
-        self.acord_140_prompt = """You are a data extraction specialist. Extract ALL information from the provided ACORD 140 Property Section insurance form document and return it in valid JSON format only. Do not include any explanatory text, comments, or markdown formatting - return only the JSON object.
+ACORD_140_PROMPT = """You are a data extraction specialist. Extract ALL information from the provided ACORD 140 Property Section insurance form document and return it in valid JSON format only. Do not include any explanatory text, comments, or markdown formatting - return only the JSON object.
 
 Instructions:
 1. Extract every field visible in the document, even if empty
@@ -364,28 +406,169 @@ JSON Structure:
 
 Extract all data from the document and populate this JSON structure with the actual values found in the form. Return only the completed JSON object."""
 
+COMBINED_PROMPT = f"""{COMBINED_PROMPT_PREAMBLE}
+
+=== If the page is an ACORD 125 ===
+
+{ACORD_125_PROMPT}
+
+=== If the page is an ACORD 140 ===
+
+{ACORD_140_PROMPT}"""
+
+
+def static_text_block(text: str) -> dict:
+    """Message content block for static prompt text, marked cacheable when enabled"""
+    block = {"type": "text", "text": text}
+    if PROMPT_CACHE:
+        block["cache_control"] = {"type": "ephemeral"}
+    return block
+
+
+def template_schema(template) -> dict:
+    """JSON Schema for a prompt's sample JSON structure; any field may be null"""
+    if isinstance(template, dict):
+        return {
+            "type": ["object", "null"],
+            "properties": {key: template_schema(value) for key, value in template.items()},
+        }
+    if isinstance(template, list):
+        schema = {"type": ["array", "null"]}
+        if template:
+            schema["items"] = template_schema(template[0])
+        return schema
+    if isinstance(template, bool):
+        return {"type": ["boolean", "null"]}
+    return {"type": ["string", "null"]}
+
+
+def normalize_acord_type(value) -> str:
+    """Map a model-reported form type such as "140" or "ACORD 140" to "125"/"140"; ValueError otherwise"""
+    value = str(value).strip()
+    if value in ("125", "140"):
+        return value
+    match = ACORD_FORM_RE.fullmatch(value)
+    if match:
+        return match.group(1)
+    raise ValueError(f"Unrecognized ACORD type {value!r}")
+
+
+@functools.lru_cache(maxsize=None)
+def acord_validator(acord_type: str):
+    """Compiled validator for an ACORD type's extraction prompt, or None if unavailable"""
+    prompt = {"125": ACORD_125_PROMPT, "140": ACORD_140_PROMPT}.get(acord_type)
+    if jsonschema is None or prompt is None:
+        return None
+    template = prompt.split("JSON Structure:\n", 1)[1].split("\n\nExtract all data", 1)[0]
+    return jsonschema.Draft202012Validator(template_schema(json.loads(template)))
+
+
+@functools.lru_cache(maxsize=1)
+def get_bedrock_client():
+    """Process-wide Bedrock runtime client
+
+    Shared by every ACORDProcessor so its urllib3 pool keeps HTTPS
+    connections to bedrock-runtime alive across pages and files instead of
+    paying a TLS handshake per client.
+    """
+    # Get credentials from environment
+    access_key = os.environ.get('AWS_ACCESS_KEY_ID')
+    secret_key = os.environ.get('AWS_SECRET_ACCESS_KEY')
+    region = os.environ.get('AWS_DEFAULT_REGION', 'us-east-1')
+
+    if not access_key or not secret_key:
+        raise ValueError("AWS credentials not found in environment variables")
+
+    session = boto3.session.Session(
+        aws_access_key_id=access_key,
+        aws_secret_access_key=secret_key,
+        region_name=region
+    )
+    return session.client(
+        'bedrock-runtime',
+        config=Config(
+            retries={"max_attempts": BEDROCK_MAX_ATTEMPTS, "mode": "adaptive"},
+            max_pool_connections=32,
+            read_timeout=120,
+            tcp_keepalive=True,
+        ),
+    )
+
+
+class ACORDProcessor:
+    """Handles ACORD document processing with Claude OCR"""
+
+    def __init__(self, image_format: str = "png", dpi: int = DEFAULT_DPI, grayscale: bool = True,
+                 cache_dir: Optional[str] = DEFAULT_CACHE_DIR):
+        self.model_id = MODEL_ID
+        # Claude replies keyed by request hash; None disables the cache
+        self.cache_dir = cache_dir
+        # Page images sent to Claude; JPEG is several times smaller for scanned forms
+        self.image_format = image_format
+        self.image_media_type = IMAGE_MEDIA_TYPES[image_format]
+        self.dpi = dpi
+        self.grayscale = grayscale
+        self.ocr_prompt = OCR_PROMPT
+        self.bedrock_client = None
+        self.combined_prompt = COMBINED_PROMPT
+        self.acord_125_prompt = ACORD_125_PROMPT
+        self.acord_140_prompt = ACORD_140_PROMPT
+
     def setup_bedrock_client(self):
         """Initialize AWS Bedrock client"""
         try:
-            # Get credentials from environment
-            access_key = os.environ.get('AWS_ACCESS_KEY_ID')
-            secret_key = os.environ.get('AWS_SECRET_ACCESS_KEY')
-            region = os.environ.get('AWS_DEFAULT_REGION', 'us-east-1')
-
-            if not access_key or not secret_key:
-                raise ValueError("AWS credentials not found in environment variables")
-
-            self.bedrock_client = boto3.client(
-                'bedrock-runtime',
-                aws_access_key_id=access_key,
-                aws_secret_access_key=secret_key,
-                region_name=region
-            )
+            self.bedrock_client = get_bedrock_client()
             click.echo("✓ Successfully connected to AWS Bedrock")
 
         except Exception as e:
             raise click.ClickException(f"Failed to connect to AWS Bedrock: {str(e)}")
 
+    def invoke_claude(self, body: bytes) -> Optional[str]:
+        """Send a serialized request body to Claude and return the reply text (None if empty)
+
+        Replies are cached on disk by a SHA-256 of the model id and the exact
+        request body (which embeds the page image and prompt), so re-running
+        on the same page skips Bedrock entirely.
+        """
+        cache_path = None
+        if self.cache_dir:
+            key = hashlib.sha256(self.model_id.encode('utf-8') + b"\0" + body).hexdigest()
+            cache_path = os.path.join(self.cache_dir, f"{key}.json")
+            try:
+                with open(cache_path, 'rb') as f:
+                    return orjson.loads(f.read())['text']
+            except (OSError, ValueError, KeyError):
+                pass
+
+        if not self.bedrock_client:
+            self.setup_bedrock_client()
+
+        response = self.bedrock_client.invoke_model(
+            body=body,
+            modelId=self.model_id,
+            accept='application/json',
+            contentType='application/json'
+        )
+
+        # Parse response
+        response_body = orjson.loads(response['body'].read())
+        if not response_body.get('content'):
+            return None
+        text = response_body['content'][0].get('text', '')
+
+        if cache_path:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Write then rename so concurrent page workers never read a partial file
+            tmp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(orjson.dumps({"model_id": self.model_id, "text": text}))
+            os.replace(tmp_path, cache_path)
+        return text
+
+    def page_basename(self, input_pdf: str, page_number: int) -> str:
+        """Base name for the files written for one page of a document"""
+        return f"{Path(input_pdf).stem}_page_{page_number:04d}"
+
     def extract_page(self, input_pdf: str, page_number: int, output_dir: str) -> str:
         """Extract specific page from PDF and save as separate file"""
         if not os.path.exists(input_pdf):
@@ -395,56 +578,76 @@ Extract all data from the document and populate this JSON structure with the act
         os.makedirs(output_dir, exist_ok=True)
 
         # Generate output filename
-        input_name = Path(input_pdf).stem
-        output_filename = f"{input_name}_page_{page_number:04d}.pdf"
+        output_filename = f"{self.page_basename(input_pdf, page_number)}.pdf"
         output_path = os.path.join(output_dir, output_filename)
 
         try:
-            with open(input_pdf, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                total_pages = len(pdf_reader.pages)
+            with FITZ_LOCK, fitz.open(input_pdf) as src:
+                total_pages = src.page_count
 
                 if page_number < 1 or page_number > total_pages:
                     raise click.ClickException(f"Page {page_number} not found. Document has {total_pages} pages.")
 
-                # Create new PDF with just the specified page
-                pdf_writer = PyPDF2.PdfWriter()
-                pdf_writer.add_page(pdf_reader.pages[page_number - 1])  # Convert to 0-based index
-
-                # Save extracted page
-                with open(output_path, 'wb') as output_file:
-                    pdf_writer.write(output_file)
+                # Copy just the specified page (0-based index); MuPDF copies
+                # only the objects that page references, in C
+                with fitz.open() as dst:
+                    dst.insert_pdf(src, from_page=page_number - 1, to_page=page_number - 1)
+                    dst.save(output_path, garbage=1, deflate=True)
 
                 click.echo(f"✓ Extracted page {page_number} to: {output_filename}")
                 return output_path
 
+        except click.ClickException:
+            raise
         except Exception as e:
             raise click.ClickException(f"Error extracting page: {str(e)}")
 
-    def ocr_with_claude(self, pdf_path: str, output_dir: str) -> dict:
-        """OCR the extracted page using Claude"""
-        if not self.bedrock_client:
-            self.setup_bedrock_client()
+    def render_page(self, input_pdf: str, page_number: int, dpi: Optional[int] = None) -> bytes:
+        """Render one page of a PDF straight to image bytes (PNG or JPEG), without splitting it out first"""
+        if not os.path.exists(input_pdf):
+            raise click.ClickException(f"Input file not found: {input_pdf}")
 
         try:
-            click.echo("Converting PDF to image...")
-            # Convert PDF to image
-            images = convert_from_path(pdf_path, dpi=300)
+            with FITZ_LOCK, fitz.open(input_pdf) as doc:
+                if page_number < 1 or page_number > doc.page_count:
+                    raise click.ClickException(f"Page {page_number} not found. Document has {doc.page_count} pages.")
+
+                # PDF user space is 72 DPI
+                scale = (dpi or self.dpi) / 72
+                pixmap = doc.load_page(page_number - 1).get_pixmap(
+                    matrix=fitz.Matrix(scale, scale),
+                    colorspace=fitz.csGRAY if self.grayscale else fitz.csRGB,
+                    alpha=False
+                )
+                if self.image_format == "jpeg":
+                    return pixmap.tobytes("jpeg", jpg_quality=JPEG_QUALITY)
+                return pixmap.tobytes("png")
+
+        except click.ClickException:
+            raise
+        except Exception as e:
+            raise click.ClickException(f"Error rendering page: {str(e)}")
 
-            if len(images) != 1:
-                click.echo(f"Warning: Expected 1 page, got {len(images)} pages")
+    def ocr_with_claude(self, page: Union[str, bytes], output_dir: str, base_filename: Optional[str] = None) -> dict:
+        """OCR a page using Claude
 
-            # Process the image with Claude
-            image = images[0]
-            click.echo("Sending to Claude for OCR...")
+        ``page`` is either the path of a single-page PDF or image bytes from
+        render_page(); ``base_filename`` names the output (defaults to the
+        PDF's name).
+        """
+        if isinstance(page, str):
+            click.echo("Converting PDF to image...")
+            image_bytes = self.render_page(page, 1)
+            base_filename = base_filename or Path(page).stem
+        else:
+            image_bytes = page
 
-            # Convert image to base64
-            buffer = BytesIO()
-            image.save(buffer, format='PNG')
-            image_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
+        try:
+            click.echo("Sending to Claude for OCR...")
+            image_base64 = base64.b64encode(image_bytes).decode('ascii')
 
             # Prepare Claude request
-            body = json.dumps({
+            body = orjson.dumps({
                 "anthropic_version": "bedrock-2023-05-31",
                 "max_tokens": 4000,
                 "temperature": 0.1,
@@ -456,7 +659,7 @@ Extract all data from the document and populate this JSON structure with the act
                                 "type": "image",
                                 "source": {
                                     "type": "base64",
-                                    "media_type": "image/png",
+                                    "media_type": self.image_media_type,
                                     "data": image_base64
                                 }
                             },
@@ -469,24 +672,13 @@ Extract all data from the document and populate this JSON structure with the act
                 ]
             })
 
-            # Call Claude via Bedrock
-            response = self.bedrock_client.invoke_model(
-                body=body,
-                modelId=self.model_id,
-                accept='application/json',
-                contentType='application/json'
-            )
-
-            # Parse response
-            response_body = json.loads(response.get('body').read())
-            if 'content' in response_body and response_body['content']:
-                ocr_text = response_body['content'][0].get('text', '')
-            else:
+            # Call Claude via Bedrock (or reuse a cached reply for the same request)
+            ocr_text = self.invoke_claude(body)
+            if ocr_text is None:
                 ocr_text = "Error: No text extracted by Claude"
 
             # Save OCR results
-            pdf_name = Path(pdf_path).stem
-            ocr_filename = f"{pdf_name}-claude-ocr.txt"
+            ocr_filename = f"{base_filename}-claude-ocr.txt"
             ocr_path = os.path.join(output_dir, ocr_filename)
 
             with open(ocr_path, 'w', encoding='utf-8') as f:
@@ -498,7 +690,7 @@ Extract all data from the document and populate this JSON structure with the act
                 "status": "success",
                 "ocr_file": ocr_filename,
                 "text_length": len(ocr_text),
-                "pdf_file": Path(pdf_path).name
+                "pdf_file": Path(page).name if isinstance(page, str) else None
             }
 
         except ClientError as e:
@@ -506,175 +698,410 @@ Extract all data from the document and populate this JSON structure with the act
         except Exception as e:
             raise click.ClickException(f"OCR processing error: {str(e)}")
 
+    def parse_json_response(self, response_text: str):
+        """Parse a JSON reply from Claude, tolerating a markdown code fence
+
+        Replies that are still malformed (trailing commas, a stray fence,
+        single quotes) are passed through json_repair when it is installed.
+        """
+        # Clean response (remove potential markdown formatting)
+        cleaned_response = response_text.strip()
+        if cleaned_response.startswith('```json'):
+            cleaned_response = cleaned_response.replace('```json', '').replace('```', '').strip()
+        elif cleaned_response.startswith('```'):
+            cleaned_response = cleaned_response.replace('```', '').strip()
+
+        # orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers catch either
+        try:
+            return orjson.loads(cleaned_response)
+        except orjson.JSONDecodeError:
+            if json_repair is None:
+                raise
+            repaired = json_repair.loads(response_text)
+            # json_repair returns an empty string rather than raising on hopeless input
+            if not isinstance(repaired, dict) or not repaired:
+                raise
+            return repaired
+
+    def validate_extracted_data(self, extracted_data, acord_type: str) -> List[str]:
+        """Messages for fields that do not match the ACORD type's JSON structure"""
+        validator = acord_validator(acord_type)
+        if validator is None:
+            return []
+        return [
+            f"{'/'.join(str(part) for part in error.absolute_path) or '<root>'}: {error.message}"
+            for error in validator.iter_errors(extracted_data)
+        ]
+
+    def save_extracted_data(self, extracted_data: dict, acord_type: str, output_dir: str, base_filename: str) -> dict:
+        """Save extracted ACORD data to a JSON file"""
+        json_filename = f"{base_filename}-acord-{acord_type}-data.json"
+        json_path = os.path.join(output_dir, json_filename)
+
+        with open(json_path, 'wb') as f:
+            f.write(orjson.dumps(extracted_data, option=orjson.OPT_INDENT_2))
+
+        click.echo(f"✓ Data extraction completed: {json_filename}")
+
+        result = {
+            "status": "success",
+            "acord_type": acord_type,
+            "extraction_file": json_filename,
+            "data": extracted_data
+        }
+
+        schema_errors = self.validate_extracted_data(extracted_data, acord_type)
+        if schema_errors:
+            click.echo(f"⚠️ {len(schema_errors)} field(s) do not match the ACORD {acord_type} structure, "
+                       f"e.g. {schema_errors[0]}")
+            result["schema_errors"] = schema_errors
+
+        return result
+
+    def save_raw_response(self, response_text: str, acord_type: str, error: Exception, output_dir: str,
+                          base_filename: str) -> dict:
+        """Save a reply that could not be parsed as JSON"""
+        raw_filename = f"{base_filename}-acord-{acord_type}-raw-response.txt"
+        raw_path = os.path.join(output_dir, raw_filename)
+
+        with open(raw_path, 'w', encoding='utf-8') as f:
+            f.write(f"JSON Parsing Error: {str(error)}\n\nRaw Response:\n{response_text}")
+
+        click.echo(f"⚠️ JSON parsing failed, saved raw response: {raw_filename}")
+
+        return {
+            "status": "partial_success",
+            "acord_type": acord_type,
+            "raw_response_file": raw_filename,
+            "error": f"JSON parsing failed: {str(error)}"
+        }
+
+    def image_extraction_request(self, image_bytes: bytes) -> dict:
+        """Bedrock request body that classifies and extracts an ACORD page image"""
+        return {
+            "anthropic_version": "bedrock-2023-05-31",
+            "max_tokens": 8192,
+            "temperature": 0.1,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": [
+                        # Static prompt first so it forms a cacheable prefix
+                        static_text_block(self.combined_prompt),
+                        {
+                            "type": "image",
+                            "source": {
+                                "type": "base64",
+                                "media_type": self.image_media_type,
+                                "data": base64.b64encode(image_bytes).decode('ascii')
+                            }
+                        }
+                    ]
+                }
+            ]
+        }
+
+    def save_image_extraction(self, response_text: str, output_dir: str, base_filename: str) -> dict:
+        """Parse and save the reply to image_extraction_request()"""
+        try:
+            reply = self.parse_json_response(response_text)
+            acord_type = normalize_acord_type(reply["acord_type"])
+            extracted_data = reply["data"]
+        # json.JSONDecodeError and an unrecognized acord_type are both ValueErrors
+        except (ValueError, KeyError, TypeError) as e:
+            return self.save_raw_response(response_text, "unknown", e, output_dir, base_filename)
+
+        click.echo(f"Detected ACORD {acord_type} form")
+        return self.save_extracted_data(extracted_data, acord_type, output_dir, base_filename)
+
+    def extract_acord_data_from_image(self, image_bytes: bytes, output_dir: str, base_filename: str) -> dict:
+        """Classify and extract an ACORD page in a single Claude call on the page image"""
+        try:
+            click.echo("Sending to Claude for classification and data extraction...")
+            body = orjson.dumps(self.image_extraction_request(image_bytes))
+
+            # Call Claude via Bedrock (or reuse a cached reply for the same request)
+            extraction_response = self.invoke_claude(body)
+            if extraction_response is None:
+                extraction_response = "Error: No extraction data returned by Claude"
+
+            return self.save_image_extraction(extraction_response, output_dir, base_filename)
+
+        except ClientError as e:
+            raise click.ClickException(f"AWS Bedrock error during extraction: {str(e)}")
+        except Exception as e:
+            raise click.ClickException(f"Data extraction error: {str(e)}")
+
     def determine_acord_type(self, ocr_text: str) -> str:
         """Determine if the document is ACORD 125 or ACORD 140 based on OCR text"""
-        ocr_text_upper = ocr_text.upper()
+        match = ACORD_FORM_RE.search(ocr_text)
+        if match:
+            return match.group(1)
 
-        if "ACORD 125" in ocr_text_upper or "125" in ocr_text_upper:
-            return "125"
-        elif "ACORD 140" in ocr_text_upper or "140" in ocr_text_upper:
-            return "140"
-        else:
-            # Default to 125 if cannot determine
-            click.echo("Warning: Could not determine ACORD type, defaulting to ACORD 125")
-            return "125"
+        # Default to 125 if cannot determine
+        click.echo("Warning: Could not determine ACORD type, defaulting to ACORD 125")
+        return "125"
 
     def extract_acord_data(self, ocr_text: str, output_dir: str, base_filename: str) -> dict:
         """Extract structured data from ACORD form using appropriate prompt"""
-        if not self.bedrock_client:
-            self.setup_bedrock_client()
-
         try:
             # Determine ACORD type
             acord_type = self.determine_acord_type(ocr_text)
             click.echo(f"Detected ACORD {acord_type} form")
 
             # Choose appropriate prompt
-            if acord_type == "140":
-                extraction_prompt = self.acord_140_prompt
-                prompt_text = f"ACORD 140 Document Text:\n\n{ocr_text}\n\n{extraction_prompt}"
-            else:
-                extraction_prompt = self.acord_125_prompt
-                prompt_text = f"ACORD 125 Document Text:\n\n{ocr_text}\n\n{extraction_prompt}"
+            extraction_prompt = self.acord_140_prompt if acord_type == "140" else self.acord_125_prompt
 
             click.echo("Sending to Claude for data extraction...")
 
             # Prepare Claude request for data extraction
-            body = json.dumps({
+            body = orjson.dumps({
                 "anthropic_version": "bedrock-2023-05-31",
                 "max_tokens": 4000,
                 "temperature": 0.1,
                 "messages": [
                     {
                         "role": "user",
-                        "content": prompt_text
+                        "content": [
+                            # Static prompt first so it forms a cacheable prefix
+                            static_text_block(extraction_prompt),
+                            {
+                                "type": "text",
+                                "text": f"ACORD {acord_type} Document Text:\n\n{ocr_text}"
+                            }
+                        ]
                     }
                 ]
             })
 
-            # Call Claude via Bedrock
-            response = self.bedrock_client.invoke_model(
-                body=body,
-                modelId=self.model_id,
-                accept='application/json',
-                contentType='application/json'
-            )
-
-            # Parse response
-            response_body = json.loads(response.get('body').read())
-            if 'content' in response_body and response_body['content']:
-                extraction_response = response_body['content'][0].get('text', '')
-            else:
+            # Call Claude via Bedrock (or reuse a cached reply for the same request)
+            extraction_response = self.invoke_claude(body)
+            if extraction_response is None:
                 extraction_response = "Error: No extraction data returned by Claude"
 
             # Try to parse as JSON
             try:
-                # Clean response (remove potential markdown formatting)
-                cleaned_response = extraction_response.strip()
-                if cleaned_response.startswith('```json'):
-                    cleaned_response = cleaned_response.replace('```json', '').replace('```', '').strip()
-                elif cleaned_response.startswith('```'):
-                    cleaned_response = cleaned_response.replace('```', '').strip()
+                extracted_data = self.parse_json_response(extraction_response)
+            except json.JSONDecodeError as e:
+                return self.save_raw_response(extraction_response, acord_type, e, output_dir, base_filename)
 
-                extracted_data = json.loads(cleaned_response)
+            return self.save_extracted_data(extracted_data, acord_type, output_dir, base_filename)
 
-                # Save extracted data to JSON file
-                json_filename = f"{base_filename}-acord-{acord_type}-data.json"
-                json_path = os.path.join(output_dir, json_filename)
+        except ClientError as e:
+            raise click.ClickException(f"AWS Bedrock error during extraction: {str(e)}")
+        except Exception as e:
+            raise click.ClickException(f"Data extraction error: {str(e)}")
 
-                with open(json_path, 'w', encoding='utf-8') as f:
-                    json.dump(extracted_data, f, indent=2, ensure_ascii=False)
 
-                click.echo(f"✓ Data extraction completed: {json_filename}")
+def parse_pages(spec: str, total_pages: int) -> List[int]:
+    """Parse a page spec such as ``2``, ``1,2,5-8`` or ``all`` into 1-based page numbers"""
+    if spec.strip().lower() == 'all':
+        return list(range(1, total_pages + 1))
 
-                return {
-                    "status": "success",
-                    "acord_type": acord_type,
-                    "extraction_file": json_filename,
-                    "data": extracted_data
-                }
+    pages = []
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            if '-' in part:
+                start, end = (int(bound) for bound in part.split('-', 1))
+                pages.extend(range(start, end + 1))
+            else:
+                pages.append(int(part))
+        except ValueError:
+            raise click.BadParameter(f"Invalid page range: {part}", param_hint="'-p'")
 
-            except json.JSONDecodeError as e:
-                # Save raw response if JSON parsing fails
-                raw_filename = f"{base_filename}-acord-{acord_type}-raw-response.txt"
-                raw_path = os.path.join(output_dir, raw_filename)
+    for page_number in pages:
+        if page_number < 1 or page_number > total_pages:
+            raise click.ClickException(f"Page {page_number} not found. Document has {total_pages} pages.")
+    if not pages:
+        raise click.BadParameter("No pages given", param_hint="'-p'")
+    return list(dict.fromkeys(pages))
 
-                with open(raw_path, 'w', encoding='utf-8') as f:
-                    f.write(f"JSON Parsing Error: {str(e)}\n\nRaw Response:\n{extraction_response}")
 
-                click.echo(f"⚠️ JSON parsing failed, saved raw response: {raw_filename}")
+def process_page(processor: ACORDProcessor, input_file: str, page_number: int, output_dir: str,
+                 save_page_pdf: bool, two_stage: bool = False) -> dict:
+    """Render and extract one page, returning a summary of the files written
 
-                return {
-                    "status": "partial_success",
-                    "acord_type": acord_type,
-                    "raw_response_file": raw_filename,
-                    "error": f"JSON parsing failed: {str(e)}"
-                }
+    By default the page image goes to Claude once, which classifies and
+    extracts it; ``two_stage`` OCRs it to text first and extracts from that.
+    """
+    base_filename = processor.page_basename(input_file, page_number)
 
-        except ClientError as e:
-            raise click.ClickException(f"AWS Bedrock error during extraction: {str(e)}")
-        except Exception as e:
-            raise click.ClickException(f"Data extraction error: {str(e)}")
+    # Step 1: Render the specific page (optionally also saving it as a PDF)
+    extracted_pdf = None
+    if save_page_pdf:
+        click.echo(f"🔸 Extracting page {page_number} from {input_file}...")
+        extracted_pdf = processor.extract_page(input_file, page_number, output_dir)
+
+    click.echo(f"🔸 Rendering page {page_number} from {input_file}...")
+    page_image = processor.render_page(input_file, page_number)
+
+    if not two_stage:
+        # Step 2: Classify and extract in one call
+        click.echo(f"🔸 Extracting ACORD data from page {page_number}...")
+        extraction_result = processor.extract_acord_data_from_image(page_image, output_dir, base_filename)
+        return {
+            "input": input_file,
+            "page": page_number,
+            "extracted_pdf": Path(extracted_pdf).name if extracted_pdf else None,
+            "ocr": None,
+            "extraction": extraction_result,
+        }
+
+    # Step 2: OCR with Claude
+    click.echo(f"🔸 Processing page {page_number} with Claude OCR...")
+    ocr_result = processor.ocr_with_claude(page_image, output_dir, base_filename)
+
+    # Step 3: Extract structured data from OCR text
+    click.echo(f"🔸 Extracting ACORD data from page {page_number}...")
+    ocr_file_path = os.path.join(output_dir, ocr_result['ocr_file'])
+
+    # Read the OCR text
+    with open(ocr_file_path, 'r', encoding='utf-8') as f:
+        ocr_text = f.read()
+
+    # Extract structured data
+    extraction_result = processor.extract_acord_data(ocr_text, output_dir, base_filename)
+
+    return {
+        "input": input_file,
+        "page": page_number,
+        "extracted_pdf": Path(extracted_pdf).name if extracted_pdf else None,
+        "ocr": ocr_result,
+        "extraction": extraction_result,
+    }
+
+
+def echo_page_result(result: dict):
+    """Print the files written for one page"""
+    click.echo(f"📄 {Path(result['input']).name} page {result['page']}:")
+    if result.get('error'):
+        click.echo(f"   ❌ Error: {result['error']}")
+        return
+
+    ocr_result = result['ocr']
+    extraction_result = result['extraction']
+    if result['extracted_pdf']:
+        click.echo(f"   📄 Extracted PDF: {result['extracted_pdf']}")
+    if ocr_result:
+        click.echo(f"   📝 OCR text file: {ocr_result['ocr_file']}")
+        click.echo(f"   📊 OCR text length: {ocr_result['text_length']} characters")
+
+    if extraction_result['status'] == 'success':
+        click.echo(f"   🎯 ACORD {extraction_result['acord_type']} data: {extraction_result['extraction_file']}")
+    elif extraction_result['status'] == 'partial_success':
+        click.echo(f"   ⚠️ ACORD {extraction_result['acord_type']} raw response: {extraction_result['raw_response_file']}")
+        click.echo(f"       Error: {extraction_result['error']}")
 
 
 @click.command()
-@click.option('-i', '--input', 'input_file', required=True,
-              help='Input ACORD PDF file path')
-@click.option('-p', '--page', 'page_number', required=True, type=int,
-              help='Page number to extract (1-based)')
+@click.option('-i', '--input', 'input_files', required=True, multiple=True,
+              help='Input ACORD PDF file path (repeatable)')
+@click.option('-p', '--page', 'pages', required=True,
+              help='Pages to process in each file (1-based): 2, 1,2,5-8 or all')
 @click.option('-o', '--output', 'output_dir', default='./acords',
               help='Output directory (default: ./acords)')
+@click.option('-c', '--concurrency', default=MAX_CONCURRENT_PAGES, show_default=True, type=click.IntRange(1, 32),
+              help='Pages processed in parallel')
+@click.option('--save-page-pdf', is_flag=True,
+              help='Also write each page out as a single-page PDF')
+@click.option('--two-stage', is_flag=True,
+              help='OCR each page to text first, then extract from the text (two Claude calls)')
+@click.option('--image-format', type=click.Choice(sorted(IMAGE_MEDIA_TYPES)), default='png', show_default=True,
+              help='Page image encoding sent to Claude; jpeg is much smaller for scanned forms')
+@click.option('--dpi', default=DEFAULT_DPI, show_default=True, type=click.IntRange(72, 600),
+              help='Resolution pages are rendered at')
+@click.option('--grayscale/--color', default=True, show_default=True,
+              help='Render pages in grayscale or RGB')
+@click.option('--no-cache', is_flag=True,
+              help=f'Always call Bedrock instead of reusing cached replies from {DEFAULT_CACHE_DIR}')
 @click.option('--verbose', '-v', is_flag=True,
               help='Verbose output')
-def process_acord(input_file: str, page_number: int, output_dir: str, verbose: bool):
+def process_acord(input_files: Tuple[str, ...], pages: str, output_dir: str, concurrency: int, save_page_pdf: bool,
+                  two_stage: bool, image_format: str, dpi: int, grayscale: bool, no_cache: bool, verbose: bool):
     """
-    Extract a specific page from an ACORD document and process it with Claude OCR.
+    Render pages of ACORD documents and extract their data with Claude.
+
+    Each page image is classified and extracted in one Claude call (or OCR'd
+    then extracted with --two-stage). Pages of every input are processed
+    concurrently over one Bedrock connection pool; each call is retried with
+    exponential backoff when throttled.
 
     Example:
         python bin/acord.py -i documents/acord_form.pdf -p 2
-        python bin/acord.py -i form.pdf -p 1 -o ./my_results
+        python bin/acord.py -i form.pdf -p 1 -o ./my_results --save-page-pdf
+        python bin/acord.py -i packet.pdf -p 1,3-6
+        python bin/acord.py -i packet.pdf -p all -c 4
+        python bin/acord.py -i a.pdf -i b.pdf -i c.pdf -p all
     """
+    tasks = []
+    for input_file in input_files:
+        if not os.path.exists(input_file):
+            raise click.ClickException(f"Input file not found: {input_file}")
+
+        try:
+            with fitz.open(input_file) as doc:
+                total_pages = doc.page_count
+        except Exception as e:
+            raise click.ClickException(f"Error reading PDF {input_file}: {str(e)}")
+        page_numbers = parse_pages(pages, total_pages)
+        tasks.extend((input_file, page_number) for page_number in page_numbers)
+
+        if verbose:
+            click.echo(f"Input file: {input_file}")
+            click.echo(f"Pages: {', '.join(str(p) for p in page_numbers)}")
     if verbose:
-        click.echo(f"Input file: {input_file}")
-        click.echo(f"Page number: {page_number}")
         click.echo(f"Output directory: {output_dir}")
 
-    processor = ACORDProcessor()
+    processor = ACORDProcessor(image_format=image_format, dpi=dpi, grayscale=grayscale,
+                               cache_dir=None if no_cache else DEFAULT_CACHE_DIR)
 
     try:
-        # Step 1: Extract the specific page
-        click.echo(f"🔸 Extracting page {page_number} from {input_file}...")
-        extracted_pdf = processor.extract_page(input_file, page_number, output_dir)
-
-        # Step 2: OCR with Claude
-        click.echo(f"🔸 Processing with Claude OCR...")
-        ocr_result = processor.ocr_with_claude(extracted_pdf, output_dir)
-
-        # Step 3: Extract structured data from OCR text
-        click.echo(f"🔸 Extracting ACORD data...")
-        ocr_file_path = os.path.join(output_dir, ocr_result['ocr_file'])
-
-        # Read the OCR text
-        with open(ocr_file_path, 'r', encoding='utf-8') as f:
-            ocr_text = f.read()
+        os.makedirs(output_dir, exist_ok=True)
 
-        # Extract structured data
-        base_filename = Path(extracted_pdf).stem
-        extraction_result = processor.extract_acord_data(ocr_text, output_dir, base_filename)
+        if len(tasks) == 1:
+            results = [process_page(processor, *tasks[0], output_dir, save_page_pdf, two_stage)]
+        else:
+            # Bedrock round-trips dominate and release the GIL, so a thread per page overlaps them
+            with ThreadPoolExecutor(max_workers=min(concurrency, len(tasks))) as pool:
+                futures = [
+                    pool.submit(process_page, processor, input_file, page_number, output_dir, save_page_pdf,
+                                two_stage)
+                    for input_file, page_number in tasks
+                ]
+                results = []
+                for (input_file, page_number), future in zip(tasks, futures):
+                    try:
+                        results.append(future.result())
+                    except click.ClickException as e:
+                        results.append({"input": input_file, "page": page_number, "error": e.format_message()})
+                    # One bad page shouldn't lose the rest of the packet
+                    except Exception as e:
+                        results.append({"input": input_file, "page": page_number, "error": str(e)})
 
         # Step 4: Display results
-        click.echo("🎉 Processing completed successfully!")
-        click.echo(f"   📄 Extracted PDF: {Path(extracted_pdf).name}")
-        click.echo(f"   📝 OCR text file: {ocr_result['ocr_file']}")
-        click.echo(f"   📊 OCR text length: {ocr_result['text_length']} characters")
+        failed = [result for result in results if result.get('error')]
+        if failed:
+            click.echo(f"⚠️ Processing finished with {len(failed)} failed page(s)")
+        else:
+            click.echo("🎉 Processing completed successfully!")
+        for result in results:
+            echo_page_result(result)
+
+        for input_file in input_files:
+            file_results = [result for result in results if result['input'] == input_file]
+            if len(file_results) > 1:
+                summary_filename = f"{Path(input_file).stem}-results.json"
+                with open(os.path.join(output_dir, summary_filename), 'wb') as f:
+                    f.write(orjson.dumps(file_results, option=orjson.OPT_INDENT_2))
+                click.echo(f"📋 Per-page results: {summary_filename}")
 
-        if extraction_result['status'] == 'success':
-            click.echo(f"   🎯 ACORD {extraction_result['acord_type']} data: {extraction_result['extraction_file']}")
-        elif extraction_result['status'] == 'partial_success':
-            click.echo(f"   ⚠️ ACORD {extraction_result['acord_type']} raw response: {extraction_result['raw_response_file']}")
-            click.echo(f"       Error: {extraction_result['error']}")
+        click.echo(f"📁 Output directory: {output_dir}")
 
-        click.echo(f"   📁 Output directory: {output_dir}")
+        if len(failed) == len(results):
+            raise click.ClickException(failed[0]['error'])
 
     except click.ClickException:
         raise
@@ -683,4 +1110,4 @@ def process_acord(input_file: str, page_number: int, output_dir: str, verbose: b
 
 
 if __name__ == '__main__':
-    process_acord()
\ No newline at end of file
+    process_acord()
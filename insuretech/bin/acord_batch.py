@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+ACORD Batch Processing CLI
+
+Submits many ACORD pages as one Bedrock batch inference job instead of one
+real-time call per page. Batch jobs are billed at roughly half the on-demand
+price and do not count against the real-time quota, at the cost of completing
+asynchronously (typically within 24 hours).
+
+Bedrock requires a minimum number of records per batch job (100 at the time
+of writing); use bin/acord.py for small runs.
+"""
+
+import click
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List, Tuple
+
+# Add the project root to Python path so we can import from backend
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+try:
+    import boto3
+    from botocore.exceptions import ClientError
+    import fitz  # PyMuPDF
+    import orjson
+except ImportError as e:
+    click.echo(f"Error: Missing required dependency: {e}", err=True)
+    click.echo("Please run: pip install -r requirements.txt", err=True)
+    sys.exit(1)
+
+from acord import ACORDProcessor, DEFAULT_DPI, IMAGE_MEDIA_TYPES, parse_pages
+
+
+# Terminal states reported by get_model_invocation_job
+FINISHED_STATUSES = {"Completed", "PartiallyCompleted"}
+FAILED_STATUSES = {"Failed", "Stopped", "Expired"}
+POLL_INTERVAL_SECONDS = 60
+
+
+def split_s3_uri(uri: str) -> Tuple[str, str]:
+    """Split ``s3://bucket/key`` into ``(bucket, key)``"""
+    if not uri.startswith("s3://"):
+        raise click.BadParameter(f"Expected an s3:// URI, got {uri}")
+    bucket, _, key = uri[len("s3://"):].partition("/")
+    return bucket, key
+
+
+def write_records(processor: ACORDProcessor, input_files: List[str], pages: str, manifest_path: str) -> dict:
+    """Render every requested page into a batch input JSONL; returns recordId -> output base filename"""
+    records = {}
+    with open(manifest_path, 'wb') as manifest:
+        for input_file in input_files:
+            with fitz.open(input_file) as doc:
+                total_pages = doc.page_count
+            for page_number in parse_pages(pages, total_pages):
+                # Bedrock expects fixed-width alphanumeric record ids
+                record_id = f"{len(records):011d}"
+                records[record_id] = processor.page_basename(input_file, page_number)
+                image_bytes = processor.render_page(input_file, page_number)
+                manifest.write(orjson.dumps({
+                    "recordId": record_id,
+                    "modelInput": processor.image_extraction_request(image_bytes),
+                }))
+                manifest.write(b"\n")
+            click.echo(f"✓ Rendered {input_file}")
+    return records
+
+
+def collect_job(job: dict, output_dir: str) -> dict:
+    """Download a finished job's output and save each record like bin/acord.py does"""
+    processor = ACORDProcessor()
+    s3 = boto3.client('s3')
+    bucket, prefix = split_s3_uri(job["output_uri"])
+    job_id = job["job_arn"].rsplit("/", 1)[-1]
+    prefix = f"{prefix.rstrip('/')}/{job_id}/"
+
+    summary = {"success": 0, "partial_success": 0, "failed": 0}
+    paginator = s3.get_paginator('list_objects_v2')
+    for listing in paginator.paginate(Bucket=bucket, Prefix=prefix):
+        for item in listing.get('Contents', []):
+            if not item['Key'].endswith('.out'):
+                continue
+            body = s3.get_object(Bucket=bucket, Key=item['Key'])['Body']
+            for line in body.iter_lines():
+                if not line:
+                    continue
+                record = orjson.loads(line)
+                base_filename = job["records"].get(record.get("recordId"), record.get("recordId"))
+                output = record.get("modelOutput") or {}
+                if not output.get("content"):
+                    error = record.get("error", {}).get("errorMessage", "No output returned")
+                    click.echo(f"❌ {base_filename}: {error}")
+                    summary["failed"] += 1
+                    continue
+                result = processor.save_image_extraction(output["content"][0].get("text", ""), output_dir, base_filename)
+                summary[result["status"]] += 1
+    return summary
+
+
+@click.group()
+def cli():
+    """Process ACORD documents with Bedrock batch inference."""
+
+
+@cli.command()
+@click.option('-i', '--input', 'input_files', required=True, multiple=True,
+              help='Input ACORD PDF file path (repeatable)')
+@click.option('-p', '--page', 'pages', default='all', show_default=True,
+              help='Pages to process in each file (1-based): 2, 1,2,5-8 or all')
+@click.option('--s3-uri', required=True,
+              help='S3 location for the job input and output, e.g. s3://bucket/acord-batch')
+@click.option('--role-arn', envvar='BEDROCK_BATCH_ROLE_ARN', required=True,
+              help='IAM service role Bedrock assumes to read and write S3 (or BEDROCK_BATCH_ROLE_ARN)')
+@click.option('-o', '--output', 'output_dir', default='./acords',
+              help='Output directory (default: ./acords)')
+@click.option('--image-format', type=click.Choice(sorted(IMAGE_MEDIA_TYPES)), default='png', show_default=True,
+              help='Page image encoding sent to Claude; jpeg keeps large batch inputs much smaller')
+@click.option('--dpi', default=DEFAULT_DPI, show_default=True, type=click.IntRange(72, 600),
+              help='Resolution pages are rendered at')
+@click.option('--grayscale/--color', default=True, show_default=True,
+              help='Render pages in grayscale or RGB')
+@click.option('--wait', is_flag=True,
+              help='Poll until the job finishes, then collect its results')
+def submit(input_files: Tuple[str, ...], pages: str, s3_uri: str, role_arn: str, output_dir: str,
+           image_format: str, dpi: int, grayscale: bool, wait: bool):
+    """
+    Render pages and submit them as one batch inference job.
+
+    Example:
+        python bin/acord_batch.py submit -i a.pdf -i b.pdf --s3-uri s3://my-bucket/acord-batch
+    """
+    for input_file in input_files:
+        if not os.path.exists(input_file):
+            raise click.ClickException(f"Input file not found: {input_file}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    processor = ACORDProcessor(image_format=image_format, dpi=dpi, grayscale=grayscale)
+    job_name = f"acord-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+    manifest_path = os.path.join(output_dir, f"{job_name}-input.jsonl")
+
+    try:
+        records = write_records(processor, list(input_files), pages, manifest_path)
+
+        bucket, prefix = split_s3_uri(s3_uri)
+        job_prefix = "/".join(part for part in (prefix.strip('/'), job_name) if part)
+        input_key = f"{job_prefix}/input.jsonl"
+        boto3.client('s3').upload_file(manifest_path, bucket, input_key)
+        click.echo(f"✓ Uploaded {len(records)} records to s3://{bucket}/{input_key}")
+
+        output_uri = f"s3://{bucket}/{job_prefix}/output/"
+        response = boto3.client('bedrock').create_model_invocation_job(
+            jobName=job_name,
+            roleArn=role_arn,
+            modelId=processor.model_id,
+            inputDataConfig={"s3InputDataConfig": {"s3Uri": f"s3://{bucket}/{input_key}", "s3InputFormat": "JSONL"}},
+            outputDataConfig={"s3OutputDataConfig": {"s3Uri": output_uri}},
+        )
+    except ClientError as e:
+        raise click.ClickException(f"AWS error submitting batch job: {str(e)}")
+
+    job = {"job_arn": response["jobArn"], "output_uri": output_uri, "records": records}
+    job_file = os.path.join(output_dir, f"{job_name}-job.json")
+    with open(job_file, 'wb') as f:
+        f.write(orjson.dumps(job, option=orjson.OPT_INDENT_2))
+
+    click.echo(f"🎉 Submitted batch job: {response['jobArn']}")
+    click.echo(f"   📋 Job file: {job_file}")
+
+    if wait:
+        ctx = click.get_current_context()
+        ctx.invoke(collect, job_file=job_file, output_dir=output_dir, wait=True)
+    else:
+        click.echo(f"   Collect results with: python bin/acord_batch.py collect --job-file {job_file}")
+
+
+@cli.command()
+@click.option('--job-file', required=True, type=click.Path(exists=True, dir_okay=False),
+              help='Job file written by `submit`')
+@click.option('-o', '--output', 'output_dir', default='./acords',
+              help='Output directory (default: ./acords)')
+@click.option('--wait', is_flag=True,
+              help='Poll until the job finishes')
+def collect(job_file: str, output_dir: str, wait: bool):
+    """
+    Save the results of a finished batch job.
+
+    Example:
+        python bin/acord_batch.py collect --job-file acords/acord-20250101-120000-job.json
+    """
+    with open(job_file, 'rb') as f:
+        job = orjson.loads(f.read())
+
+    bedrock = boto3.client('bedrock')
+    try:
+        while True:
+            status = bedrock.get_model_invocation_job(jobIdentifier=job["job_arn"])["status"]
+            if status in FINISHED_STATUSES or status in FAILED_STATUSES or not wait:
+                break
+            click.echo(f"⏳ Job status: {status}")
+            time.sleep(POLL_INTERVAL_SECONDS)
+    except ClientError as e:
+        raise click.ClickException(f"AWS error checking batch job: {str(e)}")
+
+    if status in FAILED_STATUSES:
+        raise click.ClickException(f"Batch job {status.lower()}: {job['job_arn']}")
+    if status not in FINISHED_STATUSES:
+        raise click.ClickException(f"Batch job is still {status}; try again later or pass --wait")
+
+    os.makedirs(output_dir, exist_ok=True)
+    try:
+        summary = collect_job(job, output_dir)
+    except ClientError as e:
+        raise click.ClickException(f"AWS error reading batch output: {str(e)}")
+
+    click.echo(f"🎉 Batch job {status.lower()}!")
+    click.echo(f"   🎯 Extracted: {summary['success']}")
+    click.echo(f"   ⚠️ Unparsed replies: {summary['partial_success']}")
+    click.echo(f"   ❌ Failed records: {summary['failed']}")
+    click.echo(f"   📁 Output directory: {output_dir}")
+
+
+if __name__ == '__main__':
+    cli()
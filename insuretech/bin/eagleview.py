@@ -1,11 +1,55 @@
 import os
+import time
 import base64
+from concurrent.futures import ThreadPoolExecutor
 import requests
 import json
+import orjson
 from urllib.parse import quote
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# One keep-alive session for every call so the token, discovery and tile
+# requests reuse TLS connections instead of handshaking per request.
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=8,
+    pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504],
+                      raise_on_status=False),
+))
+
+TILE_CHUNK_SIZE = 64 * 1024
+
+TOKEN_CACHE_PATH = os.path.expanduser("~/.cache/eagleview/token.json")
+# Refresh this many seconds before the token actually expires
+TOKEN_EXPIRY_MARGIN = 60
+
+def load_cached_token(client_id):
+    """Return the cached token for client_id if it is still valid, else None"""
+    try:
+        with open(TOKEN_CACHE_PATH, 'rb') as f:
+            cached = orjson.loads(f.read())
+    except (OSError, orjson.JSONDecodeError):
+        return None
+
+    if cached.get('client_id') != client_id or time.time() >= cached.get('expires_at', 0) - TOKEN_EXPIRY_MARGIN:
+        return None
+    return cached
+
+def save_cached_token(client_id, token_data):
+    """Write the token to the cache file atomically, readable only by the current user"""
+    cached = dict(token_data, client_id=client_id,
+                  expires_at=time.time() + int(token_data.get('expires_in', 0)))
+    os.makedirs(os.path.dirname(TOKEN_CACHE_PATH), exist_ok=True)
+    tmp_path = f"{TOKEN_CACHE_PATH}.{os.getpid()}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(orjson.dumps(cached))
+    os.replace(tmp_path, TOKEN_CACHE_PATH)
 
 def get_eagleview_token():
-    """Get EagleView OAuth token using client credentials"""
+    """Get EagleView OAuth token using client credentials, reusing the on-disk token until it expires"""
 
     client_id = os.environ.get('EAGLEVIEW_CLIENT_ID')
     client_secret = os.environ.get('EAGLEVIEW_CLIENT_SECRET')
@@ -13,6 +57,11 @@ def get_eagleview_token():
     if not client_id or not client_secret:
         raise ValueError("EAGLEVIEW_CLIENT_ID and EAGLEVIEW_CLIENT_SECRET environment variables are required")
 
+    cached = load_cached_token(client_id)
+    if cached:
+        print(f"✓ Using cached token (expires in {int(cached['expires_at'] - time.time())} seconds)")
+        return cached
+
     credentials = f"{client_id}:{client_secret}"
     encoded_credentials = base64.b64encode(credentials.encode()).decode()
 
@@ -27,11 +76,16 @@ def get_eagleview_token():
 
     print(f"Requesting token from {url}...")
 
-    response = requests.post(url, headers=headers, data=data, timeout=10)
+    response = SESSION.post(url, headers=headers, data=data, timeout=10)
     response.raise_for_status()
 
     token_data = response.json()
 
+    try:
+        save_cached_token(client_id, token_data)
+    except OSError as e:
+        print(f"Warning: could not cache token: {e}")
+
     print(f"✓ Token received successfully")
     print(f"  Token Type: {token_data.get('token_type')}")
     print(f"  Expires In: {token_data.get('expires_in')} seconds")
@@ -73,7 +127,7 @@ def discover_images(access_token, lat, lng):
     payload = {
         "polygon": {
             "geojson": {
-                "value": json.dumps(geojson_obj),
+                "value": orjson.dumps(geojson_obj).decode(),
                 "epsg": "EPSG:4326"
             }
         },
@@ -105,9 +159,10 @@ def discover_images(access_token, lat, lng):
     }
 
     print(f"\nDiscovering images for location ({lat}, {lng})...")
-    print(f"Payload: {json.dumps(payload, indent=2)}")
+    if os.environ.get("EAGLEVIEW_DEBUG"):
+        print(f"Payload: {json.dumps(payload, indent=2)}")
 
-    response = requests.post(url, headers=headers, json=payload, timeout=30)
+    response = SESSION.post(url, headers=headers, json=payload, timeout=30)
 
     if response.status_code != 200:
         print(f"Error response: {response.text}")
@@ -135,15 +190,16 @@ def fetch_image_tile(access_token, image_urn, z, x, y, output_path):
 
     print(f"\nFetching tile for URN: {image_urn}, z={z}, x={x}, y={y}...")
 
-    response = requests.get(url, headers=headers, params=params, timeout=30)
+    # Stream the tile to disk in chunks rather than buffering the whole image
+    with SESSION.get(url, headers=headers, params=params, timeout=30, stream=True) as response:
+        if response.status_code != 200:
+            print(f"Error response: {response.text}")
 
-    if response.status_code != 200:
-        print(f"Error response: {response.text}")
+        response.raise_for_status()
 
-    response.raise_for_status()
-
-    with open(output_path, 'wb') as f:
-        f.write(response.content)
+        with open(output_path, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=TILE_CHUNK_SIZE):
+                f.write(chunk)
 
     print(f"✓ Tile saved to {output_path}")
     return output_path
@@ -172,6 +228,9 @@ if __name__ == "__main__":
             print("Downloading Images")
             print("="*50)
 
+            # (label, urn, z, x, y, output_path) for the ortho and each oblique
+            tiles = []
+
             orthos = first_capture.get('orthos', {})
             if orthos and orthos.get('images'):
                 ortho_image = orthos['images'][0]
@@ -182,9 +241,7 @@ if __name__ == "__main__":
                     z = tilebox.get('z', 22)
                     x = tilebox.get('left', 0)
                     y = tilebox.get('top', 0)
-
-                    print(f"\n📸 Ortho Image:")
-                    fetch_image_tile(access_token, image_urn, z, x, y, f"ortho_z{z}_x{x}_y{y}.png")
+                    tiles.append(("Ortho", image_urn, z, x, y, f"ortho_z{z}_x{x}_y{y}.png"))
 
             obliques = first_capture.get('obliques', {})
             for direction in ['north', 'east', 'south', 'west']:
@@ -198,9 +255,18 @@ if __name__ == "__main__":
                         z = tilebox.get('z', 18)
                         x = tilebox.get('left', 0)
                         y = tilebox.get('top', 0)
-
-                        print(f"\n📸 Oblique {direction.capitalize()} Image:")
-                        fetch_image_tile(access_token, image_urn, z, x, y, f"oblique_{direction}_z{z}_x{x}_y{y}.png")
+                        tiles.append((f"Oblique {direction.capitalize()}", image_urn, z, x, y,
+                                      f"oblique_{direction}_z{z}_x{x}_y{y}.png"))
+
+            def fetch(tile):
+                label, image_urn, z, x, y, output_path = tile
+                print(f"\n📸 {label} Image:")
+                return fetch_image_tile(access_token, image_urn, z, x, y, output_path)
+
+            # The downloads are independent, so fetch them concurrently over the shared session
+            if tiles:
+                with ThreadPoolExecutor(max_workers=len(tiles)) as executor:
+                    list(executor.map(fetch, tiles))
 
     except Exception as e:
         print(f"✗ Error: {str(e)}")
@@ -2,18 +2,99 @@
 """
 Test script for ACORD Processing API endpoints
 
-Tests the /upload and /progress endpoints of the deployed Modal app.
+Tests the /upload, /batch-upload and /progress endpoints of the deployed Modal app.
 """
 
-import requests
-import json
+import asyncio
+import orjson
+import os
+import random
 import time
 import sys
 from pathlib import Path
 import argparse
+from typing import TYPE_CHECKING
 
-def test_endpoints(base_url: str, pdf_file: str, verbose: bool = False, write_json: bool = False, token: str = None):
+if TYPE_CHECKING:  # only for annotations; the real import is deferred to first use
+    import httpx
+
+try:  # httpx only decodes zstd replies when zstandard is installed
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Only advertise encodings httpx can decode, or .json() gets compressed bytes
+ACCEPT_ENCODING = "zstd, gzip" if zstandard is not None else "gzip"
+
+# Delay between polls when the server answers without waiting (no long-poll
+# support, or a dropped connection): 0.5s doubling up to 10s, with +/-20% jitter
+POLL_DELAY_BASE = 0.5
+POLL_DELAY_CAP = 10
+
+def poll_delay(attempt: int) -> float:
+    """Jittered exponential backoff for the given number of unproductive polls"""
+    return min(POLL_DELAY_CAP, POLL_DELAY_BASE * 2 ** attempt) * random.uniform(0.8, 1.2)
+
+def make_transport() -> "httpx.AsyncHTTPTransport":
+    """One HTTP/2 connection multiplexes the health check, upload and every
+    progress poll; retries cover connection failures only."""
+    import httpx
+
+    return httpx.AsyncHTTPTransport(
+        http2=True,
+        limits=httpx.Limits(max_keepalive_connections=4),
+        retries=3,
+    )
+
+def report_result(result: dict, pdf_path: Path, verbose: bool, write_json: bool):
+    """Print a completed job's result and optionally write it to <pdf name>.json"""
+    if result:
+        acord_type = result.get('acord_type', 'Unknown')
+        text_length = result.get('text_length', 0)
+        extracted_data = result.get('extracted_data')
+
+        print(f"   📄 ACORD Type: {acord_type}")
+        print(f"   📊 OCR Text Length: {text_length} characters")
+
+        if extracted_data:
+            print("   🎯 Structured data extracted successfully")
+            if verbose:
+                print("   📋 Extracted Data Preview:")
+                # Show first few keys
+                preview_keys = list(extracted_data.keys())[:5]
+                for key in preview_keys:
+                    value = extracted_data[key]
+                    if isinstance(value, str) and len(value) > 50:
+                        value = value[:50] + "..."
+                    print(f"      {key}: {value}")
+                if len(extracted_data) > 5:
+                    print(f"      ... and {len(extracted_data) - 5} more fields")
+        else:
+            print("   ⚠️ Raw response available (JSON parsing may have failed)")
+
+    # Write JSON to disk if requested
+    if write_json and result:
+        try:
+            output_filename = f"{pdf_path.name}.json"
+
+            # Serialize once and hand the bytes straight to write(2), skipping the file object's buffer
+            data = memoryview(orjson.dumps(result, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+            fd = os.open(output_filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                while data:
+                    data = data[os.write(fd, data):]
+            finally:
+                os.close(fd)
+
+            print(f"   💾 JSON data written to: {output_filename}")
+
+        except Exception as write_error:
+            print(f"   ❌ Failed to write JSON file: {write_error}")
+
+async def test_endpoints(base_url: str, pdf_file: str, verbose: bool = False, write_json: bool = False, token: str = None):
     """Test the ACORD processing API endpoints"""
+    # Imported here so --help and argument errors return without loading httpx
+    import httpx
 
     print(f"🔸 Testing ACORD Processing API at: {base_url}")
     print(f"🔸 Using PDF file: {pdf_file}")
@@ -29,135 +110,255 @@ def test_endpoints(base_url: str, pdf_file: str, verbose: bool = False, write_js
         return False
 
     # Setup headers
-    headers = {}
+    headers = {"Accept-Encoding": ACCEPT_ENCODING}
     if token:
         headers["Authorization"] = f"Bearer {token}"
 
+    transport = make_transport()
+
     try:
-        # Test health endpoint first
-        print("\n📋 Testing health endpoint...")
-        health_response = requests.get(f"{base_url}/health", timeout=10)
-        if health_response.status_code == 200:
-            print("✅ Health check passed")
-            if verbose:
-                print(f"   Response: {health_response.json()}")
-        else:
-            print(f"⚠️ Health check failed: {health_response.status_code}")
+        async with httpx.AsyncClient(base_url=base_url, headers=headers, timeout=35, transport=transport) as client:
+            # Health check and upload run concurrently so a cold container
+            # only pays its start-up latency once
+            print("\n📋 Testing health endpoint and 📤 uploading PDF file...")
+
+            with open(pdf_path, 'rb') as f:
+                files = {'file': (pdf_path.name, f, 'application/pdf')}
+                health_response, upload_response = await asyncio.gather(
+                    client.get("/health", timeout=10),
+                    client.post("/upload", files=files, timeout=30),
+                )
+
+            if health_response.status_code == 200:
+                print("✅ Health check passed")
+                if verbose:
+                    print(f"   Response: {health_response.json()}")
+            else:
+                print(f"⚠️ Health check failed: {health_response.status_code}")
+
+            if upload_response.status_code != 200:
+                print(f"❌ Upload failed: {upload_response.status_code}")
+                print(f"   Response: {upload_response.text}")
+                return False
+
+            upload_data = upload_response.json()
+            job_id = upload_data.get('job_id')
+
+            print(f"✅ Upload successful!")
+            print(f"   Job ID: {job_id}")
+            print(f"   Status: {upload_data.get('status')}")
+            print(f"   Message: {upload_data.get('message')}")
+
+            if not job_id:
+                print("❌ No job ID returned")
+                return False
+
+            # Poll progress endpoint
+            print(f"\n📊 Monitoring progress for job: {job_id}")
+
+            max_wait_time = 300  # 5 minutes max
+            long_poll_wait = 30  # Server holds each request open until progress changes
+            idle_polls = 0       # Consecutive polls that brought no new progress
+            last_timestamp = 0
+            last_etag = None
+            start_time = time.time()
+
+            while True:
+                elapsed = time.time() - start_time
+                if elapsed > max_wait_time:
+                    print(f"⏰ Timeout after {max_wait_time} seconds")
+                    break
 
-        # Upload PDF file
-        print("\n📤 Uploading PDF file...")
+                try:
+                    wait = min(long_poll_wait, max(max_wait_time - elapsed, 0))
+                    progress_response = await client.get(
+                        f"/progress/{job_id}",
+                        params={"wait": wait, "since": last_timestamp},
+                        headers={"If-None-Match": last_etag} if last_etag else None,
+                        timeout=wait + 5,
+                    )
+
+                    # No change within the wait window (304 when our ETag still
+                    # matches); reconnect immediately without parsing a body
+                    if progress_response.status_code in (204, 304):
+                        continue
+
+                    if progress_response.status_code != 200:
+                        print(f"❌ Progress check failed: {progress_response.status_code}")
+                        break
+
+                    progress_data = progress_response.json()
+
+                    # An immediate reply with no new progress means the server did not
+                    # hold the request; back off instead of spinning
+                    if progress_data.get('timestamp', 0) <= last_timestamp:
+                        await asyncio.sleep(poll_delay(idle_polls))
+                        idle_polls += 1
+                        continue
+
+                    idle_polls = 0
+                    last_timestamp = progress_data.get('timestamp', last_timestamp)
+                    last_etag = progress_response.headers.get('ETag')
+                    status = progress_data.get('status')
+                    stage = progress_data.get('stage')
+                    progress_pct = progress_data.get('progress', 0)
+                    message = progress_data.get('message', '')
+
+                    print(f"   📈 [{elapsed:.1f}s] {status.upper()} | {stage} | {progress_pct}% | {message}")
+
+                    if verbose:
+                        print(f"      Full response: {orjson.dumps(progress_data, option=orjson.OPT_INDENT_2).decode()}")
+
+                    if status == 'completed':
+                        print("🎉 Processing completed successfully!")
+
+                        result = progress_data.get('result', {})
+                        report_result(result, pdf_path, verbose, write_json)
+
+                        return result
+
+                    elif status == 'failed':
+                        print("❌ Processing failed!")
+                        error = progress_data.get('error', 'Unknown error')
+                        print(f"   Error: {error}")
+                        return False
+
+                except (httpx.NetworkError, httpx.RemoteProtocolError) as e:
+                    delay = poll_delay(idle_polls)
+                    idle_polls += 1
+                    print(f"⚠️ Progress connection dropped: {e}; retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+                except httpx.HTTPError as e:
+                    print(f"❌ Progress request failed: {e}")
+                    break
 
-        with open(pdf_path, 'rb') as f:
-            files = {'file': (pdf_path.name, f, 'application/pdf')}
-            upload_response = requests.post(f"{base_url}/upload", files=files, headers=headers, timeout=30)
+            print("⚠️ Processing did not complete within timeout")
+            return None
 
-        if upload_response.status_code != 200:
-            print(f"❌ Upload failed: {upload_response.status_code}")
-            print(f"   Response: {upload_response.text}")
-            return False
+    except httpx.HTTPError as e:
+        print(f"❌ Request failed: {e}")
+        return None
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        return None
 
-        upload_data = upload_response.json()
-        job_id = upload_data.get('job_id')
+async def test_batch_endpoints(base_url: str, pdf_files: list, verbose: bool = False, write_json: bool = False,
+                               token: str = None):
+    """Upload several PDFs in one /batch-upload request and long-poll all their jobs together"""
+    # Imported here so --help and argument errors return without loading httpx
+    import httpx
 
-        print(f"✅ Upload successful!")
-        print(f"   Job ID: {job_id}")
-        print(f"   Status: {upload_data.get('status')}")
-        print(f"   Message: {upload_data.get('message')}")
+    print(f"🔸 Testing ACORD Processing API at: {base_url}")
+    print(f"🔸 Using {len(pdf_files)} PDF files")
+    if token:
+        print(f"🔸 Using Bearer token authentication")
 
-        if not job_id:
-            print("❌ No job ID returned")
+    pdf_paths = [Path(pdf_file) for pdf_file in pdf_files]
+    for pdf_path in pdf_paths:
+        if not pdf_path.exists():
+            print(f"❌ PDF file not found: {pdf_path}")
             return False
 
-        # Poll progress endpoint
-        print(f"\n📊 Monitoring progress for job: {job_id}")
-
-        max_wait_time = 300  # 5 minutes max
-        poll_interval = 5    # Check every 5 seconds
-        start_time = time.time()
-
-        while True:
-            elapsed = time.time() - start_time
-            if elapsed > max_wait_time:
-                print(f"⏰ Timeout after {max_wait_time} seconds")
-                break
+    headers = {"Accept-Encoding": ACCEPT_ENCODING}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
 
+    try:
+        async with httpx.AsyncClient(base_url=base_url, headers=headers, timeout=35,
+                                     transport=make_transport()) as client:
+            print(f"\n📤 Uploading {len(pdf_paths)} PDF files...")
+            handles = [open(pdf_path, 'rb') for pdf_path in pdf_paths]
             try:
-                progress_response = requests.get(f"{base_url}/progress/{job_id}", headers=headers, timeout=10)
-
+                files = [('files', (pdf_path.name, f, 'application/pdf')) for pdf_path, f in zip(pdf_paths, handles)]
+                upload_response = await client.post("/batch-upload", files=files, timeout=120)
+            finally:
+                for f in handles:
+                    f.close()
+
+            if upload_response.status_code != 200:
+                print(f"❌ Batch upload failed: {upload_response.status_code}")
+                print(f"   Response: {upload_response.text}")
+                return False
+
+            # Job ids come back in upload order
+            job_ids = upload_response.json().get('job_ids', [])
+            if len(job_ids) != len(pdf_paths):
+                print(f"❌ Expected {len(pdf_paths)} job IDs, got {len(job_ids)}")
+                return False
+
+            jobs = dict(zip(job_ids, pdf_paths))
+            print(f"✅ Batch upload successful!")
+            for job_id, pdf_path in jobs.items():
+                print(f"   {pdf_path.name}: {job_id}")
+
+            print(f"\n📊 Monitoring progress for {len(jobs)} jobs")
+
+            max_wait_time = 300  # 5 minutes max
+            long_poll_wait = 30  # Server holds each request open until any job changes
+            idle_polls = 0
+            last_timestamps = dict.fromkeys(jobs, 0)
+            results = {}
+            start_time = time.time()
+
+            while len(results) < len(jobs):
+                elapsed = time.time() - start_time
+                if elapsed > max_wait_time:
+                    print(f"⏰ Timeout after {max_wait_time} seconds")
+                    return None
+
+                try:
+                    wait = min(long_poll_wait, max(max_wait_time - elapsed, 0))
+                    # Progress timestamps come from one clock, so any new update on a
+                    # pending job is newer than everything seen so far
+                    pending = [job_id for job_id in jobs if job_id not in results]
+                    progress_response = await client.get(
+                        "/progress",
+                        params={"ids": ",".join(pending), "wait": wait, "since": max(last_timestamps.values())},
+                        timeout=wait + 5,
+                    )
+                except (httpx.NetworkError, httpx.RemoteProtocolError) as e:
+                    delay = poll_delay(idle_polls)
+                    idle_polls += 1
+                    print(f"⚠️ Progress connection dropped: {e}; retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+                    continue
+
+                if progress_response.status_code == 204:
+                    continue
                 if progress_response.status_code != 200:
                     print(f"❌ Progress check failed: {progress_response.status_code}")
-                    break
-
-                progress_data = progress_response.json()
-                status = progress_data.get('status')
-                stage = progress_data.get('stage')
-                progress_pct = progress_data.get('progress', 0)
-                message = progress_data.get('message', '')
-
-                print(f"   📈 [{elapsed:.1f}s] {status.upper()} | {stage} | {progress_pct}% | {message}")
-
-                if verbose:
-                    print(f"      Full response: {json.dumps(progress_data, indent=2)}")
-
-                if status == 'completed':
-                    print("🎉 Processing completed successfully!")
-
-                    result = progress_data.get('result', {})
-                    if result:
-                        acord_type = result.get('acord_type', 'Unknown')
-                        text_length = result.get('text_length', 0)
-                        extracted_data = result.get('extracted_data')
-
-                        print(f"   📄 ACORD Type: {acord_type}")
-                        print(f"   📊 OCR Text Length: {text_length} characters")
-
-                        if extracted_data:
-                            print("   🎯 Structured data extracted successfully")
-                            if verbose:
-                                print("   📋 Extracted Data Preview:")
-                                # Show first few keys
-                                preview_keys = list(extracted_data.keys())[:5]
-                                for key in preview_keys:
-                                    value = extracted_data[key]
-                                    if isinstance(value, str) and len(value) > 50:
-                                        value = value[:50] + "..."
-                                    print(f"      {key}: {value}")
-                                if len(extracted_data) > 5:
-                                    print(f"      ... and {len(extracted_data) - 5} more fields")
-                        else:
-                            print("   ⚠️ Raw response available (JSON parsing may have failed)")
-
-                    # Write JSON to disk if requested
-                    if write_json and result:
-                        try:
-                            output_filename = f"{pdf_path.name}.json"
-
-                            with open(output_filename, 'w', encoding='utf-8') as f:
-                                json.dump(result, f, indent=2, ensure_ascii=False)
-
-                            print(f"   💾 JSON data written to: {output_filename}")
-
-                        except Exception as write_error:
-                            print(f"   ❌ Failed to write JSON file: {write_error}")
-
-                    return result
-
-                elif status == 'failed':
-                    print("❌ Processing failed!")
-                    error = progress_data.get('error', 'Unknown error')
-                    print(f"   Error: {error}")
                     return False
 
-                time.sleep(poll_interval)
-
-            except requests.exceptions.RequestException as e:
-                print(f"❌ Progress request failed: {e}")
-                break
-
-        print("⚠️ Processing did not complete within timeout")
-        return None
-
-    except requests.exceptions.RequestException as e:
+                updated = False
+                for job_id, progress_data in progress_response.json().get('jobs', {}).items():
+                    if job_id in results or progress_data.get('timestamp', 0) <= last_timestamps[job_id]:
+                        continue
+                    updated = True
+                    last_timestamps[job_id] = progress_data.get('timestamp', 0)
+                    status = progress_data.get('status')
+                    print(f"   📈 [{elapsed:.1f}s] {jobs[job_id].name}: {status.upper()} | {progress_data.get('stage')} | "
+                          f"{progress_data.get('progress', 0)}% | {progress_data.get('message', '')}")
+
+                    if status == 'completed':
+                        print(f"🎉 {jobs[job_id].name} completed successfully!")
+                        results[job_id] = progress_data.get('result', {})
+                        report_result(results[job_id], jobs[job_id], verbose, write_json)
+                    elif status == 'failed':
+                        print(f"❌ {jobs[job_id].name} failed: {progress_data.get('error', 'Unknown error')}")
+                        results[job_id] = None
+
+                # Same backoff as test_endpoints when the server did not hold the request
+                if updated:
+                    idle_polls = 0
+                else:
+                    await asyncio.sleep(poll_delay(idle_polls))
+                    idle_polls += 1
+
+            if not all(results.values()):
+                return False
+            return list(results.values())
+
+    except httpx.HTTPError as e:
         print(f"❌ Request failed: {e}")
         return None
     except Exception as e:
@@ -167,7 +368,8 @@ def test_endpoints(base_url: str, pdf_file: str, verbose: bool = False, write_js
 def main():
     parser = argparse.ArgumentParser(description="Test ACORD Processing API")
     parser.add_argument('--url', '-u', required=True, help='Base URL of the API (e.g., https://your-app.modal.run)')
-    parser.add_argument('--file', '-f', required=True, help='Path to PDF file to test')
+    parser.add_argument('--file', '-f', required=True, nargs='+',
+                        help='Path to PDF file to test; several files are sent in one /batch-upload request')
     parser.add_argument('--verbose', '-v', action='store_true', help='Verbose output')
     parser.add_argument('--write', '-w', action='store_true', help='Write JSON result to disk as filename.pdf.json')
     parser.add_argument('--token', '-t', help='Bearer token for authentication')
@@ -177,7 +379,10 @@ def main():
     # Clean up URL
     base_url = args.url.rstrip('/')
 
-    result = test_endpoints(base_url, args.file, args.verbose, args.write, args.token)
+    if len(args.file) > 1:
+        result = asyncio.run(test_batch_endpoints(base_url, args.file, args.verbose, args.write, args.token))
+    else:
+        result = asyncio.run(test_endpoints(base_url, args.file[0], args.verbose, args.write, args.token))
 
     if result:
         print("\n🎉 All tests passed!")
@@ -1,7 +1,15 @@
 import argparse
 import json
 import math
-from pmtiles.reader import Reader, MmapSource
+import os
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+
+# numpy and pmtiles are imported in the functions that use them so that
+# --help and argument errors return without loading either
+
+# Reads kept in flight by get_pmtiles_tiles_batch
+BATCH_READ_DEPTH = 32
 
 def deg2num(lat_deg, lon_deg, zoom):
     """Convert lat/lng to tile coordinates"""
@@ -19,6 +27,39 @@ def num2deg(x, y, zoom):
     lat_deg = math.degrees(lat_rad)
     return (lat_deg, lon_deg)
 
+def deg2num_vec(lat_deg, lon_deg, zoom):
+    """Vectorized deg2num: arrays of lat/lng to int32 arrays of tile x, y (see tiles.latlng_to_tiles)"""
+    import numpy as np
+    from tiles import latlng_to_tiles
+
+    latlng = np.column_stack((np.ravel(lat_deg), np.ravel(lon_deg))).astype(np.float64)
+    tiles = latlng_to_tiles(latlng, zoom)
+    return tiles[:, 0], tiles[:, 1]
+
+def num2deg_vec(x, y, zoom):
+    """Vectorized num2deg: arrays of tile x, y to arrays of lat/lng (tile top-left corner)"""
+    import numpy as np
+
+    n = 2.0 ** zoom
+    lon_deg = np.asarray(x) / n * 360.0 - 180.0
+    lat_deg = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * np.asarray(y) / n))))
+    return lat_deg, lon_deg
+
+def tile_bounds_vec(x, y, zoom):
+    """Vectorized tile_bounds: same keys, with an array per key"""
+    import numpy as np
+
+    north, west = num2deg_vec(x, y, zoom)
+    south, east = num2deg_vec(np.asarray(x) + 1, np.asarray(y) + 1, zoom)
+    return {
+        'north': north,
+        'south': south,
+        'east': east,
+        'west': west,
+        'center_lat': (north + south) / 2,
+        'center_lng': (east + west) / 2
+    }
+
 def tile_bounds(x, y, zoom):
     """Get the lat/lng bounds of a tile"""
     # Top-left corner
@@ -36,6 +77,8 @@ def tile_bounds(x, y, zoom):
 
 def get_pmtiles_metadata(file_path):
     """Reads and prints the header and metadata from a PMTiles file."""
+    from pmtiles.reader import Reader, MmapSource
+
     try:
         with open(file_path, "rb") as f:
             reader = Reader(MmapSource(f))
@@ -45,13 +88,11 @@ def get_pmtiles_metadata(file_path):
             print(f"Reading PMTiles file: {file_path}")
             print("\n--- PMTiles Header ---")
             
-            # Convert any non-serializable objects to strings
-            serializable_header = {}
-            for key, value in header.items():
-                if hasattr(value, 'name'):  # Enum objects have a 'name' attribute
-                    serializable_header[key] = value.name
-                else:
-                    serializable_header[key] = value
+            # Convert enum values (tile type, compression) to their names
+            serializable_header = {
+                key: value.name if isinstance(value, Enum) else value
+                for key, value in header.items()
+            }
             
             print(json.dumps(serializable_header, indent=4))
             print("\n--- PMTiles Metadata ---")
@@ -62,11 +103,54 @@ def get_pmtiles_metadata(file_path):
     except Exception as e:
         print(f"An error occurred while reading the file: {e}")
 
+# Tile magic bytes keyed by prefix; the prefixes never overlap, so the
+# longest-first lookup in detect_tile_format needs no ordering beyond length
+TILE_MAGIC = {
+    b'\x89PNG': "PNG",
+    b'\x1f\x8b': "gzipped (likely MVT)",
+    b'\xff\xd8': "JPEG",
+    b'\x08': "MVT (Mapbox Vector Tile)",
+    b'\x12': "MVT (Mapbox Vector Tile)",
+    b'<': "SVG",
+}
+
+def detect_tile_format(tile_head):
+    """Name the tile format from its first bytes"""
+    return TILE_MAGIC.get(tile_head[:4]) or TILE_MAGIC.get(tile_head[:2]) or TILE_MAGIC.get(tile_head[:1], "unknown")
+
+def copy_range_to_file(src_fd, offset, length, output_file):
+    """Copy length bytes at offset of src_fd into output_file in the kernel.
+
+    Uses copy_file_range (a reflink on XFS/Btrfs) and falls back to a buffered
+    copy where the syscall is unavailable or refused (e.g. across filesystems
+    on older kernels).
+    """
+    with open(output_file, 'wb') as out_f:
+        copied = 0
+        if hasattr(os, "copy_file_range"):
+            try:
+                while copied < length:
+                    n = os.copy_file_range(src_fd, out_f.fileno(), length - copied, offset_src=offset + copied)
+                    if n == 0:
+                        break
+                    copied += n
+            except OSError:
+                pass
+        if copied < length:
+            out_f.write(os.pread(src_fd, length - copied, offset + copied))
+
 def get_pmtiles_tile(file_path, z, x, y, output_file=None):
-    """Reads a specific tile from a PMTiles file."""
+    """Reads a specific tile from a PMTiles file and returns its bytes.
+
+    With output_file, the tile is also copied there in-kernel.
+    """
+    from pmtiles.reader import MmapSource
+    from pmtiles.tile import deserialize_header
+
     try:
         with open(file_path, "rb") as f:
-            reader = Reader(MmapSource(f))
+            get_bytes = MmapSource(f)
+            header = deserialize_header(get_bytes(0, 127))
             
             print(f"Reading tile {z}/{x}/{y} from PMTiles file: {file_path}")
             
@@ -79,42 +163,33 @@ def get_pmtiles_tile(file_path, z, x, y, output_file=None):
             print(f"  West: {bounds['west']:.6f}")
             print(f"  Center: {bounds['center_lat']:.6f}, {bounds['center_lng']:.6f}")
             
-            # Get the tile data
-            tile_data = reader.get(z, x, y)
+            # Locate the tile data
+            location = locate_tile(get_bytes, header, z, x, y, {})
             
-            if tile_data is None:
+            if location is None:
                 print(f"\n✗ Tile {z}/{x}/{y} not found in the PMTiles file.")
                 return None
             
+            tile_offset, tile_length = location
             print(f"\n✓ Successfully retrieved tile {z}/{x}/{y}")
-            print(f"Tile size: {len(tile_data)} bytes")
+            print(f"Tile size: {tile_length} bytes")
             
             # Determine tile format based on magic bytes
-            tile_format = "unknown"
-            if tile_data.startswith(b'\x1f\x8b'):
-                tile_format = "gzipped (likely MVT)"
-            elif tile_data.startswith(b'\x08') or tile_data.startswith(b'\x12'):
-                tile_format = "MVT (Mapbox Vector Tile)"
-            elif tile_data.startswith(b'\x89PNG'):
-                tile_format = "PNG"
-            elif tile_data.startswith(b'\xff\xd8'):
-                tile_format = "JPEG"
-            elif tile_data.startswith(b'<'):
-                tile_format = "SVG"
+            tile_head = get_bytes(tile_offset, min(tile_length, 16))
+            tile_format = detect_tile_format(tile_head)
             
             print(f"Tile format: {tile_format}")
             
             # Show first few bytes
-            hex_preview = ' '.join(f'{b:02x}' for b in tile_data[:16])
+            hex_preview = tile_head.hex(' ')
             print(f"First 16 bytes: {hex_preview}")
             
             # Save tile to file if output path provided
             if output_file:
-                with open(output_file, 'wb') as out_f:
-                    out_f.write(tile_data)
+                copy_range_to_file(f.fileno(), tile_offset, tile_length, output_file)
                 print(f"Tile saved to: {output_file}")
             
-            return tile_data
+            return get_bytes(tile_offset, tile_length)
 
     except FileNotFoundError:
         print(f"Error: The file '{file_path}' was not found.")
@@ -123,6 +198,60 @@ def get_pmtiles_tile(file_path, z, x, y, output_file=None):
         print(f"An error occurred while reading the tile: {e}")
         return None
 
+def locate_tile(get_bytes, header, z, x, y, directories):
+    """Return the absolute (offset, length) of a tile's bytes, or None if absent.
+
+    ``directories`` caches deserialized directories by (offset, length) so a
+    batch walks each root/leaf directory once.
+    """
+    from pmtiles.tile import deserialize_directory, find_tile, zxy_to_tileid
+
+    tile_id = zxy_to_tileid(z, x, y)
+    dir_offset, dir_length = header["root_offset"], header["root_length"]
+    for _ in range(4):  # root + up to three leaf levels
+        key = (dir_offset, dir_length)
+        if key not in directories:
+            directories[key] = deserialize_directory(get_bytes(dir_offset, dir_length))
+        entry = find_tile(directories[key], tile_id)
+        if entry is None:
+            return None
+        if entry.run_length == 0:
+            dir_offset = header["leaf_directory_offset"] + entry.offset
+            dir_length = entry.length
+        else:
+            return header["tile_data_offset"] + entry.offset, entry.length
+    return None
+
+def get_pmtiles_tiles_batch(file_path, coords, max_in_flight=BATCH_READ_DEPTH):
+    """Read many tiles at once; returns {(z, x, y): bytes or None}.
+
+    Every tile's byte range is resolved first, then the reads are issued in
+    file-offset order with up to ``max_in_flight`` outstanding preads (which
+    release the GIL), so the disk sees one deep, mostly sequential queue
+    instead of one page fault at a time.
+    """
+    from pmtiles.reader import MmapSource
+    from pmtiles.tile import deserialize_header
+
+    with open(file_path, "rb") as f:
+        get_bytes = MmapSource(f)
+        header = deserialize_header(get_bytes(0, 127))
+        directories = {}
+
+        locations = {}
+        for z, x, y in coords:
+            location = locate_tile(get_bytes, header, z, x, y, directories)
+            if location is not None:
+                locations[(z, x, y)] = location
+
+        fd = f.fileno()
+        ordered = sorted(locations, key=locations.get)
+        with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+            blobs = executor.map(lambda coord: os.pread(fd, locations[coord][1], locations[coord][0]), ordered)
+            tiles = dict(zip(ordered, blobs))
+
+    return {tuple(coord): tiles.get(tuple(coord)) for coord in coords}
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
         description="Read PMTiles metadata or extract specific tiles.",
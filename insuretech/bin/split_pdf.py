@@ -4,6 +4,9 @@
 from __future__ import annotations
 
 import argparse
+import mmap
+import shutil
+import subprocess
 import sys
 from pathlib import Path
 from typing import Sequence
@@ -35,6 +38,29 @@ def parse_args(argv: Sequence[str]) -> argparse.Namespace:
     return parser.parse_args(argv)
 
 
+def load_pymupdf():
+    """Import PyMuPDF if available; it copies page ranges in C without pypdf's object model."""
+
+    try:
+        import fitz  # type: ignore
+
+        return fitz
+    except ImportError:
+        return None
+
+
+def qpdf_page_count(qpdf: str, input_path: Path) -> int:
+    """Ask qpdf for the number of pages in the document."""
+
+    completed = subprocess.run(
+        [qpdf, "--show-npages", str(input_path)],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return int(completed.stdout.strip())
+
+
 def load_pdf_backend():
     """Import a PDF backend, preferring pypdf but falling back to PyPDF2."""
 
@@ -49,10 +75,30 @@ def load_pdf_backend():
             return PdfReader, PdfWriter
         except ImportError as exc:  # pragma: no cover - runtime guard
             raise SystemExit(
-                "Install 'pypdf' or 'PyPDF2' to use this script."
+                "Install 'PyMuPDF', qpdf, 'pypdf' or 'PyPDF2' to use this script."
             ) from exc
 
 
+def clamp_end_page(start_page: int, end_page: int, total_pages: int) -> int | None:
+    """Return the end page trimmed to the document, or None if the range is unusable."""
+
+    if start_page > total_pages:
+        print(
+            f"Start page {start_page} is beyond the end of the document ({total_pages} pages)",
+            file=sys.stderr,
+        )
+        return None
+
+    if end_page > total_pages:
+        print(
+            f"End page {end_page} trimmed to {total_pages} (total pages)",
+            file=sys.stderr,
+        )
+        return total_pages
+
+    return end_page
+
+
 def main(argv: Sequence[str] | None = None) -> int:
     args = parse_args(argv if argv is not None else sys.argv[1:])
 
@@ -76,34 +122,56 @@ def main(argv: Sequence[str] | None = None) -> int:
         print("End page cannot be before start page", file=sys.stderr)
         return 1
 
-    PdfReader, PdfWriter = load_pdf_backend()
-
-    reader = PdfReader(str(input_path))
-    total_pages = len(reader.pages)
-
-    if start_page > total_pages:
-        print(
-            f"Start page {start_page} is beyond the end of the document ({total_pages} pages)",
-            file=sys.stderr,
-        )
-        return 1
-
-    if end_page > total_pages:
-        print(
-            f"End page {end_page} trimmed to {total_pages} (total pages)",
-            file=sys.stderr,
-        )
-        end_page = total_pages
-
-    writer = PdfWriter()
-
-    for page_number in range(start_page - 1, end_page):
-        writer.add_page(reader.pages[page_number])
-
     output_path = input_path.with_name(f"{input_path.stem}_output.pdf")
 
-    with output_path.open("wb") as output_file:
-        writer.write(output_file)
+    fitz = load_pymupdf()
+    if fitz is not None:
+        with fitz.open(str(input_path)) as src:
+            clamped = clamp_end_page(start_page, end_page, src.page_count)
+            if clamped is None:
+                return 1
+            end_page = clamped
+
+            # MuPDF copies only the objects the range references (0-based, inclusive)
+            with fitz.open() as dst:
+                dst.insert_pdf(src, from_page=start_page - 1, to_page=end_page - 1)
+                dst.save(str(output_path), garbage=1, deflate=True)
+    elif (qpdf := shutil.which("qpdf")) is not None:
+        clamped = clamp_end_page(start_page, end_page, qpdf_page_count(qpdf, input_path))
+        if clamped is None:
+            return 1
+        end_page = clamped
+
+        # qpdf rewrites the selected pages and xref table in C++ in one pass;
+        # exit status 3 means it succeeded with warnings
+        completed = subprocess.run(
+            [qpdf, "--empty", "--pages", str(input_path), f"{start_page}-{end_page}", "--", str(output_path)]
+        )
+        if completed.returncode not in (0, 3):
+            print(f"qpdf failed with exit status {completed.returncode}", file=sys.stderr)
+            return 1
+    else:
+        PdfReader, PdfWriter = load_pdf_backend()
+
+        # Given a path, pypdf reads the whole file into memory; a read-only
+        # mmap lets it fault in just the xref and the objects it touches
+        with input_path.open("rb") as input_file, mmap.mmap(
+            input_file.fileno(), 0, access=mmap.ACCESS_READ
+        ) as mapped:
+            reader = PdfReader(mapped)
+            clamped = clamp_end_page(start_page, end_page, len(reader.pages))
+            if clamped is None:
+                return 1
+            end_page = clamped
+
+            writer = PdfWriter()
+
+            for page_number in range(start_page - 1, end_page):
+                writer.add_page(reader.pages[page_number])
+
+            # Page objects resolve lazily, so write before the mmap closes
+            with output_path.open("wb") as output_file:
+                writer.write(output_file)
 
     print(f"Wrote {output_path} with pages {start_page}-{end_page}.")
     return 0
@@ -5,26 +5,58 @@ Test script for Roof Analysis API endpoints
 Tests the /save-image endpoint of the deployed Modal app.
 """
 
-import requests
-import json
 import sys
 import argparse
-import base64
-from PIL import Image, ImageDraw
-from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:  # only for annotations; the real import is deferred to first use
+    import requests
+
+
+def make_session(headers: dict, cache: bool = False) -> "requests.Session":
+    """Session that reuses one keep-alive connection for every call to the API
+
+    With ``cache``, GET responses (the health check) are kept in
+    ./.http_cache.sqlite for up to five minutes, or the server's Cache-Control
+    max-age. /save-image is never cached because it has side effects.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    if cache:
+        try:
+            from requests_cache import CachedSession
+        except ImportError:
+            raise SystemExit("Install 'requests-cache' to use --cache.")
+        session = CachedSession('.http_cache', backend='sqlite', cache_control=True, expire_after=300,
+                                allowable_methods=('GET',))
+    else:
+        session = requests.Session()
+    session.headers.update(headers)
+    session.mount("https://", HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=4,
+        max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504], raise_on_status=False),
+    ))
+    return session
+
+# 100x100 red PNG with a blue square inset 10px, pre-encoded so the script
+# does not need Pillow just to produce test bytes
+DUMMY_PNG_B64 = (
+    "iVBORw0KGgoAAAANSUhEUgAAAGQAAABkCAIAAAD/gAIDAAAAoUlEQVR42u3QQQkAAAgEsOtfWiv4EQQHS7BUwpACWbJkyZKFAlmyrmc9PJElS5YsWbJkyZIlS5YsWbJkyZIlS5YsWbJkyZIlS5"
+    "YsWbJkyZIlS5YsWbJkyZIlS5YsWbJkyZIlS5YsWbJkyZIlS5YsWbJkyZIlS5YsWbJkyZIlS5YsWbJkyZIlS5YsWbJkyZIlS5YsWdeykCVLlixZspAla18DjHLrK//owqEAAAAASUVORK5CYII="
+)
 
 def create_dummy_image() -> str:
-    """Create a dummy image and return it as a base64 encoded string"""
-    img = Image.new('RGB', (100, 100), color = 'red')
-    draw = ImageDraw.Draw(img)
-    draw.rectangle(((10, 10), (90, 90)), fill = 'blue')
-    buffered = BytesIO()
-    img.save(buffered, format="PNG")
-    img_str = base64.b64encode(buffered.getvalue()).decode('utf-8')
-    return f"data:image/png;base64,{img_str}"
-
-def test_save_image_endpoint(base_url: str, verbose: bool = False, token: str = None):
+    """Return the dummy test image as a base64 data URL"""
+    return f"data:image/png;base64,{DUMMY_PNG_B64}"
+
+def test_save_image_endpoint(base_url: str, verbose: bool = False, token: str = None, cache: bool = False):
     """Test the /save-image endpoint"""
+    # Imported here so --help and argument errors return without loading requests
+    import requests
 
     print(f"🔸 Testing Roof Analysis API at: {base_url}")
     if token:
@@ -37,10 +69,22 @@ def test_save_image_endpoint(base_url: str, verbose: bool = False, token: str =
     if token:
         headers["Authorization"] = f"Bearer {token}"
 
+    session = make_session(headers, cache)
+
     try:
-        # Test health endpoint first
-        print("\n📋 Testing health endpoint...")
-        health_response = requests.get(f"{base_url}/health", timeout=10)
+        image_data = create_dummy_image()
+        payload = {"image_data": image_data}
+
+        # Health check and /save-image run concurrently so a cold container
+        # only pays its start-up latency once
+        print("\n📋 Testing health endpoint and 📤 /save-image endpoint...")
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            health_future = executor.submit(session.get, f"{base_url}/health", timeout=10)
+            save_image_future = executor.submit(session.post, f"{base_url}/save-image", headers=headers,
+                                                json=payload, timeout=30)
+            health_response = health_future.result()
+            save_image_response = save_image_future.result()
+
         if health_response.status_code == 200:
             print("✅ Health check passed")
             if verbose:
@@ -48,14 +92,6 @@ def test_save_image_endpoint(base_url: str, verbose: bool = False, token: str =
         else:
             print(f"⚠️ Health check failed: {health_response.status_code}")
 
-        # Test /save-image endpoint
-        print("\n📤 Testing /save-image endpoint...")
-
-        image_data = create_dummy_image()
-        payload = {"image_data": image_data}
-
-        save_image_response = requests.post(f"{base_url}/save-image", headers=headers, json=payload, timeout=30)
-
         if save_image_response.status_code != 200:
             print(f"❌ /save-image endpoint failed: {save_image_response.status_code}")
             print(f"   Response: {save_image_response.text}")
@@ -73,11 +109,15 @@ def test_save_image_endpoint(base_url: str, verbose: bool = False, token: str =
     except Exception as e:
         print(f"❌ Test failed: {e}")
         return False
+    finally:
+        session.close()
 
 def main():
     parser = argparse.ArgumentParser(description="Test Roof Analysis API")
     parser.add_argument('--url', '-u', required=True, help='Base URL of the API (e.g., https://your-app.modal.run)')
     parser.add_argument('--verbose', '-v', action='store_true', help='Verbose output')
+    parser.add_argument('--cache', action='store_true',
+                        help='Cache responses in .http_cache.sqlite (honours Cache-Control) to skip repeat round-trips')
     parser.add_argument('--token', '-t', help='Bearer token for authentication')
 
     args = parser.parse_args()
@@ -85,7 +125,7 @@ def main():
     # Clean up URL
     base_url = args.url.rstrip('/')
 
-    result = test_save_image_endpoint(base_url, args.verbose, args.token)
+    result = test_save_image_endpoint(base_url, args.verbose, args.token, args.cache)
 
     if result:
         print("\n🎉 All tests passed!")
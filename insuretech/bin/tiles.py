@@ -0,0 +1,35 @@
+"""Slippy-map tile math for batches of lat/lng points."""
+
+import math
+
+import numpy as np
+
+try:  # JIT + parallel loop for large point sets (pip install numba)
+    import numba
+except ImportError:
+    numba = None
+
+prange = numba.prange if numba is not None else range
+
+
+def _latlng_to_tiles(latlng, z):
+    """
+    Convert an (N, 2) array of (lat, lng) degrees to an (N, 2) int32 array of
+    (x, y) tile coordinates at zoom z. Kept free of Python objects so numba
+    can compile it.
+    """
+    n = 2.0 ** z
+    max_index = int(n) - 1
+    out = np.empty((latlng.shape[0], 2), dtype=np.int32)
+    for i in prange(latlng.shape[0]):
+        lat_rad = math.radians(latlng[i, 0])
+        x = int((latlng[i, 1] + 180.0) / 360.0 * n)
+        y = int((1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * n)
+        # lng == 180 and latitudes past the Web Mercator limit fall off the grid
+        out[i, 0] = min(max(x, 0), max_index)
+        out[i, 1] = min(max(y, 0), max_index)
+    return out
+
+
+# Only compiled when numba is installed; otherwise the same loop runs in Python.
+latlng_to_tiles = numba.njit(cache=True, parallel=True)(_latlng_to_tiles) if numba is not None else _latlng_to_tiles